@@ -1,71 +1,131 @@
 import logging
 import os
-from logging.handlers import RotatingFileHandler
 from pathlib import Path
 
 from dotenv import load_dotenv
 from flask import Flask
-from flask_limiter import Limiter
-from flask_limiter.util import get_remote_address
 from flask_talisman import Talisman
 from flask_wtf.csrf import CSRFProtect
 
 from .config import get_config_class
 
+_env_loaded = False
 
-def create_app() -> Flask:
-    app = Flask(__name__)
-    
-    # Load configuration
+
+def _load_env(instance_path: str) -> None:
+    """Read .env files once per process, not once per ``create_app`` call."""
+    global _env_loaded
+    if _env_loaded:
+        return
     load_dotenv()  # .env in project root
     try:
-        load_dotenv(os.path.join(app.instance_path, ".env"))
+        load_dotenv(os.path.join(instance_path, ".env"))
     except Exception:
         pass
-    
-    # Apply configuration
-    app.config.from_object(get_config_class())
-    
-    # Railway specific configuration
-    if os.getenv("RAILWAY_ENVIRONMENT"):
-        app.config["PREFERRED_URL_SCHEME"] = "https"
-        app.config["SERVER_NAME"] = None
-        # Ensure we have a secret key
-        if not app.config["SECRET_KEY"] or app.config["SECRET_KEY"] == "change-this-in-production":
-            app.config["SECRET_KEY"] = os.urandom(32).hex()
-
-    # Ensure instance and data dirs exist
-    Path(app.instance_path).mkdir(parents=True, exist_ok=True)
-
-    from .routes import bp as main_bp
-
-    app.register_blueprint(main_bp)
-
-    # Register error handlers and health
-    from .health import health_bp, register_error_handlers
-
-    app.register_blueprint(health_bp)
-    register_error_handlers(app)
+    _env_loaded = True
 
-    _configure_security(app)
-    _configure_rate_limiting(app)
-    _configure_csrf(app)
-    _configure_logging(app)
 
+def create_app() -> Flask:
+    from .startup import StartupTimer, record
+
+    timer = StartupTimer()
+    with timer.phase("config"):
+        app = Flask(__name__)
+        _load_env(app.instance_path)
+
+        # Apply configuration
+        app.config.from_object(get_config_class())
+
+        # Railway specific configuration
+        if os.getenv("RAILWAY_ENVIRONMENT"):
+            app.config["PREFERRED_URL_SCHEME"] = "https"
+            app.config["SERVER_NAME"] = None
+            # Ensure we have a secret key
+            if (
+                not app.config["SECRET_KEY"]
+                or app.config["SECRET_KEY"] == "change-this-in-production"
+            ):
+                app.config["SECRET_KEY"] = os.urandom(32).hex()
+
+        # Ensure instance and data dirs exist
+        Path(app.instance_path).mkdir(parents=True, exist_ok=True)
+
+    with timer.phase("extensions"):
+        from . import (
+            ai,
+            assets,
+            cli,
+            columnar,
+            compression,
+            jobs,
+            monitoring,
+            pagecache,
+            ratelimit,
+            storage,
+        )
+
+        ai.init_app(app)
+        jobs.init_app(app)
+        storage.init_app(app)
+        columnar.init_app(app)
+        pagecache.init_app(app)
+        assets.init_app(app)
+        compression.init_app(app)
+        cli.init_app(app)
+
+    with timer.phase("blueprints"):
+        from .admin import admin_bp
+        from .api import api_bp
+        from .routes import bp as main_bp
+
+        app.register_blueprint(main_bp)
+        app.register_blueprint(api_bp)
+        app.register_blueprint(admin_bp)
+
+        # Register error handlers and health
+        from . import health
+
+        app.register_blueprint(health.health_bp)
+        health.register_error_handlers(app)
+
+    with timer.phase("security"):
+        _configure_security(app)
+        limiter = ratelimit.init_app(app)
+        # like /static: one page load fetches several assets
+        limiter.exempt(assets.assets_bp)
+        # every load of the cached form page fetches its token
+        limiter.exempt(app.view_functions["main.csrf_token"])
+        csrf = _configure_csrf(app)
+        # The JSON API is called by partner systems, not browser forms
+        csrf.exempt(api_bp)
+        csrf.exempt(admin_bp)
+
+    with timer.phase("monitoring"):
+        health.init_app(app, limiter)
+        monitoring.init_app(app, limiter)
+        _configure_logging(app)
+
+    record(app, "create_app", timer)
     return app
 
 
 def _configure_logging(app: Flask) -> None:
+    from . import logs
+
     log_dir = os.path.join(app.instance_path, "logs")
     os.makedirs(log_dir, exist_ok=True)
     log_path = os.path.join(log_dir, "app.log")
 
-    handler = RotatingFileHandler(log_path, maxBytes=1_000_000, backupCount=10)
-    handler.setLevel(getattr(logging, app.config.get("LOG_LEVEL", "INFO")))
-    formatter = logging.Formatter(
-        "%(asctime)s %(levelname)s %(name)s %(remote_addr)s %(method)s %(path)s - %(message)s"
+    # JSON records go through a bounded queue to one writer thread per worker
+    logs.configure(
+        app.logger,
+        log_path,
+        kind=app.config["LOG_HANDLER"],
+        level=getattr(logging, app.config.get("LOG_LEVEL", "INFO")),
+        maxsize=app.config["LOG_QUEUE_SIZE"],
+        max_bytes=app.config["LOG_MAX_BYTES"],
+        backup_count=app.config["LOG_BACKUP_COUNT"],
     )
-    handler.setFormatter(formatter)
 
     # Add request context fields via middleware
     @app.before_request
@@ -78,23 +138,6 @@ def _configure_logging(app: Flask) -> None:
             "path": request.path,
         }
 
-    class RequestContextFilter(logging.Filter):
-        def filter(self, record: logging.LogRecord) -> bool:
-            try:
-                from flask import g
-
-                for k, v in getattr(g, "log_fields", {}).items():
-                    setattr(record, k, v)
-            except Exception:
-                record.remote_addr = "-"
-                record.method = "-"
-                record.path = "-"
-            return True
-
-    handler.addFilter(RequestContextFilter())
-    app.logger.addHandler(handler)
-    app.logger.setLevel(getattr(logging, app.config.get("LOG_LEVEL", "INFO")))
-
 
 def _configure_security(app: Flask) -> None:
     # Disable Talisman on Railway to prevent redirect issues
@@ -114,12 +157,6 @@ def _configure_security(app: Flask) -> None:
     Talisman(app, content_security_policy=csp, strict_transport_security=True)
 
 
-def _configure_rate_limiting(app: Flask) -> Limiter:
-    limiter = Limiter(get_remote_address, storage_uri=app.config["RATELIMIT_STORAGE_URI"])
-    limiter.init_app(app)
-    return limiter
-
-
 def _configure_csrf(app: Flask) -> CSRFProtect:
     csrf = CSRFProtect()
     csrf.init_app(app)
@@ -0,0 +1,105 @@
+"""Admin API for program leads and researchers, behind a bearer token (``ADMIN_TOKEN``).
+
+Without ``ADMIN_TOKEN`` set the endpoints do not exist (404).
+"""
+
+import datetime
+import functools
+import hmac
+from typing import Callable, Optional
+
+from flask import Blueprint, Response, current_app, jsonify, request
+
+from . import export
+from .columnar import analytics
+from .storage import checkins
+
+admin_bp = Blueprint("admin", __name__, url_prefix="/api/v1/admin")
+
+
+def require_admin(view: Callable) -> Callable:
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        token = current_app.config["ADMIN_TOKEN"]
+        if not token:
+            return jsonify(error="Not found"), 404
+        scheme, _, given = request.headers.get("Authorization", "").partition(" ")
+        if scheme.lower() != "bearer" or not hmac.compare_digest(
+            given.strip().encode("utf-8"), token.encode("utf-8")
+        ):
+            response = jsonify(error="Admin token required")
+            response.status_code = 401
+            response.headers["WWW-Authenticate"] = "Bearer"
+            return response
+        return view(*args, **kwargs)
+
+    return wrapper
+
+
+def parse_time(value: Optional[str]) -> Optional[float]:
+    """Epoch seconds from a query value: epoch seconds or an ISO 8601 date/time (UTC)."""
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    moment = datetime.datetime.fromisoformat(value)
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=datetime.timezone.utc)
+    return moment.timestamp()
+
+
+def time_range():
+    """(since, until) from the query string; ValueError on a malformed value."""
+    return parse_time(request.args.get("since")), parse_time(request.args.get("until"))
+
+
+@admin_bp.get("/analytics")
+@require_admin
+def cohort_analytics():
+    """Level distributions, percentiles and risk rates by age band for a time range."""
+    if not analytics.enabled:
+        return jsonify(error="Analytics store is disabled (ANALYTICS_ENABLED)"), 404
+    try:
+        since, until = time_range()
+    except ValueError:
+        return jsonify(error="since/until must be epoch seconds or ISO 8601"), 400
+    response = jsonify(analytics.aggregate(since, until))
+    response.headers["Cache-Control"] = "no-store"
+    return response
+
+
+@admin_bp.get("/export")
+@require_admin
+def export_checkins():
+    """Stream stored check-ins as CSV or NDJSON (``format``), oldest first.
+
+    Query: ``since``/``until``, ``fields`` (comma-separated) and ``name`` /
+    ``thoughts`` set to ``drop`` (default), ``hash`` or ``keep``.
+    """
+    if not checkins.enabled:
+        return jsonify(error="Check-in storage is disabled (STORAGE_ENABLED)"), 404
+    cfg = current_app.config
+    fmt = request.args.get("format", "ndjson")
+    fields = request.args.get("fields")
+    try:
+        since, until = time_range()
+        chunks = export.export_chunks(
+            checkins,
+            fmt,
+            fields=fields.split(",") if fields else None,
+            since=since,
+            until=until,
+            name=request.args.get("name", "drop"),
+            thoughts=request.args.get("thoughts", "drop"),
+            secret=cfg["EXPORT_HASH_SECRET"] or cfg["SECRET_KEY"],
+            page_size=cfg["EXPORT_PAGE_SIZE"],
+        )
+    except ValueError as exc:
+        return jsonify(error=str(exc)), 400
+    # no Content-Length: the body goes out with chunked transfer encoding
+    response = Response(chunks, mimetype=export.MIMETYPES[fmt])
+    response.headers["Content-Disposition"] = f"attachment; filename=checkins.{fmt}"
+    response.headers["Cache-Control"] = "no-store"
+    return response
@@ -1,15 +1,48 @@
+import hashlib
+import json
 import os
-from functools import lru_cache
-from typing import Any, Dict, Optional
+import random
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from .breaker import CircuitBreaker
+from .cache import SingleFlight, TTLCache
+from .monitoring import timed
+from .text import analyze_notes
 
 _CACHE_TTL = int(os.getenv("AI_CACHE_TTL_SEC", "300"))
+_CACHE_SIZE = int(os.getenv("AI_CACHE_SIZE", "256"))
+
+# Process-wide cache of provider answers, keyed by _cache_key()
+_cache = TTLCache(maxsize=_CACHE_SIZE, ttl=_CACHE_TTL)
+# Identical payloads requested concurrently share one provider call
+_inflight = SingleFlight()
+
+# Provider call settings; overridden from app config by init_app()
+_settings: Dict[str, Any] = {
+    "timeout": float(os.getenv("AI_REQUEST_TIMEOUT", "10")),
+    "max_retries": int(os.getenv("AI_MAX_RETRIES", "2")),
+    "budget": float(os.getenv("AI_LATENCY_BUDGET_SEC", "15")),
+}
+_BACKOFF_BASE = 0.5
+_BACKOFF_CAP = 4.0
+# Don't start an attempt with less time than this left in the budget
+_MIN_ATTEMPT_SEC = 0.5
+
+_breaker = CircuitBreaker()
+
+_client = None
+_client_owner = None
+_client_lock = threading.Lock()
 
 
 def _sanitize_summary(summary: Dict[str, Any]) -> Dict[str, Any]:
     """Return a redacted summary safe to send to an external AI provider.
 
     - Remove direct PII (name)
-    - Truncate free-text notes to a reasonable length
+    - Redact emails, phone numbers and the name from free-text notes, and
+      truncate them to a reasonable length
     - Only include aggregated numeric results and levels
     """
     sanitized = {
@@ -23,82 +56,226 @@ def _sanitize_summary(summary: Dict[str, Any]) -> Dict[str, Any]:
         "gad7_level": summary.get("gad7_level"),
         "suggestions": summary.get("suggestions", []),
     }
-    notes = (summary.get("thoughts") or "").strip()
+    notes = summary.get("thoughts_redacted")
+    if notes is None:
+        notes = analyze_notes(
+            (summary.get("thoughts") or "").strip(), summary.get("name") or ""
+        ).redacted
     if notes:
-        sanitized["notes"] = notes[:500]
+        sanitized["notes"] = notes
     return sanitized
 
 
-def _cache_key(san: Dict[str, Any]) -> str:
-    # simple stable string key for sanitized payload – small and deterministic
-    parts = [
-        f"phq:{san.get('phq9_score')}",
-        f"gad:{san.get('gad7_score')}",
-        f"mood:{san.get('mood')}",
-        f"age:{san.get('age')}",
-    ]
-    return "-".join(parts)
+def _cache_key(san: Dict[str, Any], model: str = "") -> str:
+    # hash of the full sanitized payload (and model), so any field that can
+    # change the provider's answer also changes the key
+    payload = json.dumps(san, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(f"{model}\n{payload}".encode("utf-8")).hexdigest()
 
 
-def generate_ai_feedback(summary: Dict[str, Any]) -> Optional[str]:
-    """Safely call the AI provider with a sanitized summary.
+def cache_stats() -> Dict[str, Any]:
+    """Hit/miss/eviction counters of the AI feedback cache."""
+    return _cache.stats()
 
-    Returns a short piece of content or None on error/unconfigured.
-    """
-    api_key = os.getenv("OPENAI_API_KEY")
-    if not api_key:
-        return None
 
-    sanitized = _sanitize_summary(summary)
-    key = _cache_key(sanitized)
+def inflight_stats() -> Dict[str, int]:
+    """Provider calls currently in flight and how many callers were coalesced."""
+    return _inflight.stats()
 
-    # simple in-process cache: avoid repeated external calls for same data
-    @lru_cache(maxsize=256)
-    def _call_cached(k: str, payload_serialized: str) -> Optional[str]:
-        # payload_serialized is unused but ensures cache key uniqueness when needed
-        try:
+
+def _build_messages(sanitized: Dict[str, Any]) -> List[Dict[str, str]]:
+    system = (
+        "You are a supportive, non-clinical assistant. Provide short, practical, "
+        "and safe well-being suggestions. Avoid diagnostics or medical claims. "
+        "Encourage reaching out to trusted people or professionals when appropriate, "
+        "and include a brief safety note if risk indicators appear. Keep the "
+        "response under 120 words."
+    )
+    user = (
+        (
+            f"Age: {sanitized.get('age')}. Mood: {sanitized.get('mood')}. "
+            f"Sleep: {sanitized.get('sleep_hours')} hours. "
+            f"Stress: {sanitized.get('stress_level')}/5. "
+        )
+        + (
+            f"PHQ-9: {sanitized.get('phq9_score')} ({sanitized.get('phq9_level')}). "
+            f"GAD-7: {sanitized.get('gad7_score')} ({sanitized.get('gad7_level')}). "
+        )
+        + (
+            f"Notes (redacted): {sanitized.get('notes','')}. "
+            f"Suggestions so far: {sanitized.get('suggestions')}"
+        )
+    )
+    return [{"role": "system", "content": system}, {"role": "user", "content": user}]
+
+
+def init_app(app) -> None:
+    """Pick up provider timeout/retry/breaker settings from the Flask config."""
+    cfg = app.config
+    _settings["timeout"] = float(cfg.get("AI_TIMEOUT", _settings["timeout"]))
+    _settings["max_retries"] = int(cfg.get("AI_MAX_RETRIES", _settings["max_retries"]))
+    _settings["budget"] = float(cfg.get("AI_LATENCY_BUDGET", _settings["budget"]))
+    _breaker.configure(
+        failure_rate=cfg["AI_BREAKER_FAILURE_RATE"],
+        slow_call=cfg["AI_BREAKER_SLOW_CALL_SEC"],
+        slow_rate=cfg["AI_BREAKER_SLOW_RATE"],
+        min_calls=cfg["AI_BREAKER_MIN_CALLS"],
+        window=cfg["AI_BREAKER_WINDOW_SEC"],
+        open_seconds=cfg["AI_BREAKER_OPEN_SEC"],
+    )
+
+
+def _get_client(api_key: str):
+    """Return the worker's shared OpenAI client, creating it on first use.
+
+    One client means one keep-alive HTTP connection pool per worker process
+    instead of a new pool and TLS handshake per call. The client is rebuilt
+    after a fork or when the API key or timeout changes.
+    """
+    global _client, _client_owner
+    owner = (os.getpid(), api_key, _settings["timeout"])
+    if _client is not None and _client_owner == owner:
+        return _client
+    with _client_lock:
+        if _client is None or _client_owner != owner:
             from openai import OpenAI
 
-            client = OpenAI(api_key=api_key)
-            system = (
-                "You are a supportive, non-clinical assistant. Provide short, practical, "
-                "and safe well-being suggestions. Avoid diagnostics or medical claims. "
-                "Encourage reaching out to trusted people or professionals when appropriate, "
-                "and include a brief safety note if risk indicators appear. Keep the "
-                "response under 120 words."
-            )
-            user = (
-                (
-                    f"Age: {sanitized.get('age')}. Mood: {sanitized.get('mood')}. "
-                    f"Sleep: {sanitized.get('sleep_hours')} hours. "
-                    f"Stress: {sanitized.get('stress_level')}/5. "
-                )
-                + (
-                    f"PHQ-9: {sanitized.get('phq9_score')} ({sanitized.get('phq9_level')}). "
-                    f"GAD-7: {sanitized.get('gad7_score')} ({sanitized.get('gad7_level')}). "
-                )
-                + (
-                    f"Notes (redacted): {sanitized.get('notes','')}. "
-                    f"Suggestions so far: {sanitized.get('suggestions')}"
-                )
-            )
+            # retries are handled by _call_provider so they can be jittered
+            _client = OpenAI(api_key=api_key, timeout=_settings["timeout"], max_retries=0)
+            _client_owner = owner
+        return _client
+
+
+def _is_retryable(exc: Exception) -> bool:
+    try:
+        from openai import APIConnectionError, APIStatusError
+    except ImportError:
+        return False
+    if isinstance(exc, APIConnectionError):  # includes timeouts
+        return True
+    return isinstance(exc, APIStatusError) and (
+        exc.status_code == 429 or exc.status_code >= 500
+    )
 
-            model = os.getenv("OPENAI_MODEL", "gpt-4o-mini")
 
-            # lightweight timeout via client params where supported, and safe defaults
+def _backoff(attempt: int) -> float:
+    # "full jitter": spread retries from concurrent callers across the window
+    return random.uniform(0, min(_BACKOFF_CAP, _BACKOFF_BASE * 2**attempt))
+
+
+def _call_provider(
+    api_key: str, model: str, sanitized: Dict[str, Any], deadline: Optional[float] = None
+) -> Optional[str]:
+    """Call the provider, retrying transient errors within ``deadline``.
+
+    Every attempt goes through the circuit breaker; attempts are skipped once
+    the breaker is open or too little of the latency budget is left.
+    """
+    attempts = 1 + max(0, _settings["max_retries"])
+    for attempt in range(attempts):
+        timeout = _settings["timeout"]
+        if deadline is not None:
+            timeout = min(timeout, deadline - time.monotonic())
+            if timeout < _MIN_ATTEMPT_SEC:
+                return None
+        if not _breaker.allow():
+            return None
+
+        started = time.monotonic()
+        try:
+            client = _get_client(api_key)
+            if timeout < _settings["timeout"]:
+                client = client.with_options(timeout=timeout)
             response = client.chat.completions.create(
                 model=model,
-                messages=[{"role": "system", "content": system}, {"role": "user", "content": user}],
+                messages=_build_messages(sanitized),
                 temperature=0.4,
                 max_tokens=220,
             )
-            content = (
-                response.choices[0].message.content if getattr(response, "choices", None) else None
-            )
-            return (content or "").strip() or None
-        except Exception:
-            return None
+        except Exception as exc:
+            _breaker.record(False, time.monotonic() - started)
+            if attempt + 1 >= attempts or not _is_retryable(exc):
+                return None
+            delay = _backoff(attempt)
+            if deadline is not None and time.monotonic() + delay >= deadline:
+                return None
+            time.sleep(delay)
+            continue
+        except BaseException:
+            # e.g. a gevent Timeout: without a record a half-open probe stays
+            # claimed and the breaker never closes again
+            _breaker.record(False, time.monotonic() - started)
+            raise
+
+        _breaker.record(True, time.monotonic() - started)
+        content = (
+            response.choices[0].message.content if getattr(response, "choices", None) else None
+        )
+        return (content or "").strip() or None
+    return None
+
+
+def ai_configured() -> bool:
+    return bool(os.getenv("OPENAI_API_KEY"))
+
+
+def ai_available() -> bool:
+    """Whether an AI call is worth starting: configured and breaker not open."""
+    return ai_configured() and _breaker.would_allow()
+
+
+def breaker_state() -> Dict[str, Any]:
+    """Circuit breaker snapshot for health checks and metrics."""
+    return _breaker.snapshot()
+
+
+def check_ai_service(timeout: float = 3.0) -> Dict[str, Any]:
+    """Check the provider is reachable with the configured key; raises if not.
+
+    Lists models, which costs no tokens, bypassing retries and the breaker.
+    """
+    api_key = os.getenv("OPENAI_API_KEY")
+    if not api_key:
+        raise RuntimeError("OPENAI_API_KEY is not set")
+    _get_client(api_key).with_options(timeout=timeout).models.list()
+    return {"model": os.getenv("OPENAI_MODEL", "gpt-4o-mini")}
+
+
+@timed("ai")
+def generate_ai_feedback(
+    summary: Dict[str, Any], budget: Optional[float] = None
+) -> Optional[str]:
+    """Safely call the AI provider with a sanitized summary.
+
+    Returns a short piece of content or None on error/unconfigured. Successful
+    answers are cached process-wide for ``AI_CACHE_TTL_SEC`` seconds, so a
+    repeat submission does not cost another provider round trip, and
+    concurrent requests for the same payload wait on a single call.
+
+    ``budget`` caps the seconds spent on the provider, retries included
+    (default ``AI_LATENCY_BUDGET``). While the circuit breaker is open the
+    provider is not called at all.
+    """
+    api_key = os.getenv("OPENAI_API_KEY")
+    if not api_key:
+        return None
+
+    sanitized = _sanitize_summary(summary)
+    model = os.getenv("OPENAI_MODEL", "gpt-4o-mini")
+    key = _cache_key(sanitized, model)
+
+    cached = _cache.get(key)
+    if cached is not None:
+        return cached
+
+    if budget is None:
+        budget = _settings["budget"]
+    deadline = time.monotonic() + budget
+
+    def fetch() -> Optional[str]:
+        content = _call_provider(api_key, model, sanitized, deadline)
+        if content is not None:
+            _cache.set(key, content)
+        return content
 
-    # call cached function – serialize small payload string for cache stability
-    payload_serialized = str(sorted(sanitized.items()))
-    return _call_cached(key, payload_serialized)
+    return _inflight.do(key, fetch)
@@ -0,0 +1,108 @@
+"""Validation and rule-based analysis of a single check-in submission.
+
+The form view and the JSON API both go through ``parse_submission`` and
+``build_summary`` so a record is judged the same way whichever door it came in.
+Fields are validated by the compiled ``SUBMISSION_SCHEMA``; suggestions come
+from the table-driven engine in ``app.rules``.
+"""
+
+from typing import Any, Dict, Mapping, Tuple
+
+from . import rules
+from .monitoring import stage
+from .schema import Field, FormSchema
+from .text import analyze_notes
+from .utils import score_gad7, score_phq9
+
+VALID_MOODS = {"very low", "low", "neutral", "good", "very good"}
+
+_ITEM = dict(type=int, invalid="Select 0-3", low=0, high=3, out_of_range="Select 0-3")
+
+SUBMISSION_SCHEMA = FormSchema(
+    [
+        Field("name", required="Name is required."),
+        Field(
+            "age",
+            int,
+            invalid="Age must be a number.",
+            low=13,
+            high=120,
+            out_of_range="Enter a realistic age (13-120).",
+        ),
+        Field("mood", choices=frozenset(VALID_MOODS), lower=True, invalid="Select a mood option."),
+        Field(
+            "sleep",
+            float,
+            key="sleep_hours",
+            invalid="Sleep must be a number.",
+            low=0,
+            high=24,
+            out_of_range="Enter hours between 0 and 24.",
+        ),
+        Field(
+            "stress",
+            int,
+            key="stress_level",
+            invalid="Stress must be a number.",
+            low=1,
+            high=5,
+            out_of_range="Stress must be 1-5.",
+        ),
+        Field("thoughts"),
+        # PHQ-9 and GAD-7 answers; only valid answers are collected
+        *(Field(f"phq9_{i}", list_key="phq9", **_ITEM) for i in range(1, 10)),
+        *(Field(f"gad7_{i}", list_key="gad7", **_ITEM) for i in range(1, 8)),
+        # Lifestyle
+        Field("exercise_days", int, invalid="Required", default=0),
+        Field("caffeine_cups", int, invalid="Required", default=0),
+        Field("screen_hours", float, invalid="Required", default=0.0),
+        Field(
+            "support_level", int, invalid="Required", default=3, low=1, high=5, out_of_range="1-5"
+        ),
+    ]
+)
+
+
+def parse_submission(form: Mapping[str, str]) -> Tuple[Dict[str, Any], Dict[str, str]]:
+    """Validate raw form values against ``SUBMISSION_SCHEMA``.
+
+    Returns (values, errors); ``values`` is only complete when ``errors`` is empty.
+    """
+    values, errors, _ = SUBMISSION_SCHEMA.validate(form)
+    return values, errors
+
+
+def build_summary(values: Dict[str, Any]) -> Dict[str, Any]:
+    """Score the questionnaires and run the suggestion rules on validated values."""
+    # Use centralized scoring helpers
+    with stage("score"):
+        phq9_score, phq_level, suicidal_flag = score_phq9(values["phq9"])
+        gad7_score, gad7_level = score_gad7(values["gad7"])
+
+    with stage("notes"):
+        notes = analyze_notes(values["thoughts"], values["name"])
+    with stage("rules"):
+        outcome = rules.evaluate(
+            {**values, "phq9_suicidal": suicidal_flag, "thoughts_risk": notes.risk}
+        )
+
+    return {
+        "name": values["name"],
+        "age": values["age"],
+        "mood": values["mood"],
+        "sleep_hours": values["sleep_hours"],
+        "stress_level": values["stress_level"],
+        "thoughts": values["thoughts"],
+        # redacted and truncated notes, safe to hand to third parties
+        "thoughts_redacted": notes.redacted,
+        "risk_flag": outcome.risk_flag,
+        "suggestions": list(outcome.texts),
+        "phq9_score": phq9_score,
+        "phq9_level": phq_level,
+        "gad7_score": gad7_score,
+        "gad7_level": gad7_level,
+        "exercise_days": values["exercise_days"],
+        "caffeine_cups": values["caffeine_cups"],
+        "screen_hours": values["screen_hours"],
+        "support_level": values["support_level"],
+    }
@@ -0,0 +1,194 @@
+"""JSON API for programmatic (partner) submissions."""
+
+import codecs
+import itertools
+import json
+from typing import Any, Dict, Iterator, Mapping
+
+from flask import Blueprint, Response, current_app, jsonify, request, stream_with_context
+
+from .analysis import build_summary, parse_submission
+from .jobs import DONE, EXPIRED, ai_jobs
+
+api_bp = Blueprint("api", __name__, url_prefix="/api/v1")
+
+_CHUNK_SIZE = 64 * 1024
+_MAX_RECORD_CHARS = 64 * 1024
+_NDJSON_TYPES = {"application/x-ndjson", "application/ndjson", "application/jsonl"}
+
+
+class BatchFormatError(ValueError):
+    """The request body is not a JSON array or NDJSON stream."""
+
+
+def _iter_text(stream) -> Iterator[str]:
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    while True:
+        chunk = stream.read(_CHUNK_SIZE)
+        text = decoder.decode(chunk, final=not chunk)
+        if text:
+            yield text
+        if not chunk:
+            return
+
+
+def _iter_ndjson(chunks: Iterator[str]) -> Iterator[Any]:
+    """Yield one decoded value per non-blank line, or the exception it raised."""
+    pending = ""
+    for chunk in itertools.chain(chunks, ["\n"]):
+        pending += chunk
+        *lines, pending = pending.split("\n")
+        if len(pending) > _MAX_RECORD_CHARS:
+            raise BatchFormatError("Record too large")
+        for line in lines:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except ValueError as exc:
+                yield exc
+
+
+def _iter_json_array(chunks: Iterator[str]) -> Iterator[Any]:
+    """Incrementally decode the elements of a top-level JSON array.
+
+    Only the element being decoded is buffered, so a huge array costs no more
+    memory than a small one.
+    """
+    decoder = json.JSONDecoder()
+    buf, eof, state = "", False, "open"
+    while True:
+        buf = buf.lstrip()
+        if buf and state == "value":
+            try:
+                value, end = decoder.raw_decode(buf)
+            except ValueError:
+                if eof or len(buf) > _MAX_RECORD_CHARS:
+                    raise BatchFormatError("Malformed JSON array element") from None
+            else:
+                # a value running to the end of the buffer (e.g. a number) may
+                # continue in the next chunk
+                if end < len(buf) or eof:
+                    yield value
+                    buf, state = buf[end:], "sep"
+                    continue
+        elif buf:
+            char, buf = buf[0], buf[1:]
+            if state == "open" and char == "[":
+                state = "first"
+            elif state in ("first", "sep") and char == "]":
+                return
+            elif state == "first":
+                buf, state = char + buf, "value"
+            elif state == "sep" and char == ",":
+                state = "value"
+            else:
+                raise BatchFormatError(f"Unexpected {char!r} in JSON array")
+            continue
+        if eof:
+            raise BatchFormatError("Unterminated JSON array")
+        chunk = next(chunks, None)
+        if chunk is None:
+            eof = True
+        else:
+            buf += chunk
+
+
+def iter_records(stream, mimetype: str) -> Iterator[Any]:
+    """Yield records from a JSON array or NDJSON request body.
+
+    Records that fail to decode are yielded as the exception so the caller can
+    report them without abandoning the rest of the batch.
+    """
+    chunks = _iter_text(stream)
+    if mimetype not in _NDJSON_TYPES:
+        head = ""
+        for chunk in chunks:
+            head = chunk.lstrip()
+            if head:
+                break
+        if not head:
+            return
+        chunks = itertools.chain([head], chunks)
+        if head[0] == "[":
+            yield from _iter_json_array(chunks)
+            return
+        if head[0] != "{":
+            raise BatchFormatError("Body must be a JSON array or NDJSON")
+    yield from _iter_ndjson(chunks)
+
+
+def _form_value(value: Any) -> str:
+    if value is None:
+        return ""
+    # JSON writers often emit whole numbers as 25.0, which int() would reject
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+
+def _as_form(record: Mapping[str, Any]) -> Dict[str, str]:
+    return {k: _form_value(v) for k, v in record.items()}
+
+
+def analyze_record(index: int, record: Any) -> Dict[str, Any]:
+    """Validate and analyze one batch record, returning its result line."""
+    if isinstance(record, Exception):
+        return {"index": index, "ok": False, "errors": {"_record": "Invalid JSON"}}
+    if not isinstance(record, dict):
+        return {"index": index, "ok": False, "errors": {"_record": "Record must be an object"}}
+
+    result: Dict[str, Any] = {"index": index}
+    if "id" in record:
+        result["id"] = record["id"]
+    values, errors = parse_submission(_as_form(record))
+    if errors:
+        result.update(ok=False, errors=errors)
+    else:
+        result.update(ok=True, summary=build_summary(values))
+    return result
+
+
+@api_bp.post("/analyze/batch")
+def analyze_batch():
+    """Analyze a JSON array or NDJSON body, streaming one NDJSON result per record."""
+    max_records = current_app.config["BATCH_MAX_RECORDS"]
+    mimetype = request.mimetype
+    stream = request.stream
+
+    def generate():
+        index = 0
+        try:
+            for record in iter_records(stream, mimetype):
+                if index >= max_records:
+                    yield _line({"ok": False, "error": f"Batch limited to {max_records} records"})
+                    return
+                yield _line(analyze_record(index, record))
+                index += 1
+        except (BatchFormatError, UnicodeDecodeError) as exc:
+            yield _line({"ok": False, "error": str(exc)})
+
+    return Response(stream_with_context(generate()), mimetype="application/x-ndjson")
+
+
+def _line(obj: Dict[str, Any]) -> str:
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":")) + "\n"
+
+
+@api_bp.get("/ai-feedback/<job_id>")
+def ai_feedback(job_id: str):
+    """Poll (or long-poll with ``?wait=<seconds>``) a deferred AI feedback job."""
+    max_wait = current_app.config["AI_JOB_MAX_WAIT"]
+    wait = min(max(request.args.get("wait", 0, type=float), 0.0), max_wait)
+    status, feedback = ai_jobs.poll(job_id, wait=wait)
+    if status == DONE:
+        body, code = {"status": status, "feedback": feedback}, 200
+    elif status == EXPIRED:
+        body, code = {"status": status}, 404
+    else:
+        body, code = {"status": status}, 202
+    response = jsonify(body)
+    response.status_code = code
+    response.headers["Cache-Control"] = "no-store"
+    return response
@@ -0,0 +1,203 @@
+"""Fingerprinted, precompressed static assets.
+
+``flask assets build`` minifies the CSS and JS under ``app/static``, copies
+every asset to ``app/static/dist`` under a content-hashed name, writes gzip
+(and, when the ``brotli`` package is installed, brotli) variants next to it
+and records the mapping in ``dist/manifest.json``.
+
+At runtime ``asset_url`` (a ``url_for``-compatible template global) links the
+hashed files, which ``/assets/<name>`` serves in the best encoding the client
+accepts with a one-year immutable Cache-Control. Without a manifest (a fresh
+checkout) it falls back to the plain ``static`` URLs.
+"""
+
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import re
+import shutil
+from typing import Dict
+
+from flask import Blueprint, abort, current_app, request, send_file, url_for
+
+try:  # optional: brotli variants are skipped without it
+    import brotli
+except ImportError:  # pragma: no cover - depends on the environment
+    brotli = None
+
+DIST_DIR = "dist"
+MANIFEST_NAME = "manifest.json"
+_FINGERPRINTED = (".css", ".js", ".svg", ".png", ".jpg", ".ico", ".woff2")
+_COMPRESSIBLE = (".css", ".js", ".svg")
+# below this a compressed variant does not pay for its headers
+_MIN_COMPRESS_BYTES = 256
+
+assets_bp = Blueprint("assets", __name__)
+
+# strings and comments in CSS, matched together so comment markers inside
+# strings (and quotes inside comments) are not misread
+_CSS_TOKEN_RE = re.compile(r'"(?:\\.|[^"\\])*"|\'(?:\\.|[^\'\\])*\'|/\*.*?\*/', re.S)
+_CSS_SPACE_RE = re.compile(r"\s+")
+_CSS_PUNCT_RE = re.compile(r"\s*([{};,>])\s*")
+_CSS_COLON_RE = re.compile(r":\s+")
+
+
+def _minify_css_code(code: str) -> str:
+    code = _CSS_SPACE_RE.sub(" ", code)
+    code = _CSS_PUNCT_RE.sub(r"\1", code)
+    return _CSS_COLON_RE.sub(":", code)
+
+
+def minify_css(css: str) -> str:
+    """Drop comments and redundant whitespace, leaving strings untouched."""
+    out = []
+    code = []  # code between strings; comments become a space
+    pos = 0
+    for match in _CSS_TOKEN_RE.finditer(css):
+        code.append(css[pos : match.start()])
+        token = match.group()
+        if token.startswith("/*"):
+            code.append(" ")
+        else:
+            out.append(_minify_css_code("".join(code)))
+            out.append(token)
+            code = []
+        pos = match.end()
+    code.append(css[pos:])
+    out.append(_minify_css_code("".join(code)))
+    return "".join(out).replace(";}", "}").strip()
+
+
+def minify_js(js: str) -> str:
+    """Conservative JS minification: indentation, blank and comment-only lines.
+
+    Line breaks are kept so automatic semicolon insertion is unaffected.
+    """
+    lines = []
+    for line in js.splitlines():
+        line = line.strip()
+        if line and not line.startswith("//"):
+            lines.append(line)
+    return "\n".join(lines) + "\n"
+
+
+_MINIFIERS = {".css": minify_css, ".js": minify_js}
+
+
+def _write(path: str, data: bytes) -> None:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as fh:
+        fh.write(data)
+
+
+def build(static_dir: str) -> Dict[str, Dict[str, int]]:
+    """Build ``static_dir/dist`` and its manifest; returns per-asset byte sizes."""
+    dist = os.path.join(static_dir, DIST_DIR)
+    shutil.rmtree(dist, ignore_errors=True)
+    manifest: Dict[str, str] = {}
+    sizes: Dict[str, Dict[str, int]] = {}
+    for root, dirs, files in os.walk(static_dir):
+        if os.path.abspath(root) == os.path.abspath(static_dir):
+            dirs[:] = [d for d in dirs if d != DIST_DIR]
+        for filename in sorted(files):
+            base, ext = os.path.splitext(filename)
+            if ext.lower() not in _FINGERPRINTED:
+                continue
+            source = os.path.join(root, filename)
+            logical = os.path.relpath(source, static_dir).replace(os.sep, "/")
+            with open(source, "rb") as fh:
+                data = fh.read()
+            minify = _MINIFIERS.get(ext.lower())
+            if minify is not None:
+                data = minify(data.decode("utf-8")).encode("utf-8")
+
+            digest = hashlib.sha256(data).hexdigest()[:12]
+            hashed = f"{os.path.dirname(logical)}/{base}.{digest}{ext}".lstrip("/")
+            target = os.path.join(dist, hashed)
+            _write(target, data)
+            manifest[logical] = hashed
+            sizes[logical] = {"original": os.path.getsize(source), "minified": len(data)}
+
+            if ext.lower() in _COMPRESSIBLE and len(data) >= _MIN_COMPRESS_BYTES:
+                gz = gzip.compress(data, compresslevel=9, mtime=0)
+                _write(target + ".gz", gz)
+                sizes[logical]["gzip"] = len(gz)
+                if brotli is not None:
+                    br = brotli.compress(data, quality=11)
+                    _write(target + ".br", br)
+                    sizes[logical]["br"] = len(br)
+
+    _write(
+        os.path.join(dist, MANIFEST_NAME),
+        json.dumps(manifest, indent=2, sort_keys=True).encode("utf-8"),
+    )
+    return sizes
+
+
+def load_manifest(static_dir: str) -> Dict[str, str]:
+    try:
+        with open(os.path.join(static_dir, DIST_DIR, MANIFEST_NAME), encoding="utf-8") as fh:
+            return json.load(fh)
+    except (OSError, ValueError):
+        return {}
+
+
+_ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+
+
+def init_app(app) -> None:
+    load(app)
+    app.add_template_global(asset_url)
+    app.register_blueprint(assets_bp)
+
+
+def load(app) -> None:
+    """(Re)read the build manifest of ``app``'s static folder."""
+    manifest = load_manifest(app.static_folder) if app.config["ASSETS_ENABLED"] else {}
+    dist = os.path.join(app.static_folder, DIST_DIR)
+    # hashed name -> encodings with a precompressed variant, in preference order
+    files = {
+        hashed: tuple(
+            (encoding, suffix)
+            for encoding, suffix in _ENCODINGS
+            if os.path.exists(os.path.join(dist, hashed + suffix))
+        )
+        for hashed in manifest.values()
+    }
+    app.extensions["assets"] = {"manifest": manifest, "files": files}
+
+
+def asset_url(endpoint: str, **values) -> str:
+    """``url_for`` that links the fingerprinted build of static files when there is one."""
+    if endpoint == "static":
+        hashed = current_app.extensions["assets"]["manifest"].get(values.get("filename"))
+        if hashed is not None:
+            values["filename"] = hashed
+            return url_for("assets.serve", **values)
+    return url_for(endpoint, **values)
+
+
+@assets_bp.get("/assets/<path:filename>")
+def serve(filename: str):
+    # only names written by the build can be served, so no path tricks
+    variants = current_app.extensions["assets"]["files"].get(filename)
+    if variants is None:
+        abort(404)
+    path = os.path.join(current_app.static_folder, DIST_DIR, filename)
+    mimetype = mimetypes.guess_type(filename)[0] or "application/octet-stream"
+    accepted = request.accept_encodings
+    encoding, suffix = next(((e, s) for e, s in variants if accepted[e]), (None, ""))
+    response = send_file(
+        path + suffix,
+        mimetype=mimetype,
+        conditional=True,
+        max_age=current_app.config["ASSETS_MAX_AGE"],
+    )
+    if encoding:
+        response.headers["Content-Encoding"] = encoding
+    response.vary.add("Accept-Encoding")
+    response.cache_control.public = True
+    response.cache_control.immutable = True
+    return response
@@ -0,0 +1,135 @@
+"""Circuit breaker for calls to an unreliable dependency."""
+
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, Tuple
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """Closed/open/half-open breaker driven by error rate and latency.
+
+    Outcomes of recent calls are kept for ``window`` seconds. Once at least
+    ``min_calls`` were seen, the breaker opens when the share of failed calls
+    reaches ``failure_rate`` or the share of calls slower than ``slow_call``
+    seconds reaches ``slow_rate``. After ``open_seconds`` it lets a single
+    probe through (half-open): success closes it, failure reopens it.
+    """
+
+    def __init__(
+        self,
+        failure_rate: float = 0.5,
+        slow_call: float = 5.0,
+        slow_rate: float = 0.8,
+        min_calls: int = 5,
+        window: float = 60.0,
+        open_seconds: float = 30.0,
+        timer: Callable[[], float] = time.monotonic,
+    ):
+        self.configure(failure_rate, slow_call, slow_rate, min_calls, window, open_seconds)
+        self._timer = timer
+        self._lock = threading.Lock()
+        self._calls: Deque[Tuple[float, bool, bool]] = deque()  # (at, failed, slow)
+        self._state = CLOSED
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self.opened_count = 0
+        self.rejected_count = 0
+
+    def configure(
+        self,
+        failure_rate: float,
+        slow_call: float,
+        slow_rate: float,
+        min_calls: int,
+        window: float,
+        open_seconds: float,
+    ) -> None:
+        self.failure_rate = failure_rate
+        self.slow_call = slow_call
+        self.slow_rate = slow_rate
+        self.min_calls = min_calls
+        self.window = window
+        self.open_seconds = open_seconds
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._current_state()
+
+    def _current_state(self) -> str:
+        if self._state == OPEN and self._timer() - self._opened_at >= self.open_seconds:
+            self._state = HALF_OPEN
+            self._probe_in_flight = False
+        return self._state
+
+    def would_allow(self) -> bool:
+        """Whether a call would currently be let through, without claiming a probe."""
+        with self._lock:
+            state = self._current_state()
+            return state == CLOSED or (state == HALF_OPEN and not self._probe_in_flight)
+
+    def allow(self) -> bool:
+        """Claim permission for one call; pair with ``record``."""
+        with self._lock:
+            state = self._current_state()
+            if state == CLOSED:
+                return True
+            if state == HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return True
+            self.rejected_count += 1
+            return False
+
+    def record(self, ok: bool, duration: float) -> None:
+        """Record the outcome of a call that ``allow`` let through."""
+        now = self._timer()
+        slow = duration >= self.slow_call
+        with self._lock:
+            if self._state == HALF_OPEN:
+                self._probe_in_flight = False
+                if ok and not slow:
+                    self._state = CLOSED
+                    self._calls.clear()
+                else:
+                    self._trip(now)
+                return
+
+            self._calls.append((now, not ok, slow))
+            cutoff = now - self.window
+            while self._calls and self._calls[0][0] < cutoff:
+                self._calls.popleft()
+            total = len(self._calls)
+            if self._state == CLOSED and total >= self.min_calls:
+                failures = sum(1 for _, failed, _ in self._calls if failed)
+                slows = sum(1 for _, _, was_slow in self._calls if was_slow)
+                if failures / total >= self.failure_rate or slows / total >= self.slow_rate:
+                    self._trip(now)
+
+    def _trip(self, now: float) -> None:
+        self._state = OPEN
+        self._opened_at = now
+        self._calls.clear()
+        self.opened_count += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            state = self._current_state()
+            total = len(self._calls)
+            failures = sum(1 for _, failed, _ in self._calls if failed)
+            slows = sum(1 for _, _, was_slow in self._calls if was_slow)
+            snap: Dict[str, Any] = {
+                "state": state,
+                "calls": total,
+                "failure_rate": failures / total if total else 0.0,
+                "slow_rate": slows / total if total else 0.0,
+                "opened_count": self.opened_count,
+                "rejected_count": self.rejected_count,
+            }
+            if state == OPEN:
+                snap["retry_in"] = max(0.0, self.open_seconds - (self._timer() - self._opened_at))
+            return snap
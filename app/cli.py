@@ -0,0 +1,89 @@
+"""Flask CLI commands (``flask --app wsgi <group> <command>``)."""
+
+import click
+from flask import current_app
+from flask.cli import AppGroup, with_appcontext
+
+from . import assets, export, scorefile
+from .admin import parse_time
+from .api import BatchFormatError
+from .storage import checkins
+
+assets_cli = AppGroup("assets", help="Static asset pipeline.")
+
+
+@assets_cli.command("build")
+def build_assets() -> None:
+    """Minify, fingerprint and precompress static files into static/dist."""
+    sizes = assets.build(current_app.static_folder)
+    for name, size in sorted(sizes.items()):
+        parts = [f"{size['original']} -> {size['minified']} B"]
+        parts += [f"{enc} {size[enc]} B" for enc in ("gzip", "br") if enc in size]
+        click.echo(f"{name}: {', '.join(parts)}")
+    if assets.brotli is None:
+        click.echo("brotli not installed; built gzip variants only")
+    click.echo(f"Wrote {len(sizes)} assets to {assets.DIST_DIR}/")
+
+
+@click.command("export")
+@click.option("--format", "fmt", type=click.Choice(export.FORMATS), default="ndjson")
+@click.option("--since", help="Epoch seconds or ISO 8601 (UTC), inclusive.")
+@click.option("--until", help="Epoch seconds or ISO 8601 (UTC), exclusive.")
+@click.option("--fields", help="Comma-separated columns (default: all).")
+@click.option("--name", type=click.Choice(export.MODES), default="drop", show_default=True)
+@click.option("--thoughts", type=click.Choice(export.MODES), default="drop", show_default=True)
+@click.option("--output", "-o", type=click.File("w", encoding="utf-8"), default="-")
+@with_appcontext
+def export_command(fmt, since, until, fields, name, thoughts, output) -> None:
+    """Stream stored check-ins as CSV or NDJSON, oldest first."""
+    if not checkins.enabled:
+        raise click.ClickException("Check-in storage is disabled (set STORAGE_ENABLED)")
+    cfg = current_app.config
+    try:
+        chunks = export.export_chunks(
+            checkins,
+            fmt,
+            fields=fields.split(",") if fields else None,
+            since=parse_time(since),
+            until=parse_time(until),
+            name=name,
+            thoughts=thoughts,
+            secret=cfg["EXPORT_HASH_SECRET"] or cfg["SECRET_KEY"],
+            page_size=cfg["EXPORT_PAGE_SIZE"],
+        )
+    except ValueError as exc:
+        raise click.ClickException(str(exc)) from exc
+    for chunk in chunks:
+        output.write(chunk)
+
+
+@click.command("score-file")
+@click.argument("input_path", metavar="INPUT", type=click.Path(exists=True, dir_okay=False))
+@click.option("--output", "-o", default="-", help="Output file (default: stdout).")
+@click.option("--input-format", type=click.Choice(scorefile.FORMATS), help="Default: by extension.")
+@click.option("--output-format", type=click.Choice(scorefile.FORMATS), help="As --input-format.")
+@click.option("--chunk-size", type=click.IntRange(min=1), default=1000, show_default=True)
+@click.option("--workers", type=click.IntRange(min=1), help="Default: available CPUs.")
+def score_file_command(input_path, output, input_format, output_format, chunk_size, workers):
+    """Score a CSV/NDJSON file of PHQ-9/GAD-7 responses, with suggestions.
+
+    Records use the check-in form's field names. Results keep the input order;
+    progress goes to stderr.
+    """
+    in_fmt = input_format or scorefile.format_for(input_path)
+    out_fmt = output_format or scorefile.format_for(output)
+    progress = scorefile.Progress(lambda line: click.echo(line, err=True))
+    with open(input_path, "rb") as stream, click.open_file(
+        output, "w", encoding="utf-8", lazy=False
+    ) as out:
+        try:
+            scorefile.score_file(stream, out, in_fmt, out_fmt, chunk_size, workers, progress)
+        except BatchFormatError as exc:
+            raise click.ClickException(str(exc)) from exc
+    click.echo(f"Done: {progress.line()}", err=True)
+
+
+def init_app(app) -> None:
+    app.cli.add_command(assets_cli)
+    app.cli.add_command(export_command)
+    app.cli.add_command(score_file_command)
@@ -0,0 +1,258 @@
+"""Columnar copy of stored check-ins for cohort analytics.
+
+Every batch the storage writer commits is also appended here: one file of
+fixed-width NumPy values per field, in segments of ``ANALYTICS_SEGMENT_SEC``
+(a UTC day by default). A segment's ``rows`` file holds its count of complete
+rows and is replaced after the columns are written, so a crash mid-append
+only leaves bytes past the end that the next append overwrites. Appends from
+several worker processes are serialized by an ``flock`` on the segment.
+
+Readers memory-map the columns read-only and skip segments outside the
+requested time range. Each segment is reduced to a few ``bincount`` arrays
+(severity levels, histograms of the hour and stress fields, counts by age),
+which add up across segments; only the segments straddling the ends of the
+range are masked, and the counts of whole segments are cached until they
+grow, so a query over past days costs little more than summing arrays.
+Percentiles are read off the histograms, at 0.1 h resolution for hours.
+"""
+
+import os
+import threading
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .storage import checkins
+from .utils import GAD7_LEVELS, PHQ9_LEVELS
+
+try:
+    import fcntl
+except ImportError:  # Windows: single-process development server only
+    fcntl = None
+
+COLUMNS: Tuple[Tuple[str, Any], ...] = (
+    ("created_at", np.float64),
+    ("age", np.int16),
+    ("sleep_hours", np.float32),
+    ("stress_level", np.int8),
+    ("screen_hours", np.float32),
+    ("phq9_score", np.int8),
+    ("phq9_level", np.int8),
+    ("gad7_score", np.int8),
+    ("gad7_level", np.int8),
+    ("risk_flag", np.bool_),
+)
+# severity levels are stored as their index into the labels
+_LEVEL_CODES = {
+    "phq9_level": {label: code for code, label in enumerate(PHQ9_LEVELS)},
+    "gad7_level": {label: code for code, label in enumerate(GAD7_LEVELS)},
+}
+
+PERCENTILES = (10, 25, 50, 75, 90)
+# Percentiles come from histograms, which add up across segments:
+# (field, bins per unit, top value); values are clipped to [0, top].
+HISTOGRAMS = (("sleep_hours", 10, 24), ("stress_level", 1, 5), ("screen_hours", 10, 24))
+MAX_AGE = 120
+# lower bound of each age band after the first (ages start at 13)
+AGE_BAND_EDGES = (18, 25, 35, 45, 55, 65)
+AGE_BANDS = ("13-17", "18-24", "25-34", "35-44", "45-54", "55-64", "65+")
+_AGE_BAND = np.digitize(np.arange(MAX_AGE + 1), AGE_BAND_EDGES)
+
+
+def _read_rows(directory: str) -> int:
+    try:
+        with open(os.path.join(directory, "rows"), encoding="ascii") as fh:
+            return int(fh.read() or 0)
+    except FileNotFoundError:
+        return 0
+
+
+def _write_rows(directory: str, rows: int) -> None:
+    path = os.path.join(directory, "rows")
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="ascii") as fh:
+        fh.write(str(rows))
+    os.replace(tmp, path)
+
+
+def to_columns(records: Sequence[Dict[str, Any]]) -> Dict[str, np.ndarray]:
+    """Stored check-in fields (plus ``created_at``) as one array per column."""
+    out = {}
+    for name, dtype in COLUMNS:
+        codes = _LEVEL_CODES.get(name)
+        if codes is not None:
+            values = [codes.get(r[name], -1) for r in records]
+        else:
+            values = [r[name] for r in records]
+        out[name] = np.array(values, dtype=dtype)
+    return out
+
+
+def _counts(columns: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+    """Level, histogram and age counts of some rows; the aggregates are sums of these."""
+    ages = np.clip(columns["age"], 0, MAX_AGE)
+    out = {
+        # level code -1 (unknown label) lands in the dropped first bin
+        "phq9_level": np.bincount(columns["phq9_level"] + 1, minlength=len(PHQ9_LEVELS) + 1)[1:],
+        "gad7_level": np.bincount(columns["gad7_level"] + 1, minlength=len(GAD7_LEVELS) + 1)[1:],
+        "age": np.bincount(ages, minlength=MAX_AGE + 1),
+        "age_risk": np.bincount(ages, weights=columns["risk_flag"], minlength=MAX_AGE + 1),
+    }
+    for name, scale, top in HISTOGRAMS:
+        bins = np.rint(np.clip(columns[name], 0, top) * scale).astype(np.intp)
+        out[name] = np.bincount(bins, minlength=top * scale + 1)
+    return out
+
+
+def _percentiles(histogram: np.ndarray, scale: int) -> Optional[Dict[str, float]]:
+    """Nearest-rank percentiles from a histogram with ``scale`` bins per unit."""
+    total = histogram.sum()
+    if not total:
+        return None
+    ranks = np.ceil(np.array(PERCENTILES) / 100 * total)
+    bins = np.searchsorted(np.cumsum(histogram), ranks)
+    return {f"p{p}": round(float(b) / scale, 2) for p, b in zip(PERCENTILES, bins, strict=True)}
+
+
+class ColumnStore:
+    def __init__(self):
+        self.directory: Optional[str] = None
+        self.segment_sec = 86400
+        self.appended = 0
+        # per whole segment: (rows, counts for the aggregates). Column maps are
+        # not kept: each holds an fd per column, which would add up over months
+        # of daily segments.
+        self._counts: Dict[str, Tuple[int, Dict[str, np.ndarray]]] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.directory is not None
+
+    def configure(self, directory: str, segment_sec: int = 86400) -> None:
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.segment_sec = segment_sec
+        with self._lock:
+            self._counts.clear()
+
+    def disable(self) -> None:
+        self.directory = None
+        with self._lock:
+            self._counts.clear()
+
+    def _segment_dir(self, start: int) -> str:
+        return os.path.join(self.directory, f"{start:012d}")
+
+    def append(self, batch: List[Tuple[float, Dict[str, Any]]]) -> None:
+        """Append ``(created_at, stored fields)`` records (a storage sink)."""
+        by_segment: Dict[int, List[Dict[str, Any]]] = {}
+        for created_at, fields in batch:
+            start = int(created_at // self.segment_sec) * self.segment_sec
+            by_segment.setdefault(start, []).append({**fields, "created_at": created_at})
+        for start, records in sorted(by_segment.items()):
+            self._append_segment(self._segment_dir(start), to_columns(records))
+            self.appended += len(records)
+
+    def _append_segment(self, directory: str, columns: Dict[str, np.ndarray]) -> None:
+        os.makedirs(directory, exist_ok=True)
+        with open(os.path.join(directory, ".lock"), "a") as lock:
+            if fcntl is not None:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+            rows = _read_rows(directory)
+            for name, dtype in COLUMNS:
+                path = os.path.join(directory, f"{name}.bin")
+                with open(path, "r+b" if os.path.exists(path) else "w+b") as fh:
+                    fh.seek(rows * np.dtype(dtype).itemsize)
+                    fh.write(columns[name].tobytes())
+            _write_rows(directory, rows + len(columns["created_at"]))
+
+    @staticmethod
+    def _load(directory: str, rows: int) -> Dict[str, np.ndarray]:
+        """The first ``rows`` rows of each column, memory-mapped."""
+        columns = {}
+        for name, dtype in COLUMNS:
+            if rows:
+                path = os.path.join(directory, f"{name}.bin")
+                columns[name] = np.memmap(path, dtype=dtype, mode="r", shape=(rows,))
+            else:
+                columns[name] = np.empty(0, dtype=dtype)
+        return columns
+
+    def _segment_counts(
+        self, directory: str, low: float, high: float, start: int
+    ) -> Dict[str, np.ndarray]:
+        rows = _read_rows(directory)
+        if low <= start and start + self.segment_sec <= high:
+            # whole segment: its counts are cached until it grows
+            with self._lock:
+                cached = self._counts.get(directory)
+            if cached is not None and cached[0] == rows:
+                return cached[1]
+            counts = _counts(self._load(directory, rows))
+            with self._lock:
+                self._counts[directory] = (rows, counts)
+            return counts
+        columns = self._load(directory, rows)
+        created = columns["created_at"]
+        mask = (created >= low) & (created < high)
+        return _counts({name: column[mask] for name, column in columns.items()})
+
+    def aggregate(
+        self, since: Optional[float] = None, until: Optional[float] = None
+    ) -> Dict[str, Any]:
+        """Cohort numbers for ``since <= created_at < until``, ready to serialize as JSON."""
+        low = -np.inf if since is None else since
+        high = np.inf if until is None else until
+        totals = _counts({name: np.empty(0, dtype=dtype) for name, dtype in COLUMNS})
+        for entry in sorted(os.listdir(self.directory)):
+            if not entry.isdigit():
+                continue
+            start = int(entry)
+            if start + self.segment_sec <= low or start >= high:
+                continue
+            counts = self._segment_counts(os.path.join(self.directory, entry), low, high, start)
+            for name in totals:
+                totals[name] = totals[name] + counts[name]
+
+        ages = totals["age"]
+        result: Dict[str, Any] = {"count": int(ages.sum()), "since": since, "until": until}
+        for name, labels in (("phq9_level", PHQ9_LEVELS), ("gad7_level", GAD7_LEVELS)):
+            result[name] = dict(zip(labels, totals[name].astype(int).tolist(), strict=True))
+        result["percentiles"] = {
+            name: _percentiles(totals[name], scale) for name, scale, _ in HISTOGRAMS
+        }
+        band_totals = np.bincount(_AGE_BAND, weights=ages, minlength=len(AGE_BANDS))
+        band_flags = np.bincount(_AGE_BAND, weights=totals["age_risk"], minlength=len(AGE_BANDS))
+        result["risk_by_age_band"] = [
+            {
+                "band": band,
+                "count": int(total),
+                "risk_flags": int(flags),
+                "rate": round(flags / total, 4) if total else None,
+            }
+            for band, total, flags in zip(AGE_BANDS, band_totals, band_flags, strict=True)
+        ]
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        return {"enabled": self.enabled, "appended": self.appended}
+
+
+# Process-wide store; fed by the check-in store when ANALYTICS_ENABLED is set
+analytics = ColumnStore()
+
+
+def init_app(app) -> None:
+    cfg = app.config
+    if cfg["ANALYTICS_ENABLED"] and cfg["STORAGE_ENABLED"]:
+        analytics.configure(
+            cfg["ANALYTICS_PATH"] or os.path.join(app.instance_path, "analytics"),
+            segment_sec=cfg["ANALYTICS_SEGMENT_SEC"],
+        )
+        if analytics.append not in checkins.sinks:
+            checkins.sinks.append(analytics.append)
+    else:
+        analytics.disable()
+        if analytics.append in checkins.sinks:
+            checkins.sinks.remove(analytics.append)
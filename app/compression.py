@@ -0,0 +1,133 @@
+"""Compression of dynamic responses (gzip, plus brotli when installed).
+
+Static assets are precompressed by ``app.assets``; this covers rendered pages
+and JSON for deployments without a compressing proxy in front (Railway, the
+Procfile). Streamed responses (``stream_template``) are compressed
+incrementally and flushed every ``COMPRESS_STREAM_FLUSH`` bytes, so the start
+of the page still reaches the client before rendering ends.
+"""
+
+import zlib
+from typing import Iterable, Iterator, Optional
+
+from flask import current_app, request
+
+try:  # optional: gzip only without it
+    import brotli
+except ImportError:  # pragma: no cover - depends on the environment
+    brotli = None
+
+COMPRESSIBLE = frozenset(
+    {
+        "text/html",
+        "text/plain",
+        "text/css",
+        "text/javascript",
+        "application/javascript",
+        "application/json",
+        "application/x-ndjson",
+        "image/svg+xml",
+    }
+)
+ENCODINGS = ("br", "gzip")
+
+
+def choose_encoding(accept) -> Optional[str]:
+    """Best encoding the client accepts (``request.accept_encodings``), or None."""
+    if brotli is not None and accept["br"]:
+        return "br"
+    if accept["gzip"]:
+        return "gzip"
+    return None
+
+
+def compress(data: bytes, encoding: str) -> bytes:
+    cfg = current_app.config
+    if encoding == "br":
+        return brotli.compress(data, quality=cfg["COMPRESS_BR_QUALITY"])
+    return zlib.compress(data, cfg["COMPRESS_LEVEL"], wbits=31)
+
+
+def _stream_compressor(encoding: str):
+    """(process, flush, finish) callables of an incremental compressor."""
+    cfg = current_app.config
+    if encoding == "br":
+        compressor = brotli.Compressor(quality=cfg["COMPRESS_BR_QUALITY"])
+        return compressor.process, compressor.flush, compressor.finish
+    compressor = zlib.compressobj(cfg["COMPRESS_LEVEL"], zlib.DEFLATED, 31)
+    return compressor.compress, lambda: compressor.flush(zlib.Z_SYNC_FLUSH), compressor.flush
+
+
+def _compress_stream(chunks: Iterable, encoding: str, flush_every: int) -> Iterator[bytes]:
+    # the compressor is set up now: the body is iterated after the request
+    # context is gone
+    process, flush, finish = _stream_compressor(encoding)
+
+    def generate() -> Iterator[bytes]:
+        pending = 0
+        try:
+            for chunk in chunks:
+                if isinstance(chunk, str):
+                    chunk = chunk.encode("utf-8")
+                out = process(chunk)
+                pending += len(chunk)
+                if pending >= flush_every:
+                    out += flush()
+                    pending = 0
+                if out:
+                    yield out
+            yield finish()
+        finally:
+            # stream_with_context pops its request context on close()
+            close = getattr(chunks, "close", None)
+            if close is not None:
+                close()
+
+    return generate()
+
+
+def compress_response(response):
+    cfg = current_app.config
+    if (
+        response.mimetype not in COMPRESSIBLE
+        or response.direct_passthrough
+        or "Content-Encoding" in response.headers
+        or response.status_code < 200
+        or response.status_code in (204, 206, 304)
+    ):
+        return response
+
+    response.vary.add("Accept-Encoding")
+    encoding = choose_encoding(request.accept_encodings)
+    if encoding is None:
+        return response
+
+    if response.is_streamed:
+        response.response = _compress_stream(
+            response.response, encoding, cfg["COMPRESS_STREAM_FLUSH"]
+        )
+        response.headers.pop("Content-Length", None)
+    else:
+        data = response.get_data()
+        if len(data) < cfg["COMPRESS_MIN_SIZE"]:
+            return response
+        response.set_data(compress(data, encoding))
+
+    response.headers["Content-Encoding"] = encoding
+    etag, weak = response.get_etag()
+    if etag:
+        response.set_etag(f"{etag}-{encoding}", weak)
+    return response
+
+
+def strip_encoding(etag: str) -> str:
+    """The ETag of the identity representation for a (possibly encoded) ETag."""
+    for encoding in ENCODINGS:
+        if etag.endswith(f"-{encoding}"):
+            return etag[: -len(encoding) - 1]
+    return etag
+
+
+def init_app(app) -> None:
+    if app.config["COMPRESS_ENABLED"]:
+        app.after_request(compress_response)
@@ -10,10 +10,117 @@ class BaseConfig:
     # Rate limiting
     RATELIMIT_DEFAULT = os.getenv("RATELIMIT_DEFAULT", "20 per minute")
     RATELIMIT_STORAGE_URI = os.getenv("RATELIMIT_STORAGE_URI", "memory://")
+    # Count hits in process and sync them with the shared storage in batches
+    RATELIMIT_LOCAL_TIER = os.getenv("RATELIMIT_LOCAL_TIER", "false").lower() in (
+        "1",
+        "true",
+        "yes",
+    )
+    RATELIMIT_LOCAL_SYNC_SEC = float(os.getenv("RATELIMIT_LOCAL_SYNC_SEC", "1"))
+    RATELIMIT_LOCAL_BATCH = int(os.getenv("RATELIMIT_LOCAL_BATCH", "20"))
+    # Per-client quota of AI-assisted submissions; over it AI is skipped
+    AI_RATELIMIT = os.getenv("AI_RATELIMIT", "10 per hour")
+    # polls of /api/v1/ai-feedback/<job>, separate from RATELIMIT_DEFAULT
+    AI_FEEDBACK_RATELIMIT = os.getenv("AI_FEEDBACK_RATELIMIT", "120 per minute")
+
+    # AI provider
+    AI_TIMEOUT = float(os.getenv("AI_REQUEST_TIMEOUT", "10"))
+    AI_MAX_RETRIES = int(os.getenv("AI_MAX_RETRIES", "2"))
+    # Total seconds one AI request may spend on the provider, retries included
+    AI_LATENCY_BUDGET = float(os.getenv("AI_LATENCY_BUDGET_SEC", "15"))
+    # Circuit breaker around the provider
+    AI_BREAKER_FAILURE_RATE = float(os.getenv("AI_BREAKER_FAILURE_RATE", "0.5"))
+    AI_BREAKER_SLOW_CALL_SEC = float(os.getenv("AI_BREAKER_SLOW_CALL_SEC", "8"))
+    AI_BREAKER_SLOW_RATE = float(os.getenv("AI_BREAKER_SLOW_RATE", "0.8"))
+    AI_BREAKER_MIN_CALLS = int(os.getenv("AI_BREAKER_MIN_CALLS", "5"))
+    AI_BREAKER_WINDOW_SEC = float(os.getenv("AI_BREAKER_WINDOW_SEC", "60"))
+    AI_BREAKER_OPEN_SEC = float(os.getenv("AI_BREAKER_OPEN_SEC", "30"))
+    # Render results immediately and fetch AI feedback in the background
+    AI_DEFERRED = os.getenv("AI_DEFERRED", "true").lower() in ("1", "true", "yes")
+    AI_JOB_WORKERS = int(os.getenv("AI_JOB_WORKERS", "4"))
+    AI_JOB_MAX_PENDING = int(os.getenv("AI_JOB_MAX_PENDING", "100"))
+    AI_JOB_TTL = int(os.getenv("AI_JOB_TTL_SEC", "300"))
+    AI_JOB_MAX_WAIT = float(os.getenv("AI_JOB_MAX_WAIT_SEC", "20"))
+
+    # Cache of rendered pages that are the same for every visitor
+    PAGE_CACHE_ENABLED = os.getenv("PAGE_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+    PAGE_CACHE_MAX_AGE = int(os.getenv("PAGE_CACHE_MAX_AGE_SEC", "300"))
+    PAGE_CACHE_CHECK_SEC = float(os.getenv("PAGE_CACHE_CHECK_SEC", "2"))
+
+    # Fingerprinted static assets built by `flask assets build`
+    ASSETS_ENABLED = os.getenv("ASSETS_ENABLED", "true").lower() in ("1", "true", "yes")
+    ASSETS_MAX_AGE = 365 * 24 * 3600
+
+    # gzip/brotli compression of dynamic responses
+    COMPRESS_ENABLED = os.getenv("COMPRESS_ENABLED", "true").lower() in ("1", "true", "yes")
+    COMPRESS_MIN_SIZE = int(os.getenv("COMPRESS_MIN_SIZE", "500"))
+    COMPRESS_LEVEL = int(os.getenv("COMPRESS_LEVEL", "6"))
+    COMPRESS_BR_QUALITY = int(os.getenv("COMPRESS_BR_QUALITY", "4"))
+    # streamed pages are flushed to the client every this many input bytes
+    COMPRESS_STREAM_FLUSH = int(os.getenv("COMPRESS_STREAM_FLUSH", "4096"))
+
+    # Batch API
+    BATCH_MAX_RECORDS = int(os.getenv("BATCH_MAX_RECORDS", "5000"))
+
+    # Check-in history (off by default): SQLite file written by a background thread
+    STORAGE_ENABLED = os.getenv("STORAGE_ENABLED", "false").lower() in ("1", "true", "yes")
+    STORAGE_PATH = os.getenv("STORAGE_PATH")  # default: instance/checkins.db
+    STORAGE_QUEUE_SIZE = int(os.getenv("STORAGE_QUEUE_SIZE", "1000"))
+    STORAGE_BATCH_SIZE = int(os.getenv("STORAGE_BATCH_SIZE", "200"))
+    # how long the writer waits for more records to commit together
+    STORAGE_COMMIT_DELAY_SEC = float(os.getenv("STORAGE_COMMIT_DELAY_SEC", "0.1"))
+    # queue full: "drop" the record or "block" the request up to STORAGE_BLOCK_SEC
+    STORAGE_ON_FULL = os.getenv("STORAGE_ON_FULL", "drop")
+    STORAGE_BLOCK_SEC = float(os.getenv("STORAGE_BLOCK_SEC", "0.05"))
+    # SQLite durability: NORMAL survives app crashes, FULL also power loss
+    STORAGE_SYNCHRONOUS = os.getenv("STORAGE_SYNCHRONOUS", "NORMAL")
+    # saved check-ins are deleted after this many days; 0 keeps them
+    STORAGE_RETENTION_DAYS = float(os.getenv("STORAGE_RETENTION_DAYS", "365"))
+    # Score trends for users who opt in with a generated key (needs STORAGE_ENABLED);
+    # keys are HMACed with TRENDS_SECRET, default SECRET_KEY: it must not change
+    TRENDS_SECRET = os.getenv("TRENDS_SECRET")
+    TRENDS_WINDOW = int(os.getenv("TRENDS_WINDOW", "5"))
+
+    # Columnar copy of stored check-ins for /api/v1/admin/analytics (needs STORAGE_ENABLED);
+    # keep the segment length once data exists
+    ANALYTICS_ENABLED = os.getenv("ANALYTICS_ENABLED", "false").lower() in ("1", "true", "yes")
+    ANALYTICS_PATH = os.getenv("ANALYTICS_PATH")  # default: instance/analytics
+    ANALYTICS_SEGMENT_SEC = int(os.getenv("ANALYTICS_SEGMENT_SEC", "86400"))
+    # Bearer token for the admin API; unset disables it
+    ADMIN_TOKEN = os.getenv("ADMIN_TOKEN")
+    # Check-in export (admin API and `flask export`): rows per read, and the HMAC key
+    # for hashed name/notes columns (default SECRET_KEY)
+    EXPORT_PAGE_SIZE = int(os.getenv("EXPORT_PAGE_SIZE", "1000"))
+    EXPORT_HASH_SECRET = os.getenv("EXPORT_HASH_SECRET")
+
+    # Health probes run in the background; endpoints serve cached results
+    HEALTH_PROBE_INTERVAL = float(os.getenv("HEALTH_PROBE_INTERVAL_SEC", "15"))
+    HEALTH_PROBE_TIMEOUT = float(os.getenv("HEALTH_PROBE_TIMEOUT_SEC", "3"))
+    HEALTH_MIN_FREE_MB = int(os.getenv("HEALTH_MIN_FREE_MB", "50"))
+    HEALTH_CHECK_REDIS = os.getenv("HEALTH_CHECK_REDIS", "false").lower() in ("1", "true", "yes")
+    HEALTH_CHECK_AI = os.getenv("HEALTH_CHECK_AI", "true").lower() in ("1", "true", "yes")
+
+    # Prometheus metrics at /metrics; set PROMETHEUS_MULTIPROC_DIR under gunicorn
+    METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() in ("1", "true", "yes")
+    METRICS_CACHE_REFRESH_SEC = float(os.getenv("METRICS_CACHE_REFRESH_SEC", "15"))
+    # Sentry (enabled by SENTRY_DSN) traces about this many requests/s per worker
+    SENTRY_DSN = os.getenv("SENTRY_DSN")
+    SENTRY_TRACES_PER_SEC = float(os.getenv("SENTRY_TRACES_PER_SEC", "0.5"))
+    SENTRY_TRACES_MIN_RATE = float(os.getenv("SENTRY_TRACES_MIN_RATE", "0.001"))
+    SENTRY_TRACES_MAX_RATE = float(os.getenv("SENTRY_TRACES_MAX_RATE", "0.2"))
+    SENTRY_PROFILES_SAMPLE_RATE = float(os.getenv("SENTRY_PROFILES_SAMPLE_RATE", "0"))
 
     # Logging
     LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
     LOG_RETENTION = int(os.getenv("LOG_RETENTION_DAYS", "7"))
+    # "rotating" (single process) or "watched" (many workers share the file)
+    LOG_HANDLER = os.getenv("LOG_HANDLER", "rotating")
+    # rotate at this size, keeping LOG_BACKUP_COUNT files; 0 leaves a "watched"
+    # log to an external logrotate
+    LOG_MAX_BYTES = int(os.getenv("LOG_MAX_BYTES", "1000000"))
+    LOG_BACKUP_COUNT = int(os.getenv("LOG_BACKUP_COUNT", "10"))
+    # records waiting for the writer thread; more are dropped, not waited on
+    LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
 
 
 class DevelopmentConfig(BaseConfig):
@@ -32,17 +139,22 @@ class ProductionConfig(BaseConfig):
     PERMANENT_SESSION_LIFETIME = 1800  # 30 minutes
     
     # Rate limiting - use memory storage by default for Railway
-    RATELIMIT_DEFAULT = "100/day"
+    RATELIMIT_DEFAULT = os.getenv("RATELIMIT_DEFAULT", "100/day")
     RATELIMIT_STORAGE_URI = os.getenv("REDIS_URL", "memory://")
+    RATELIMIT_LOCAL_TIER = os.getenv("RATELIMIT_LOCAL_TIER", "true").lower() in (
+        "1",
+        "true",
+        "yes",
+    )
     
     # AI rate limits
-    AI_RATELIMIT = "50/day"
-    AI_TIMEOUT = 10
-    AI_MAX_RETRIES = 2
+    AI_RATELIMIT = os.getenv("AI_RATELIMIT", "50/day")
+
+    # gunicorn workers share app.log and rotate it between them by size
+    LOG_HANDLER = os.getenv("LOG_HANDLER", "watched")
     
     # Health check
     HEALTH_CHECK_ENABLED = True
-    HEALTH_CHECK_REDIS = False  # Disable Redis health check by default
 
 
 def get_config_class():
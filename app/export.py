@@ -0,0 +1,148 @@
+"""Streaming export of stored check-ins as CSV or NDJSON.
+
+Rows are read in pages of ``EXPORT_PAGE_SIZE`` by keyset pagination on
+``(created_at, id)``, which the ``checkins_created_at`` index serves in order
+without sorting. Each page is its own short read, so a long export neither
+buffers the table nor pins an old WAL snapshot, and memory stays at one page
+whatever the size of the export. ``name`` and ``thoughts`` (the redacted
+notes) are dropped by default; ``hash`` replaces them with a keyed HMAC, so
+records of the same person can still be linked without revealing the value.
+"""
+
+import csv
+import hashlib
+import hmac
+import io
+import json
+from contextlib import closing
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+
+from .storage import CheckinStore
+
+# in output order; the rest are the fields built by analysis.build_summary
+FIELDS = (
+    "id",
+    "created_at",
+    "name",
+    "age",
+    "mood",
+    "sleep_hours",
+    "stress_level",
+    "thoughts",
+    "risk_flag",
+    "suggestions",
+    "phq9_score",
+    "phq9_level",
+    "gad7_score",
+    "gad7_level",
+    "exercise_days",
+    "caffeine_cups",
+    "screen_hours",
+    "support_level",
+)
+IDENTIFYING = ("name", "thoughts")
+MODES = ("drop", "hash", "keep")
+FORMATS = ("csv", "ndjson")
+MIMETYPES = {"csv": "text/csv", "ndjson": "application/x-ndjson"}
+
+_PAGE_SQL = """SELECT id, created_at, summary FROM checkins
+    WHERE created_at >= ? AND created_at < ? AND (created_at, id) > (?, ?)
+    ORDER BY created_at, id LIMIT ?"""
+
+
+def select_fields(
+    fields: Optional[Sequence[str]] = None, name: str = "drop", thoughts: str = "drop"
+) -> List[str]:
+    """Validated output columns; ValueError names the offending option."""
+    modes = dict(zip(IDENTIFYING, (name, thoughts), strict=True))
+    for option, mode in modes.items():
+        if mode not in MODES:
+            raise ValueError(f"{option} must be one of {', '.join(MODES)}")
+    unknown = [f for f in fields or () if f not in FIELDS]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+    return [f for f in (fields or FIELDS) if modes.get(f) != "drop"]
+
+
+def iter_pages(
+    store: CheckinStore,
+    fields: Sequence[str],
+    since: Optional[float] = None,
+    until: Optional[float] = None,
+    hash_fields: Sequence[str] = (),
+    secret: str = "",
+    page_size: int = 1000,
+) -> Iterator[List[Dict[str, Any]]]:
+    """Pages of export records with ``since <= created_at < until``, oldest first."""
+    low = float("-inf") if since is None else since
+    high = float("inf") if until is None else until
+    key = secret.encode("utf-8")
+    after = (float("-inf"), 0)
+    conn = store.connect()
+    try:
+        while True:
+            # the row-value comparison does not narrow the index range by
+            # itself; without max() each page would rescan from ``since``
+            start = max(low, after[0])
+            rows = conn.execute(_PAGE_SQL, (start, high, *after, page_size)).fetchall()
+            if not rows:
+                return
+            page = []
+            for row_id, created_at, summary in rows:
+                record = {**json.loads(summary), "id": row_id, "created_at": created_at}
+                for name in hash_fields:
+                    value = str(record.get(name) or "").encode("utf-8")
+                    record[name] = hmac.new(key, value, hashlib.sha256).hexdigest()[:32]
+                page.append({f: record.get(f) for f in fields})
+            yield page
+            after = (rows[-1][1], rows[-1][0])
+    finally:
+        conn.close()
+
+
+def ndjson_chunks(pages: Iterator[List[Dict[str, Any]]]) -> Iterator[str]:
+    # closing: an abandoned download releases the connection straight away
+    with closing(pages):
+        for page in pages:
+            yield "".join(_json_line(record) for record in page)
+
+
+def _json_line(record: Dict[str, Any]) -> str:
+    return json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n"
+
+
+def csv_chunks(pages: Iterator[List[Dict[str, Any]]], fields: Sequence[str]) -> Iterator[str]:
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    writer.writerow(fields)
+    with closing(pages):
+        for page in pages:
+            for record in page:
+                writer.writerow(
+                    "; ".join(v) if isinstance(v, list) else v for v in record.values()
+                )
+            yield buf.getvalue()
+            buf.seek(0)
+            buf.truncate()
+    if buf.tell():
+        yield buf.getvalue()
+
+
+def export_chunks(
+    store: CheckinStore,
+    fmt: str,
+    fields: Optional[Sequence[str]] = None,
+    since: Optional[float] = None,
+    until: Optional[float] = None,
+    name: str = "drop",
+    thoughts: str = "drop",
+    secret: str = "",
+    page_size: int = 1000,
+) -> Iterator[str]:
+    """The export as text chunks, one per page; options are checked before the first read."""
+    if fmt not in FORMATS:
+        raise ValueError(f"format must be one of {', '.join(FORMATS)}")
+    columns = select_fields(fields, name, thoughts)
+    hashed = [f for f, mode in zip(IDENTIFYING, (name, thoughts), strict=True) if mode == "hash"]
+    pages = iter_pages(store, columns, since, until, hashed, secret, page_size)
+    return ndjson_chunks(pages) if fmt == "ndjson" else csv_chunks(pages, columns)
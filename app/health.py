@@ -1,49 +1,121 @@
 import datetime
+import os
+import shutil
+from typing import Any, Dict
+
 from flask import Blueprint, current_app, jsonify, render_template
 from flask import current_app as app
 
+from .ai import ai_configured, breaker_state, check_ai_service
+from .columnar import analytics
+from .logs import log_stats
+from .probes import ERROR, ProbeRunner
+from .storage import checkins
+
 health_bp = Blueprint("health", __name__)
 
 
+def init_app(flask_app, limiter) -> None:
+    """Register component probes; they run in the background once first asked for."""
+    cfg = flask_app.config
+    runner = ProbeRunner(interval=cfg["HEALTH_PROBE_INTERVAL"])
+
+    log_dir = os.path.join(flask_app.instance_path, "logs")
+    runner.register("disk", lambda: _check_disk(log_dir, cfg["HEALTH_MIN_FREE_MB"]), critical=True)
+    if cfg.get("HEALTH_CHECK_REDIS"):
+        runner.register("redis", lambda: _check_storage(limiter), critical=True)
+    if cfg.get("HEALTH_CHECK_AI") and ai_configured():
+        # AI is optional: when it is down results fall back to the rules
+        runner.register("ai", lambda: check_ai_service(cfg["HEALTH_PROBE_TIMEOUT"]))
+
+    flask_app.extensions["health_probes"] = runner
+    # load balancers poll these several times a second
+    limiter.exempt(health_bp)
+
+
+def _check_disk(path: str, min_free_mb: int) -> Dict[str, Any]:
+    os.makedirs(path, exist_ok=True)
+    if not os.access(path, os.W_OK):
+        raise RuntimeError(f"{path} is not writable")
+    free_mb = shutil.disk_usage(path).free // (1024 * 1024)
+    if free_mb < min_free_mb:
+        raise RuntimeError(f"only {free_mb} MB free")
+    return {"free_mb": free_mb}
+
+
+def _check_storage(limiter) -> None:
+    if not limiter.storage.check():
+        raise RuntimeError("rate limit storage is unreachable")
+
+
+def _probes() -> ProbeRunner:
+    runner = current_app.extensions["health_probes"]
+    runner.ensure_running()
+    return runner
+
+
+def _no_store(response):
+    response.headers["Cache-Control"] = "no-store"
+    return response
+
+
+@health_bp.get("/livez")
+def livez():
+    """Liveness: the worker answers requests. Never looks at dependencies."""
+    return _no_store(jsonify({"status": "ok"}))
+
+
+@health_bp.get("/readyz")
+def readyz():
+    """Readiness: every critical component passed its latest probe."""
+    runner = _probes()
+    components = runner.snapshot()
+    ready = runner.ready(components)
+    body = {
+        "status": "ready" if ready else "not_ready",
+        "components": {name: result["status"] for name, result in components.items()},
+    }
+    return _no_store(jsonify(body)), 200 if ready else 503
+
+
 @health_bp.get("/healthz")
 def healthz():
-    """Enhanced health check endpoint for production monitoring"""
+    """Detailed health from the cached probe results"""
+    components = _probes().snapshot()
     health_status = {
         "status": "ok",
         "timestamp": datetime.datetime.utcnow().isoformat(),
         "version": "1.0.0",
         "components": {
-            "app": {"status": "ok"},
+            "app": {
+                "status": "ok",
+                "logging": log_stats(),
+                "startup": app.extensions.get("startup", {}),
+                "storage": checkins.stats(),
+                "analytics": analytics.stats(),
+            },
             "redis": {"status": "unknown"},
-            "ai": {"status": "unknown"}
-        }
+            "ai": {"status": "unknown"},
+            **components,
+        },
     }
-    
-    # Check Redis connection
-    if current_app.config.get('HEALTH_CHECK_REDIS'):
-        try:
-            from flask_limiter import get_limiter
-            limiter = get_limiter()
-            limiter.storage.ping()
-            health_status["components"]["redis"]["status"] = "ok"
-        except Exception as e:
-            health_status["components"]["redis"]["status"] = "error"
-            health_status["components"]["redis"]["error"] = str(e)
-            health_status["status"] = "degraded"
-
-    # Check AI service
-    if current_app.config.get('OPENAI_API_KEY'):
-        try:
-            from .ai import check_ai_service
-            ai_status = check_ai_service()
-            health_status["components"]["ai"]["status"] = "ok"
-        except Exception as e:
-            health_status["components"]["ai"]["status"] = "error"
-            health_status["components"]["ai"]["error"] = str(e)
-            health_status["status"] = "degraded"
-    
-    status_code = 200 if health_status["status"] == "ok" else 500
-    return jsonify(health_status), status_code
+
+    failing = [result for result in components.values() if result["status"] == ERROR]
+    if any(result["critical"] for result in failing):
+        health_status["status"] = "error"
+    elif failing:
+        health_status["status"] = "degraded"
+
+    # An open AI circuit breaker only means results are rule-based for now,
+    # so it marks the component degraded without failing the check
+    breaker = breaker_state()
+    ai_component = health_status["components"]["ai"]
+    ai_component["breaker"] = breaker
+    if breaker["state"] == "open" and ai_component["status"] == "ok":
+        ai_component["status"] = "degraded"
+
+    status_code = 503 if health_status["status"] == "error" else 200
+    return _no_store(jsonify(health_status)), status_code
 
 
 def register_error_handlers(flask_app):
@@ -0,0 +1,189 @@
+"""Short-lived background jobs whose results are fetched by opaque id.
+
+Used to run AI feedback off the request path: ``analyze()`` submits a job and
+renders straight away, and the results page polls ``/api/v1/ai-feedback/<id>``.
+
+Jobs run on a small bounded thread pool in the worker that accepted them
+(greenlets under the gevent worker). Finished results are written to a
+directory under the instance path so a poll answered by a different gunicorn
+worker can still find them. The job id embeds its expiry time, which lets any
+worker tell a pending job from an expired one without shared state.
+"""
+
+import json
+import os
+import re
+import secrets
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeout
+from typing import Any, Callable, Dict, Optional, Tuple
+
+_JOB_ID_RE = re.compile(r"^(\d{10})-[A-Za-z0-9_-]{16,64}$")
+_REMOTE_POLL_INTERVAL = 0.25
+
+PENDING = "pending"
+DONE = "done"
+EXPIRED = "expired"
+
+
+class JobStore:
+    def __init__(
+        self,
+        directory: Optional[str] = None,
+        max_workers: int = 4,
+        max_pending: int = 100,
+        ttl: float = 300,
+    ):
+        self.directory = directory
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.ttl = ttl
+        self._pending: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._executor_pid: Optional[int] = None
+        self._last_sweep = 0.0
+
+    def configure(self, directory: str, max_workers: int, max_pending: int, ttl: float) -> None:
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.ttl = ttl
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        # a pool created before a fork has no threads in the child
+        if self._executor is None or self._executor_pid != os.getpid():
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_workers, thread_name_prefix="jobs"
+            )
+            self._executor_pid = os.getpid()
+            self._pending = {}
+        return self._executor
+
+    def submit(self, fn: Callable[..., Any], *args: Any) -> Optional[str]:
+        """Run ``fn(*args)`` in the background and return its job id.
+
+        Returns None when ``max_pending`` jobs are already in flight, so the
+        caller can carry on without the job rather than queue unboundedly.
+        """
+        with self._lock:
+            executor = self._get_executor()
+            if len(self._pending) >= self.max_pending:
+                return None
+            job_id = f"{int(time.time() + self.ttl)}-{secrets.token_urlsafe(16)}"
+            future = executor.submit(fn, *args)
+            self._pending[job_id] = future
+        future.add_done_callback(lambda f: self._finish(job_id, f))
+        self._sweep()
+        return job_id
+
+    def _finish(self, job_id: str, future: Future) -> None:
+        try:
+            result = future.result()
+        except Exception:
+            result = None
+        try:
+            self._write(job_id, result)
+        finally:
+            with self._lock:
+                self._pending.pop(job_id, None)
+
+    def _path(self, job_id: str) -> str:
+        return os.path.join(self.directory, f"{job_id}.json")
+
+    def _write(self, job_id: str, result: Any) -> None:
+        path = self._path(job_id)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as fh:
+            json.dump({"result": result}, fh)
+        os.replace(tmp, path)
+
+    def _read(self, job_id: str) -> Tuple[bool, Any]:
+        try:
+            with open(self._path(job_id), encoding="utf-8") as fh:
+                return True, json.load(fh)["result"]
+        except (OSError, ValueError, KeyError):
+            return False, None
+
+    def poll(self, job_id: str, wait: float = 0) -> Tuple[str, Any]:
+        """Return (status, result), waiting up to ``wait`` seconds for completion.
+
+        Status is ``done``, ``pending`` or ``expired`` (which also covers ids
+        that were never issued).
+        """
+        match = _JOB_ID_RE.match(job_id)
+        if not match:
+            return EXPIRED, None
+        expires = int(match.group(1))
+        deadline = time.monotonic() + max(0.0, wait)
+        self._sweep()
+        if time.time() >= expires:
+            # results are sensitive: an expired one is never served, and goes now
+            # rather than waiting for a sweep that needs further submissions
+            self._remove(self._path(job_id))
+            return EXPIRED, None
+
+        future = self._pending.get(job_id)
+        if future is not None and self._executor_pid == os.getpid():
+            try:
+                return DONE, future.result(timeout=max(0.0, wait))
+            except FutureTimeout:
+                return PENDING, None
+            except Exception:
+                return DONE, None
+
+        while True:
+            if time.time() >= expires:
+                self._remove(self._path(job_id))
+                return EXPIRED, None
+            found, result = self._read(job_id)
+            if found:
+                return DONE, result
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return PENDING, None
+            time.sleep(min(_REMOTE_POLL_INTERVAL, remaining))
+
+    def pending_count(self) -> int:
+        return len(self._pending)
+
+    def _sweep(self) -> None:
+        """Delete expired result files, at most once per minute per worker.
+
+        Runs from both ``submit`` and ``poll`` so files do not outlive their
+        expiry once submissions stop.
+        """
+        now = time.time()
+        if now - self._last_sweep < 60 or not self.directory:
+            return
+        self._last_sweep = now
+        try:
+            names = os.listdir(self.directory)
+        except OSError:
+            return
+        for name in names:
+            match = _JOB_ID_RE.match(name.split(".", 1)[0])
+            if match and int(match.group(1)) <= now:
+                self._remove(os.path.join(self.directory, name))
+
+    @staticmethod
+    def _remove(path: str) -> None:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+ai_jobs = JobStore()
+
+
+def init_app(app) -> None:
+    ai_jobs.configure(
+        os.path.join(app.instance_path, "ai_jobs"),
+        max_workers=app.config["AI_JOB_WORKERS"],
+        max_pending=app.config["AI_JOB_MAX_PENDING"],
+        ttl=app.config["AI_JOB_TTL"],
+    )
@@ -0,0 +1,235 @@
+"""Non-blocking JSON logging.
+
+Request threads only put records on a bounded in-memory queue; one listener
+thread per worker process formats them as JSON and writes them to the log
+file. When the queue is full, records are dropped and counted instead of
+blocking the request. The listener is (re)started lazily in each process, so
+it survives gunicorn forking its workers.
+
+In production (``watched``) every worker appends to the same file through a
+``SharedRotatingFileHandler``. The worker whose record takes the file past
+``LOG_MAX_BYTES`` rotates it under a lock; the others notice the new file and
+reopen it, as they do after an external logrotate. With ``LOG_MAX_BYTES=0``
+rotation is left to logrotate entirely (deployment/deploy.sh installs a rule
+for ``instance/logs/app.log``).
+"""
+
+import atexit
+import copy
+import logging
+import os
+import queue
+import threading
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler, WatchedFileHandler
+from typing import Callable, Dict, Optional
+
+from pythonjsonlogger import jsonlogger
+
+try:
+    import fcntl
+except ImportError:  # Windows: single-process development server only
+    fcntl = None
+
+_JSON_FORMAT = "%(asctime)s %(levelname)s %(name)s %(message)s"
+_REQUEST_FIELDS = ("remote_addr", "method", "path")
+
+
+class RequestContextFilter(logging.Filter):
+    """Copy the request fields set in ``g.log_fields`` onto each record."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        try:
+            from flask import g
+
+            for k, v in getattr(g, "log_fields", {}).items():
+                setattr(record, k, v)
+        except Exception:
+            for k in _REQUEST_FIELDS:
+                setattr(record, k, "-")
+        return True
+
+
+class _Listener(QueueListener):
+    def enqueue_sentinel(self) -> None:
+        # waits for room: stopping with a full queue must not raise
+        self.queue.put(self._sentinel)
+
+
+class LogPipeline:
+    """A bounded queue drained by a per-process listener thread."""
+
+    def __init__(self, handler_factory: Callable[[], logging.Handler], maxsize: int = 10000):
+        self.handler_factory = handler_factory
+        self.maxsize = maxsize
+        self.dropped = 0
+        self._lock = threading.Lock()
+        self._pid: Optional[int] = None
+        self._queue: Optional[queue.Queue] = None
+        self._listener: Optional[QueueListener] = None
+        self._handler: Optional[logging.Handler] = None
+
+    def _ensure(self) -> queue.Queue:
+        if self._pid == os.getpid():
+            return self._queue
+        with self._lock:
+            if self._pid != os.getpid():
+                # after a fork the parent's listener thread is gone and its
+                # queue's locks may be held; start over with fresh ones
+                self._queue = queue.Queue(self.maxsize)
+                self._handler = self.handler_factory()
+                self._listener = _Listener(self._queue, self._handler, respect_handler_level=True)
+                self._listener.start()
+                self._pid = os.getpid()
+        return self._queue
+
+    def put(self, record: logging.LogRecord) -> None:
+        try:
+            self._ensure().put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def stop(self) -> None:
+        """Flush queued records and stop the listener of this process."""
+        with self._lock:
+            if self._listener is not None and self._pid == os.getpid():
+                self._listener.stop()
+                self._handler.close()
+            self._pid = None
+
+    def stats(self) -> Dict[str, int]:
+        q = self._queue
+        return {
+            "queued": q.qsize() if q is not None and self._pid == os.getpid() else 0,
+            "maxsize": self.maxsize,
+            "dropped": self.dropped,
+        }
+
+
+class PipelineHandler(QueueHandler):
+    """QueueHandler that never blocks: full queue means a dropped record."""
+
+    def __init__(self, pipeline: LogPipeline):
+        super().__init__(None)
+        self.pipeline = pipeline
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Resolve the message and traceback here, in the calling thread, and
+        # leave the JSON formatting to the listener.
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        record.msg = record.message
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        self.pipeline.put(record)
+
+
+class SharedRotatingFileHandler(WatchedFileHandler):
+    """A ``WatchedFileHandler`` that also rotates by size, safely across processes.
+
+    Rotation happens under an ``flock`` on ``<path>.lock`` and only if the file
+    is still over ``max_bytes``, so workers that fill it at the same time
+    rotate it once. ``max_bytes=0`` disables rotation.
+    """
+
+    def __init__(self, path: str, max_bytes: int, backup_count: int):
+        super().__init__(path, delay=True)
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+
+    def emit(self, record: logging.LogRecord) -> None:
+        # reopens the file first if another process rotated it
+        super().emit(record)
+        stream = self.stream
+        if self.max_bytes and stream is not None:
+            # the shared file's size, including other workers' records
+            if os.fstat(stream.fileno()).st_size >= self.max_bytes:
+                self.rotate_shared()
+
+    def rotate_shared(self) -> None:
+        with open(self.baseFilename + ".lock", "a") as lock:
+            if fcntl is not None:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                if os.stat(self.baseFilename).st_size < self.max_bytes:
+                    return  # another worker got here first
+            except FileNotFoundError:
+                return
+            for i in range(self.backup_count - 1, 0, -1):
+                source = f"{self.baseFilename}.{i}"
+                if os.path.exists(source):
+                    os.replace(source, f"{self.baseFilename}.{i + 1}")
+            if self.backup_count:
+                os.replace(self.baseFilename, self.baseFilename + ".1")
+            else:
+                os.remove(self.baseFilename)
+        # this process reopens at its next record, like the others
+
+
+def json_formatter() -> logging.Formatter:
+    return jsonlogger.JsonFormatter(_JSON_FORMAT, timestamp=False)
+
+
+def file_handler(
+    path: str, kind: str, level: int, max_bytes: int = 1_000_000, backup_count: int = 10
+) -> logging.Handler:
+    if kind == "watched":
+        handler: logging.Handler = SharedRotatingFileHandler(path, max_bytes, backup_count)
+    else:
+        handler = RotatingFileHandler(
+            path, maxBytes=max_bytes, backupCount=backup_count, delay=True
+        )
+    handler.setLevel(level)
+    handler.setFormatter(json_formatter())
+    return handler
+
+
+_pipeline: Optional[LogPipeline] = None
+_pipeline_key = None
+
+
+def configure(
+    logger: logging.Logger,
+    path: str,
+    kind: str,
+    level: int,
+    maxsize: int,
+    max_bytes: int = 1_000_000,
+    backup_count: int = 10,
+) -> LogPipeline:
+    """Route ``logger`` through the process-wide pipeline writing to ``path``."""
+    global _pipeline, _pipeline_key
+    key = (path, kind, level, maxsize, max_bytes, backup_count)
+    if _pipeline is None or _pipeline_key != key:
+        if _pipeline is not None:
+            _pipeline.stop()
+        else:
+            # flush whatever is still queued when the process exits
+            atexit.register(shutdown)
+        _pipeline = LogPipeline(
+            lambda: file_handler(path, kind, level, max_bytes, backup_count), maxsize
+        )
+        _pipeline_key = key
+
+    for handler in list(logger.handlers):
+        if isinstance(handler, PipelineHandler):
+            logger.removeHandler(handler)
+    handler = PipelineHandler(_pipeline)
+    handler.setLevel(level)
+    handler.addFilter(RequestContextFilter())
+    logger.addHandler(handler)
+    logger.setLevel(level)
+    return _pipeline
+
+
+def log_stats() -> Dict[str, int]:
+    return _pipeline.stats() if _pipeline is not None else {"queued": 0, "maxsize": 0, "dropped": 0}
+
+
+def shutdown() -> None:
+    if _pipeline is not None:
+        _pipeline.stop()
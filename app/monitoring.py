@@ -1,70 +1,262 @@
-from functools import wraps
-import sentry_sdk
-from flask import current_app
-from prometheus_flask_exporter import PrometheusMetrics
-from elasticapm.contrib.flask import ElasticAPM
-
-def init_monitoring(app):
-    """Initialize monitoring and error tracking"""
-    
-    # Sentry error tracking
+"""Prometheus metrics and Sentry tracing, kept off the request hot path.
+
+Metrics are created once per process and their label children are bound up
+front, so recording a stage is a ``perf_counter`` pair and one ``observe``.
+``prometheus_client`` is imported lazily: it picks its multiprocess mode from
+``PROMETHEUS_MULTIPROC_DIR`` at import time. With that variable set, every
+gunicorn worker writes its samples there and ``/metrics`` serves the sum over
+all workers. ``/metrics`` needs the admin bearer token (``ADMIN_TOKEN``), as
+the admin API does. Sentry is only initialised when ``SENTRY_DSN`` is set and traces
+a sample of requests sized by ``AdaptiveSampler``.
+"""
+
+import functools
+import os
+import threading
+import time
+from contextlib import nullcontext
+from typing import Any, Callable, Dict, Optional
+
+from flask import Blueprint, Flask, Response, current_app, g, request
+
+from .admin import require_admin
+
+# stages of POST /analyze, in order
+STAGES = ("validate", "score", "notes", "rules", "ai", "render")
+AI_OUTCOMES = ("sync", "deferred", "unavailable", "over_quota")
+# never traced: probes, scrapes and static files
+_UNTRACED_PREFIXES = ("/livez", "/readyz", "/healthz", "/metrics", "/static/", "/assets/")
+
+monitoring_bp = Blueprint("monitoring", __name__)
+
+_NULL = nullcontext()
+_metrics: Optional["_Metrics"] = None
+_metrics_lock = threading.Lock()
+
+
+class _Metrics:
+    def __init__(self):
+        import prometheus_client as prom
+
+        self.request_seconds = prom.Histogram(
+            "mha_request_seconds",
+            "Time to the response head, by endpoint",
+            ["endpoint"],
+            buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+        )
+        stage_seconds = prom.Histogram(
+            "mha_analyze_stage_seconds",
+            "Time spent in each stage of a check-in submission",
+            ["stage"],
+            buckets=(0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5, 15),
+        )
+        self.stages = {name: stage_seconds.labels(name) for name in STAGES}
+        self.submissions = prom.Counter("mha_submissions", "Scored check-in submissions")
+        self.risk_flags = prom.Counter("mha_risk_flags", "Submissions flagged for risk")
+        ai_requests = prom.Counter(
+            "mha_ai_requests", "AI feedback requested, by outcome", ["outcome"]
+        )
+        self.ai = {outcome: ai_requests.labels(outcome) for outcome in AI_OUTCOMES}
+        # one series per live worker: a ratio cannot be summed across them
+        self.cache_hit_ratio = prom.Gauge(
+            "mha_cache_hit_ratio",
+            "Hit ratio of in-process caches",
+            ["cache"],
+            multiprocess_mode="liveall",
+        )
+
+
+def _get_metrics() -> "_Metrics":
+    global _metrics
+    with _metrics_lock:
+        if _metrics is None:
+            _metrics = _Metrics()
+    return _metrics
+
+
+class _Stage:
+    __slots__ = ("_child", "_start")
+
+    def __init__(self, child):
+        self._child = child
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self._child.observe(time.perf_counter() - self._start)
+        return False
+
+
+def stage(name: str):
+    """Context manager timing one ``STAGES`` entry (a no-op without metrics)."""
+    m = _metrics
+    return _NULL if m is None else _Stage(m.stages[name])
+
+
+def observe_stage(name: str, seconds: float) -> None:
+    m = _metrics
+    if m is not None:
+        m.stages[name].observe(seconds)
+
+
+def timed(name: str) -> Callable:
+    """Decorator timing every call of a function as stage ``name``."""
+
+    def decorator(fn: Callable) -> Callable:
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with stage(name):
+                return fn(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def record_submission(summary: Dict[str, Any], ai_outcome: Optional[str]) -> None:
+    """Count a scored submission, its risk flag and what happened to its AI request."""
+    m = _metrics
+    if m is None:
+        return
+    m.submissions.inc()
+    if summary.get("risk_flag"):
+        m.risk_flags.inc()
+    if ai_outcome is not None:
+        m.ai[ai_outcome].inc()
+
+
+def _refresh_cache_gauges(app: Flask) -> None:
+    from .ai import cache_stats
+
+    m = _metrics
+    page = app.extensions["page_cache"].stats()
+    lookups = page["hits"] + page["misses"]
+    m.cache_hit_ratio.labels("page").set(page["hits"] / lookups if lookups else 0.0)
+    m.cache_hit_ratio.labels("ai").set(cache_stats()["hit_ratio"])
+
+
+class AdaptiveSampler:
+    """Sentry ``traces_sampler`` aiming at ``target`` traces per second per worker.
+
+    The rate is recomputed every ``window`` seconds from the request rate of
+    the window before, within ``[min_rate, max_rate]``. Requests continuing a
+    sampled (or unsampled) upstream trace follow the upstream decision.
+    """
+
+    def __init__(
+        self,
+        target: float,
+        min_rate: float,
+        max_rate: float,
+        window: float = 10.0,
+        timer: Callable[[], float] = time.monotonic,
+    ):
+        self.target = target
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.window = window
+        self.rate = max_rate
+        self._timer = timer
+        self._started = timer()
+        self._count = 0
+
+    def __call__(self, sampling_context: Dict[str, Any]) -> float:
+        parent = sampling_context.get("parent_sampled")
+        if parent is not None:
+            return float(parent)
+        environ = sampling_context.get("wsgi_environ") or {}
+        if environ.get("PATH_INFO", "").startswith(_UNTRACED_PREFIXES):
+            return 0.0
+
+        self._count += 1
+        now = self._timer()
+        elapsed = now - self._started
+        if elapsed >= self.window:
+            wanted = self.target * elapsed / self._count
+            self.rate = min(self.max_rate, max(self.min_rate, wanted))
+            self._started = now
+            self._count = 0
+        return self.rate
+
+
+def _init_sentry(app: Flask) -> None:
+    cfg = app.config
+    if not cfg.get("SENTRY_DSN"):
+        return
+    import sentry_sdk
+
     sentry_sdk.init(
-        dsn=app.config.get('SENTRY_DSN'),
-        environment=app.config.get('ENV'),
-        traces_sample_rate=1.0,
-        profiles_sample_rate=0.5,
-    )
-    
-    # Prometheus metrics
-    metrics = PrometheusMetrics(app)
-    metrics.info('app_info', 'Application info', version='1.0.0')
-    
-    # Request latency metrics
-    metrics.histogram(
-        'http_request_duration_seconds',
-        'HTTP request latency',
-        buckets=[0.1, 0.5, 1.0, 2.0, 5.0]
-    )
-    
-    # Custom business metrics
-    metrics.counter(
-        'mental_health_checks_total',
-        'Number of mental health checks performed'
+        dsn=cfg["SENTRY_DSN"],
+        environment=cfg.get("ENV"),
+        traces_sampler=AdaptiveSampler(
+            cfg["SENTRY_TRACES_PER_SEC"],
+            cfg["SENTRY_TRACES_MIN_RATE"],
+            cfg["SENTRY_TRACES_MAX_RATE"],
+        ),
+        profiles_sample_rate=cfg["SENTRY_PROFILES_SAMPLE_RATE"],
     )
-    metrics.counter(
-        'ai_suggestions_total',
-        'Number of AI suggestions generated'
-    )
-    metrics.counter(
-        'high_risk_cases_total',
-        'Number of high risk cases detected'
+
+
+def init_app(app: Flask, limiter=None) -> None:
+    _init_sentry(app)
+    if not app.config["METRICS_ENABLED"]:
+        return
+
+    multiproc_dir = os.environ.get("PROMETHEUS_MULTIPROC_DIR")
+    if multiproc_dir:
+        os.makedirs(multiproc_dir, exist_ok=True)
+    _get_metrics()
+    refresh_every = app.config["METRICS_CACHE_REFRESH_SEC"]
+    next_refresh = [0.0]
+
+    @app.before_request
+    def _start_timer():
+        g.request_started = time.perf_counter()
+
+    @app.after_request
+    def _observe_request(response):
+        started = g.pop("request_started", None)
+        if started is not None:
+            endpoint = request.endpoint or "unmatched"
+            _metrics.request_seconds.labels(endpoint).observe(time.perf_counter() - started)
+        now = time.monotonic()
+        if now >= next_refresh[0]:
+            next_refresh[0] = now + refresh_every
+            _refresh_cache_gauges(app)
+        return response
+
+    app.register_blueprint(monitoring_bp)
+    if limiter is not None:
+        limiter.exempt(monitoring_bp)
+
+
+@monitoring_bp.get("/metrics")
+@require_admin
+def metrics():
+    from prometheus_client import (
+        CONTENT_TYPE_LATEST,
+        REGISTRY,
+        CollectorRegistry,
+        generate_latest,
+        multiprocess,
     )
-    
-    # Elastic APM for performance monitoring
-    apm = ElasticAPM(app)
-    
-    # Decorator for tracking high-risk cases
-    def track_high_risk(f):
-        @wraps(f)
-        def decorated_function(*args, **kwargs):
-            result = f(*args, **kwargs)
-            if isinstance(result, dict) and result.get('risk_flag'):
-                metrics.counter('high_risk_cases_total').inc()
-            return result
-        return decorated_function
-    
-    # Decorator for tracking AI usage
-    def track_ai_usage(f):
-        @wraps(f)
-        def decorated_function(*args, **kwargs):
-            result = f(*args, **kwargs)
-            metrics.counter('ai_suggestions_total').inc()
-            return result
-        return decorated_function
-    
-    return {
-        'metrics': metrics,
-        'apm': apm,
-        'track_high_risk': track_high_risk,
-        'track_ai_usage': track_ai_usage
-    }
\ No newline at end of file
+
+    _refresh_cache_gauges(current_app)
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    response = Response(generate_latest(registry), content_type=CONTENT_TYPE_LATEST)
+    response.headers["Cache-Control"] = "no-store"
+    return response
+
+
+def mark_process_dead(pid: int) -> None:
+    """Drop a dead worker's live gauges (gunicorn ``child_exit`` hook)."""
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import multiprocess
+
+        multiprocess.mark_process_dead(pid)
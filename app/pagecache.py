@@ -0,0 +1,145 @@
+"""Rendered-response cache for pages whose HTML is the same for every visitor.
+
+Cached pages must not embed per-session data: the check-in form's CSRF token
+is fetched separately from ``/csrf-token`` (see ``main.js``). Entries carry a
+strong ETag, so conditional GETs are answered with 304 without rendering, and
+are dropped when the template, or a template it extends or includes, changes
+on disk.
+"""
+
+import hashlib
+import os
+import threading
+import time
+from typing import Callable, Dict, List, NamedTuple, Tuple
+
+from flask import Response, current_app, render_template, request
+from jinja2 import meta
+
+from . import compression
+
+
+class _Entry(NamedTuple):
+    body: bytes
+    etag: str
+    # (path, mtime) of every template involved in the render
+    sources: Tuple[Tuple[str, float], ...]
+    # compressed bodies by content encoding, filled on first request
+    encoded: Dict[str, bytes]
+
+
+class PageCache:
+    """Rendered pages keyed by template name.
+
+    When templates auto-reload, their mtimes are checked at most every
+    ``check_interval`` seconds, so a hit costs a dict lookup in between.
+    """
+
+    def __init__(
+        self,
+        max_age: int = 300,
+        check_interval: float = 2.0,
+        timer: Callable[[], float] = time.monotonic,
+    ):
+        self.max_age = max_age
+        self.check_interval = check_interval
+        self._timer = timer
+        self._entries: Dict[str, _Entry] = {}
+        self._checked: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _sources(self, template: str) -> Tuple[Tuple[str, float], ...]:
+        env = current_app.jinja_env
+        seen: Dict[str, float] = {}
+        pending: List[str] = [template]
+        while pending:
+            name = pending.pop()
+            source, path, _ = env.loader.get_source(env, name)
+            if path is None or path in seen:
+                continue
+            seen[path] = os.path.getmtime(path)
+            pending.extend(t for t in meta.find_referenced_templates(env.parse(source)) if t)
+        return tuple(seen.items())
+
+    def _fresh(self, template: str, entry: _Entry) -> bool:
+        # without auto-reload Jinja keeps serving the template it compiled
+        # first, so only a restart (a deploy) can change the output
+        if not current_app.jinja_env.auto_reload:
+            return True
+        now = self._timer()
+        if now - self._checked.get(template, 0.0) < self.check_interval:
+            return True
+        self._checked[template] = now
+        try:
+            return all(os.path.getmtime(path) == mtime for path, mtime in entry.sources)
+        except OSError:
+            return False
+
+    def get(self, template: str) -> _Entry:
+        entry = self._entries.get(template)
+        if entry is not None and self._fresh(template, entry):
+            self.hits += 1
+            return entry
+        self.misses += 1
+        # mtimes are read before rendering, so an edit made mid-render is
+        # picked up on the next check rather than lost
+        sources = self._sources(template)
+        body = render_template(template).encode("utf-8")
+        etag = hashlib.sha256(body).hexdigest()[:32]
+        entry = _Entry(body, etag, sources, {})
+        with self._lock:
+            self._entries[template] = entry
+            self._checked[template] = self._timer()
+        return entry
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._checked.clear()
+
+    def stats(self) -> Dict[str, int]:
+        return {"size": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+def init_app(app) -> None:
+    app.extensions["page_cache"] = PageCache(
+        max_age=app.config["PAGE_CACHE_MAX_AGE"],
+        check_interval=app.config["PAGE_CACHE_CHECK_SEC"],
+    )
+
+
+def render_cached(template: str) -> Response:
+    """Serve ``template`` from the page cache, honoring If-None-Match.
+
+    Compressed variants are cached too and carry the ETag with an encoding
+    suffix; a validator for any encoding of the current page is a match.
+    """
+    if not current_app.config["PAGE_CACHE_ENABLED"]:
+        return Response(render_template(template), mimetype="text/html")
+
+    cache: PageCache = current_app.extensions["page_cache"]
+    entry = cache.get(template)
+    cfg = current_app.config
+    encoding = None
+    if cfg["COMPRESS_ENABLED"] and len(entry.body) >= cfg["COMPRESS_MIN_SIZE"]:
+        encoding = compression.choose_encoding(request.accept_encodings)
+
+    etag = entry.etag if encoding is None else f"{entry.etag}-{encoding}"
+    if any(compression.strip_encoding(tag) == entry.etag for tag in request.if_none_match):
+        response = Response(status=304)
+    else:
+        body = entry.body
+        if encoding is not None:
+            body = entry.encoded.get(encoding)
+            if body is None:
+                body = entry.encoded[encoding] = compression.compress(entry.body, encoding)
+        response = Response(body, mimetype="text/html")
+        if encoding is not None:
+            response.headers["Content-Encoding"] = encoding
+    response.set_etag(etag)
+    response.vary.add("Accept-Encoding")
+    response.cache_control.public = True
+    response.cache_control.max_age = cache.max_age
+    return response
@@ -0,0 +1,107 @@
+"""Component health probes run on a background interval.
+
+Health endpoints only read the cached results, so answering a load balancer
+costs no I/O however often it asks. The probe thread is started lazily in
+each worker process (threads do not survive gunicorn's fork).
+"""
+
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, List, NamedTuple, Optional
+
+OK = "ok"
+ERROR = "error"
+PENDING = "pending"
+
+
+class Probe(NamedTuple):
+    name: str
+    check: Callable[[], Optional[Dict[str, Any]]]
+    # a failing critical probe makes the instance not ready for traffic
+    critical: bool
+
+
+class ProbeRunner:
+    """Run registered checks every ``interval`` seconds and cache the results.
+
+    A check raises to report failure and may return a dict of details. Results
+    older than ``stale_after`` seconds (default three intervals) are reported
+    as errors, so a wedged probe thread cannot keep an instance looking healthy.
+    """
+
+    def __init__(
+        self,
+        interval: float = 15.0,
+        stale_after: Optional[float] = None,
+        timer: Callable[[], float] = time.monotonic,
+    ):
+        self.interval = interval
+        self.stale_after = stale_after if stale_after is not None else 3 * interval
+        self._timer = timer
+        self._probes: List[Probe] = []
+        self._results: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._pid: Optional[int] = None
+
+    def register(
+        self, name: str, check: Callable[[], Optional[Dict[str, Any]]], critical: bool = False
+    ) -> None:
+        self._probes.append(Probe(name, check, critical))
+
+    def run_once(self) -> None:
+        for probe in self._probes:
+            started = self._timer()
+            try:
+                result = {"status": OK, **(probe.check() or {})}
+            except Exception as exc:
+                result = {"status": ERROR, "error": str(exc) or type(exc).__name__}
+            finished = self._timer()
+            result["latency_ms"] = round((finished - started) * 1000, 1)
+            result["checked_at"] = finished
+            with self._lock:
+                self._results[probe.name] = result
+
+    def ensure_running(self) -> None:
+        """Start the probe thread in this process if it is not running yet."""
+        pid = os.getpid()
+        if self._pid == pid and self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._pid == pid and self._thread is not None and self._thread.is_alive():
+                return
+            self._pid = pid
+            self._thread = threading.Thread(target=self._loop, name="health-probes", daemon=True)
+            self._thread.start()
+
+    def _loop(self) -> None:
+        while True:
+            self.run_once()
+            time.sleep(self.interval)
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """Latest result of every probe with its age in seconds."""
+        now = self._timer()
+        with self._lock:
+            results = dict(self._results)
+        out: Dict[str, Dict[str, Any]] = {}
+        for probe in self._probes:
+            result = results.get(probe.name)
+            if result is None:
+                entry: Dict[str, Any] = {"status": PENDING}
+            else:
+                entry = dict(result)
+                age = now - entry.pop("checked_at")
+                entry["age_sec"] = round(age, 1)
+                if age > self.stale_after:
+                    entry["status"] = ERROR
+                    entry["error"] = "probe result is stale"
+            entry["critical"] = probe.critical
+            out[probe.name] = entry
+        return out
+
+    def ready(self, snapshot: Optional[Dict[str, Dict[str, Any]]] = None) -> bool:
+        """True once every critical probe has passed and none is failing."""
+        snapshot = self.snapshot() if snapshot is None else snapshot
+        return all(r["status"] == OK for r in snapshot.values() if r["critical"])
@@ -0,0 +1,193 @@
+"""Rate limiting: Flask-Limiter setup, a local tier in front of Redis, AI quotas.
+
+With ``RATELIMIT_LOCAL_TIER`` on, the limiter storage URI is prefixed with
+``tiered+`` and served by ``TieredStorage``: each worker counts hits in
+process and pushes them to the shared storage in batches, every
+``RATELIMIT_LOCAL_BATCH`` hits of a key or ``RATELIMIT_LOCAL_SYNC_SEC``
+seconds, in one pipelined round trip for all pending keys. Only the first hit
+of a key per window goes to the shared storage directly, to learn its count.
+
+Decisions use the last known shared count plus the local hits, so a worker
+does not see the other workers' hits of the last sync period: a client can
+exceed a limit by at most ``RATELIMIT_LOCAL_BATCH`` hits per other worker.
+"""
+
+import os
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+from flask import Flask, current_app
+from flask_limiter import Limiter
+from flask_limiter.util import get_remote_address
+from limits import parse_many
+from limits.storage import Storage, storage_from_string
+
+TIERED_PREFIX = "tiered+"
+
+
+class _Counter:
+    __slots__ = ("known", "pending", "expiry", "window_end", "synced_at")
+
+    def __init__(self, known: int, expiry: int, window_end: float, now: float):
+        self.known = known  # shared count at the last sync, our hits included
+        self.pending = 0  # local hits not pushed yet
+        self.expiry = expiry
+        self.window_end = window_end
+        self.synced_at = now
+
+
+class TieredStorage(Storage):
+    """Process-local counters synced in batches with a shared ``limits`` storage.
+
+    Supports the fixed-window strategy (Flask-Limiter's default), which only
+    needs ``incr``/``get``/``get_expiry``.
+    """
+
+    STORAGE_SCHEME = [
+        "tiered+memory",
+        "tiered+redis",
+        "tiered+rediss",
+        "tiered+redis+unix",
+    ]
+
+    def __init__(
+        self,
+        uri: str,
+        wrap_exceptions: bool = False,
+        sync_interval: float = 1.0,
+        sync_batch: int = 20,
+        **options,
+    ):
+        super().__init__(uri, wrap_exceptions=wrap_exceptions)
+        self.remote = storage_from_string(uri[len(TIERED_PREFIX) :], **options)
+        self.sync_interval = sync_interval
+        self.sync_batch = sync_batch
+        self.remote_calls = 0
+        self.hits = 0
+        self._counters: Dict[str, _Counter] = {}
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+
+    @property
+    def base_exceptions(self):
+        return self.remote.base_exceptions
+
+    def _for_this_process(self) -> None:
+        # counters inherited over fork hold the parent's unpushed hits
+        if self._pid != os.getpid():
+            self._counters.clear()
+            self._pid = os.getpid()
+
+    def _push(self, batch: List[Tuple[str, int, int]]) -> List[int]:
+        """Add ``(key, expiry, amount)`` hits to the shared storage; new counts."""
+        self.remote_calls += 1
+        client = getattr(self.remote, "storage", None)
+        script = getattr(self.remote, "lua_incr_expire", None)
+        if script is not None and client is not None:
+            # the same script as RedisStorage.incr, one pipeline for all keys
+            pipe = client.pipeline(transaction=False)
+            for key, expiry, amount in batch:
+                script([self.remote.prefixed_key(key)], [expiry, amount], client=pipe)
+            return [int(count) for count in pipe.execute()]
+        return [self.remote.incr(key, expiry, amount) for key, expiry, amount in batch]
+
+    def _sync(self, now: float) -> None:
+        for key in [k for k, c in self._counters.items() if c.window_end <= now]:
+            del self._counters[key]
+        dirty = [(key, c) for key, c in self._counters.items() if c.pending]
+        if not dirty:
+            return
+        counts = self._push([(key, c.expiry, c.pending) for key, c in dirty])
+        for (_, counter), count in zip(dirty, counts, strict=True):
+            counter.known = count
+            counter.pending = 0
+            counter.synced_at = now
+
+    def incr(self, key: str, expiry: int, amount: int = 1) -> int:
+        now = time.time()
+        with self._lock:
+            self._for_this_process()
+            self.hits += 1
+            counter = self._counters.get(key)
+            if counter is None or counter.window_end <= now:
+                self.remote_calls += 2
+                count = self.remote.incr(key, expiry, amount)
+                window_end = self.remote.get_expiry(key)
+                self._counters[key] = _Counter(count, expiry, window_end, now)
+                return count
+            counter.pending += amount
+            if counter.pending >= self.sync_batch or now - counter.synced_at >= self.sync_interval:
+                self._sync(now)
+            return counter.known + counter.pending
+
+    def get(self, key: str) -> int:
+        with self._lock:
+            self._for_this_process()
+            counter = self._counters.get(key)
+            if counter is not None and counter.window_end > time.time():
+                return counter.known + counter.pending
+        self.remote_calls += 1
+        return self.remote.get(key)
+
+    def get_expiry(self, key: str) -> float:
+        counter = self._counters.get(key)
+        if counter is not None and self._pid == os.getpid():
+            return counter.window_end
+        self.remote_calls += 1
+        return self.remote.get_expiry(key)
+
+    def flush(self) -> None:
+        """Push all pending hits now."""
+        with self._lock:
+            self._for_this_process()
+            self._sync(time.time())
+
+    def check(self) -> bool:
+        return self.remote.check()
+
+    def reset(self) -> Optional[int]:
+        with self._lock:
+            self._counters.clear()
+        return self.remote.reset()
+
+    def clear(self, key: str) -> None:
+        with self._lock:
+            self._counters.pop(key, None)
+        self.remote.clear(key)
+
+    def stats(self) -> Dict[str, int]:
+        return {"keys": len(self._counters), "hits": self.hits, "remote_calls": self.remote_calls}
+
+
+def init_app(app: Flask) -> Limiter:
+    cfg = app.config
+    uri = cfg["RATELIMIT_STORAGE_URI"]
+    options = {}
+    if cfg["RATELIMIT_LOCAL_TIER"] and not uri.startswith(("memory://", TIERED_PREFIX)):
+        uri = TIERED_PREFIX + uri
+    if uri.startswith(TIERED_PREFIX):
+        options = {
+            "sync_interval": cfg["RATELIMIT_LOCAL_SYNC_SEC"],
+            "sync_batch": cfg["RATELIMIT_LOCAL_BATCH"],
+        }
+    limiter = Limiter(get_remote_address, storage_uri=uri, storage_options=options)
+    limiter.init_app(app)
+    # the results page long-polls its AI feedback job, so polls get their own
+    # allowance instead of spending the per-route default
+    poll_limit = limiter.limit(lambda: current_app.config["AI_FEEDBACK_RATELIMIT"])
+    app.view_functions["api.ai_feedback"] = poll_limit(app.view_functions["api.ai_feedback"])
+    app.extensions["ai_ratelimit"] = (limiter, parse_many(cfg["AI_RATELIMIT"]))
+    return limiter
+
+
+def ai_quota_available() -> bool:
+    """Take one AI request from the client's ``AI_RATELIMIT`` quota, if any is left.
+
+    Over the quota the submission is still scored, only without AI feedback.
+    """
+    limiter, items = current_app.extensions["ai_ratelimit"]
+    if not limiter.enabled:
+        return True
+    key = get_remote_address()
+    return all(limiter.limiter.hit(item, "ai", key) for item in items)
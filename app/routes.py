@@ -1,14 +1,53 @@
-from flask import Blueprint, render_template, request
-
-from .ai import generate_ai_feedback
-from .utils import score_gad7, score_phq9
+import contextvars
+import time
+
+from flask import (
+    Blueprint,
+    Response,
+    current_app,
+    jsonify,
+    render_template,
+    request,
+    stream_template,
+)
+from flask.globals import request_ctx
+from flask_wtf.csrf import generate_csrf
+
+from . import monitoring, trends
+from .ai import ai_available, generate_ai_feedback
+from .analysis import SUBMISSION_SCHEMA, build_summary
+from .jobs import ai_jobs
+from .pagecache import render_cached
+from .ratelimit import ai_quota_available
+from .storage import checkins
 
 bp = Blueprint("main", __name__)
 
+# pages served from the page cache, rendered ahead by startup.warm_up
+CACHED_PAGES = ("index.html", "privacy.html", "terms.html")
+
+_STREAM_CHUNK_CHARS = 1024
+
 
 @bp.get("/")
 def index():
-    return render_template("index.html")
+    if request.args.get("nojs"):
+        # linked from the form's <noscript>: the form with its token inline, never cached
+        response = Response(render_template("index.html", inline_csrf=True), mimetype="text/html")
+        response.headers["Cache-Control"] = "no-store"
+        return response
+    return render_cached("index.html")
+
+
+@bp.get("/csrf-token")
+def csrf_token():
+    """Per-session CSRF token for the cached check-in form (fetched by main.js).
+
+    Exempt from rate limiting: the form cannot be submitted without it.
+    """
+    response = jsonify(csrf_token=generate_csrf())
+    response.headers["Cache-Control"] = "no-store"
+    return response
 
 
 @bp.get("/test")
@@ -17,205 +56,140 @@ def test():
 
 @bp.get("/privacy")
 def privacy():
-    return render_template("privacy.html")
+    return render_cached("privacy.html")
 
 @bp.get("/terms")
 def terms():
-    return render_template("terms.html")
+    return render_cached("terms.html")
+
+
+def _wants_json() -> bool:
+    # browsers (and */*) get the HTML form back; API clients can ask for JSON
+    best = request.accept_mimetypes.best_match(["text/html", "application/json"])
+    return best == "application/json"
 
 
 @bp.post("/analyze")
 def analyze():
-    # Extract form values with simple validation
-    name = (request.form.get("name") or "").strip()
-    age_str = (request.form.get("age") or "").strip()
-    mood = (request.form.get("mood") or "").strip().lower()
-    sleep = (request.form.get("sleep") or "").strip()
-    stress = (request.form.get("stress") or "").strip()
-    thoughts = (request.form.get("thoughts") or "").strip()
-
-    errors = {}
-    if not name:
-        errors["name"] = "Name is required."
-    try:
-        age = int(age_str)
-        if age < 13 or age > 120:
-            errors["age"] = "Enter a realistic age (13-120)."
-    except ValueError:
-        errors["age"] = "Age must be a number."
-
-    valid_moods = {"very low", "low", "neutral", "good", "very good"}
-    if mood not in valid_moods:
-        errors["mood"] = "Select a mood option."
-
-    try:
-        sleep_hours = float(sleep)
-        if sleep_hours < 0 or sleep_hours > 24:
-            errors["sleep"] = "Enter hours between 0 and 24."
-    except ValueError:
-        errors["sleep"] = "Sleep must be a number."
-
-    try:
-        stress_level = int(stress)
-        if stress_level < 1 or stress_level > 5:
-            errors["stress"] = "Stress must be 1-5."
-    except ValueError:
-        errors["stress"] = "Stress must be a number."
-
-    # Collect PHQ-9 and GAD-7 answers (validated to be integers 0-3)
-    phq9 = []
-    for i in range(1, 10):
-        key = f"phq9_{i}"
-        val = request.form.get(key, "").strip()
-        try:
-            v = int(val)
-            if v < 0 or v > 3:
-                raise ValueError()
-            phq9.append(v)
-        except Exception:
-            errors[key] = "Select 0-3"
-
-    gad7 = []
-    for i in range(1, 8):
-        key = f"gad7_{i}"
-        val = request.form.get(key, "").strip()
-        try:
-            v = int(val)
-            if v < 0 or v > 3:
-                raise ValueError()
-            gad7.append(v)
-        except Exception:
-            errors[key] = "Select 0-3"
-
-    # Lifestyle
-    try:
-        exercise_days = int(request.form.get("exercise_days", ""))
-    except ValueError:
-        errors["exercise_days"] = "Required"
-        exercise_days = 0
-    try:
-        caffeine_cups = int(request.form.get("caffeine_cups", ""))
-    except ValueError:
-        errors["caffeine_cups"] = "Required"
-        caffeine_cups = 0
-    try:
-        screen_hours = float(request.form.get("screen_hours", ""))
-    except ValueError:
-        errors["screen_hours"] = "Required"
-        screen_hours = 0.0
-    try:
-        support_level = int(request.form.get("support_level", ""))
-        if support_level < 1 or support_level > 5:
-            errors["support_level"] = "1-5"
-    except ValueError:
-        errors["support_level"] = "Required"
-        support_level = 3
+    with monitoring.stage("validate"):
+        values, errors, form = SUBMISSION_SCHEMA.validate(request.form)
+        # only check-ins the user asked to save are stored
+        save = checkins.enabled and request.form.get("save_checkin") == "on"
+        trend_key = request.form.get("trend_key", "").strip() if checkins.enabled else ""
+        wants_key = checkins.enabled and request.form.get("new_trend_key") == "on"
+        issued_key = None
+        if (trend_key or wants_key) and not save:
+            errors["trend_key"] = "Tick “Save this check-in” to track trends."
+        elif trend_key and not trends.valid_key(trend_key):
+            errors["trend_key"] = "Enter your personal key exactly as it was shown to you."
+        elif wants_key and not trend_key:
+            trend_key = issued_key = trends.new_key()
 
     if errors:
-        return render_template(
-            "index.html",
-            errors=errors,
-            form={
-                "name": name,
-                "age": age_str,
-                "mood": mood,
-                "sleep": sleep,
-                "stress": stress,
-                "thoughts": thoughts,
-                **{f"phq9_{i}": request.form.get(f"phq9_{i}", "") for i in range(1, 10)},
-                **{f"gad7_{i}": request.form.get(f"gad7_{i}", "") for i in range(1, 8)},
-                "exercise_days": request.form.get("exercise_days", ""),
-                "caffeine_cups": request.form.get("caffeine_cups", ""),
-                "screen_hours": request.form.get("screen_hours", ""),
-                "support_level": request.form.get("support_level", ""),
-            },
-        )
+        if _wants_json():
+            return (
+                jsonify(ok=False, errors=errors, fields=SUBMISSION_SCHEMA.describe(errors)),
+                400,
+            )
+        return render_template("index.html", errors=errors, form=form, inline_csrf=True)
 
-    # Simple rule-based analysis (safe, offline)
-    suggestions = []
-    risk_flag = False
-
-    if mood in {"very low", "low"}:
-        suggestions.append(
-            "Your mood seems low. Consider small enjoyable activities and reaching out to "
-            "someone you trust."
-        )
-
-    if sleep_hours < 6:
-        suggestions.append(
-            "You're sleeping less than recommended. Try a consistent bedtime and reduce "
-            "screens before bed."
-        )
-    elif sleep_hours > 9:
-        suggestions.append(
-            "You're sleeping a lot. If this persists, consider discussing with a "
-            "healthcare professional."
-        )
-
-    if stress_level >= 4:
-        suggestions.append(
-            "High stress reported. Try short breathing exercises, brief walks, or journaling."
-        )
-
-    if any(word in thoughts.lower() for word in ["hopeless", "harm", "suicide", "worthless"]):
-        risk_flag = True
-        suggestions.append(
-            "If you feel unsafe or at risk of harming yourself, seek immediate help: "
-            "local emergency services or a crisis hotline in your country."
-        )
-
-    if not suggestions:
-        suggestions.append(
-            "You're doing many things right. Keep monitoring your well-being and maintain "
-            "supportive routines."
-        )
-
-    # Use centralized scoring helpers
-    phq9_score, phq_level, suicidal_flag = score_phq9(phq9)
-    gad7_score, gad7_level = score_gad7(gad7)
-
-    # escalate risk if suicidal ideation present
-    if suicidal_flag:
-        risk_flag = True
-        suggestions.insert(
-            0,
-            "You reported some thoughts of self-harm or that you'd be better off dead. "
-            "Please seek immediate help or contact a crisis hotline.",
-        )
-
-    # Lifestyle nudges
-    if exercise_days < 2:
-        suggestions.append("Consider adding 10–15 minute walks on 2+ days each week.")
-    if caffeine_cups > 3:
-        suggestions.append(
-            "High caffeine can impact anxiety and sleep; consider reducing gradually."
-        )
-    if screen_hours > 6:
-        suggestions.append("Try short breaks and evening screen curfews to aid sleep and mood.")
-    if support_level <= 2:
-        suggestions.append("Think about one person you could check in with this week.")
-
-    summary = {
-        "name": name,
-        "age": age,
-        "mood": mood,
-        "sleep_hours": sleep_hours,
-        "stress_level": stress_level,
-        "thoughts": thoughts,
-        "risk_flag": risk_flag,
-        "suggestions": suggestions,
-        "phq9_score": phq9_score,
-        "phq9_level": phq_level,
-        "gad7_score": gad7_score,
-        "gad7_level": gad7_level,
-        "exercise_days": exercise_days,
-        "caffeine_cups": caffeine_cups,
-        "screen_hours": screen_hours,
-        "support_level": support_level,
-    }
+    summary = build_summary(values)
+    trend_view = _save_checkin(summary, trend_key) if save else None
 
     ai_feedback = None
+    ai_job_id = None
+    ai_outcome = None
     if request.form.get("use_ai") == "on":
-        ai_feedback = generate_ai_feedback(summary)
-
-    return render_template("result.html", summary=summary, ai_feedback=ai_feedback)
+        if not ai_available():
+            ai_outcome = "unavailable"
+        elif not ai_quota_available():
+            # over the AI quota the results are still shown, without AI feedback
+            ai_outcome = "over_quota"
+        elif current_app.config["AI_DEFERRED"]:
+            # render now; result.html fetches the AI text when the job finishes
+            ai_job_id = ai_jobs.submit(generate_ai_feedback, summary)
+            # no job when the store is full; say so rather than promise feedback
+            ai_outcome = "deferred" if ai_job_id else "unavailable"
+        else:
+            ai_feedback = generate_ai_feedback(summary)
+            ai_outcome = "sync"
+    monitoring.record_submission(summary, ai_outcome)
+
+    # streamed, so the page head (and its stylesheet) goes out while the rest renders
+    return _stream_page(
+        "result.html",
+        summary=summary,
+        ai_feedback=ai_feedback,
+        ai_job_id=ai_job_id,
+        ai_unavailable=ai_outcome == "unavailable",
+        trends=trend_view,
+        issued_key=issued_key,
+    )
+
+
+def _save_checkin(summary, trend_key: str):
+    """Queue the check-in for storage; the trends view when a key was given."""
+    cfg = current_app.config
+    key = None
+    if trend_key:
+        key = trends.user_key(trend_key, cfg["TRENDS_SECRET"] or cfg["SECRET_KEY"])
+    now = time.time()
+    view = None
+    if key is not None:
+        # read before queueing, so the aggregate cannot already include this check-in
+        view = trends.describe(
+            checkins.trends(key), trends.entry(summary, now), cfg["TRENDS_WINDOW"]
+        )
+    # queued for the writer thread; a full queue drops the record
+    checkins.save(summary, created_at=now, user_key=key)
+    return view
+
+
+def _stream_page(template: str, **context) -> Response:
+    """``stream_template`` whose body may be drained from another thread.
+
+    The body is rendered under its own copy of the request context, pushed
+    inside a copied ``contextvars`` context that every step runs in. The
+    server (or the test client) can then iterate it from any thread without
+    touching the original request context.
+    """
+    ctx = contextvars.copy_context()
+    page_ctx = request_ctx.copy()
+
+    def start():
+        page_ctx.push()
+        return stream_template(template, **context)
+
+    started = time.perf_counter()
+    body = ctx.run(start)
+    rendering = time.perf_counter() - started
+
+    def generate():
+        nonlocal rendering
+        # Jinja yields one piece per template node; send them in ~1 KiB writes
+        parts = []
+        size = 0
+        try:
+            while True:
+                started = time.perf_counter()
+                try:
+                    part = ctx.run(next, body)
+                except StopIteration:
+                    break
+                finally:
+                    rendering += time.perf_counter() - started
+                parts.append(part)
+                size += len(part)
+                if size >= _STREAM_CHUNK_CHARS:
+                    yield "".join(parts)
+                    parts = []
+                    size = 0
+            if parts:
+                yield "".join(parts)
+        finally:
+            ctx.run(body.close)
+            ctx.run(page_ctx.pop)
+            # rendering time only, not time spent waiting on the client
+            monitoring.observe_stage("render", rendering)
+
+    return Response(generate(), mimetype="text/html")
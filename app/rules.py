@@ -0,0 +1,186 @@
+"""Table-driven suggestion rules.
+
+Rules are declared as data in ``RULES`` and compiled once, at import, into a
+flat evaluation plan (a generated straight-line function). Evaluating a
+submission walks the plan, builds a bitmask of the rules that fired, and
+returns a shared, precomputed ``Evaluation`` for that mask, so the same
+suggestion tuples are handed to every caller.
+"""
+
+import sys
+from typing import Any, Callable, Dict, List, Mapping, NamedTuple, Optional, Sequence, Tuple
+
+
+class Suggestion(NamedTuple):
+    id: str
+    text: str
+
+
+class Rule(NamedTuple):
+    """A suggestion rule.
+
+    ``when`` is a ``(field, op, operand)`` condition on the summary fields, or
+    ``None`` for a fallback that fires only when no earlier rule fired.
+    ``front`` rules are placed before all others (later front rules first);
+    ``risk`` rules raise the summary's risk flag.
+    """
+
+    id: str
+    when: Optional[Tuple[str, str, Any]]
+    text: str
+    front: bool = False
+    risk: bool = False
+
+
+class Evaluation(NamedTuple):
+    suggestions: Tuple[Suggestion, ...]
+    texts: Tuple[str, ...]
+    risk_flag: bool
+
+
+RULES: Tuple[Rule, ...] = (
+    Rule(
+        "low_mood",
+        ("mood", "in", ("very low", "low")),
+        "Your mood seems low. Consider small enjoyable activities and reaching out to "
+        "someone you trust.",
+    ),
+    Rule(
+        "short_sleep",
+        ("sleep_hours", "<", 6),
+        "You're sleeping less than recommended. Try a consistent bedtime and reduce "
+        "screens before bed.",
+    ),
+    Rule(
+        "long_sleep",
+        ("sleep_hours", ">", 9),
+        "You're sleeping a lot. If this persists, consider discussing with a "
+        "healthcare professional.",
+    ),
+    Rule(
+        "high_stress",
+        ("stress_level", ">=", 4),
+        "High stress reported. Try short breathing exercises, brief walks, or journaling.",
+    ),
+    Rule(
+        "risk_words",
+        ("thoughts_risk", "==", True),
+        "If you feel unsafe or at risk of harming yourself, seek immediate help: "
+        "local emergency services or a crisis hotline in your country.",
+        risk=True,
+    ),
+    Rule(
+        "doing_well",
+        None,
+        "You're doing many things right. Keep monitoring your well-being and maintain "
+        "supportive routines.",
+    ),
+    Rule(
+        "suicidal_item",
+        ("phq9_suicidal", "==", True),
+        "You reported some thoughts of self-harm or that you'd be better off dead. "
+        "Please seek immediate help or contact a crisis hotline.",
+        front=True,
+        risk=True,
+    ),
+    # Lifestyle nudges
+    Rule(
+        "low_exercise",
+        ("exercise_days", "<", 2),
+        "Consider adding 10–15 minute walks on 2+ days each week.",
+    ),
+    Rule(
+        "high_caffeine",
+        ("caffeine_cups", ">", 3),
+        "High caffeine can impact anxiety and sleep; consider reducing gradually.",
+    ),
+    Rule(
+        "long_screen_time",
+        ("screen_hours", ">", 6),
+        "Try short breaks and evening screen curfews to aid sleep and mood.",
+    ),
+    Rule(
+        "low_support",
+        ("support_level", "<=", 2),
+        "Think about one person you could check in with this week.",
+    ),
+)
+
+_COMPARISONS = ("<", "<=", ">", ">=", "==")
+
+
+def _compile_plan(
+    rules: Sequence[Rule], outcome: Callable[[int], Evaluation]
+) -> Callable[[Mapping[str, Any]], Evaluation]:
+    """Generate one straight-line function computing the bitmask of fired rules.
+
+    Operands are bound as globals of the generated function, so evaluation
+    costs one field lookup and one comparison per rule, then a dict lookup of
+    the precomputed outcome for the mask.
+    """
+    outcomes: Dict[int, Evaluation] = {}
+    namespace: Dict[str, Any] = {"_outcomes": outcomes, "_outcome": outcome}
+    lines = ["def plan(fields):", "    mask = 0"]
+    for i, rule in enumerate(rules):
+        bit = 1 << i
+        if rule.when is None:
+            lines.append(f"    if not mask: mask = {bit}")
+            continue
+        field, op, operand = rule.when
+        value = f"fields[{field!r}]"
+        name = f"_k{i}"
+        if op in _COMPARISONS:
+            namespace[name] = operand
+            test = f"{value} {op} {name}"
+        elif op == "in":
+            namespace[name] = frozenset(operand)
+            test = f"{value} in {name}"
+        else:
+            raise ValueError(f"Unknown rule operator {op!r} in rule {rule.id!r}")
+        lines.append(f"    if {test}: mask |= {bit}")
+    lines += [
+        "    result = _outcomes.get(mask)",
+        "    if result is None:",
+        "        result = _outcomes[mask] = _outcome(mask)",
+        "    return result",
+    ]
+    # the source is built from the rule table, never from user input
+    exec("\n".join(lines), namespace)
+    return namespace["plan"]
+
+
+class RulesEngine:
+    """Evaluates a compiled rule table against summary fields."""
+
+    def __init__(self, rules: Sequence[Rule]):
+        ids = [r.id for r in rules]
+        if len(set(ids)) != len(ids):
+            raise ValueError("Rule ids must be unique")
+        self.rules = tuple(rules)
+        self._suggestions = tuple(
+            Suggestion(sys.intern(r.id), sys.intern(r.text)) for r in self.rules
+        )
+        #: ``evaluate(fields) -> Evaluation``; generated per rule table
+        self.evaluate = _compile_plan(self.rules, self._build)
+
+    def _build(self, mask: int) -> Evaluation:
+        front: List[Suggestion] = []
+        rest: List[Suggestion] = []
+        risk = False
+        for i, rule in enumerate(self.rules):
+            if mask & (1 << i):
+                if rule.front:
+                    front.insert(0, self._suggestions[i])
+                else:
+                    rest.append(self._suggestions[i])
+                risk = risk or rule.risk
+        suggestions = tuple(front + rest)
+        return Evaluation(suggestions, tuple(s.text for s in suggestions), risk)
+
+
+ENGINE = RulesEngine(RULES)
+
+# Run the default rule table against summary fields. ``fields`` needs every
+# field referenced by ``RULES``: mood, sleep_hours, stress_level, thoughts_risk,
+# phq9_suicidal, exercise_days, caffeine_cups, screen_hours and support_level.
+evaluate = ENGINE.evaluate
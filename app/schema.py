@@ -0,0 +1,178 @@
+"""Declarative form schemas compiled into single-pass validators.
+
+A schema is a table of ``Field`` declarations. ``FormSchema`` compiles it once
+into a generated straight-line function (the same approach as ``app.rules``)
+that reads each form key once and returns typed values, an error map and the
+normalized raw strings used to re-render the form.
+"""
+
+import math
+from typing import Any, Callable, Dict, Mapping, NamedTuple, Optional, Sequence
+
+_TYPE_NAMES = {str: "string", int: "integer", float: "number"}
+
+
+class Field(NamedTuple):
+    """One form field.
+
+    ``key`` names the parsed value (default: ``name``); fields sharing a
+    ``list_key`` are collected, in order, into a list under that key and only
+    contribute values that passed validation. ``invalid`` is the error when
+    the value cannot be parsed (or is not one of ``choices``), ``required``
+    the error for a blank text field and ``out_of_range`` the error when a
+    number falls outside ``[low, high]``. ``default`` is the value kept when
+    parsing fails.
+    """
+
+    name: str
+    type: type = str
+    key: Optional[str] = None
+    list_key: Optional[str] = None
+    required: Optional[str] = None
+    invalid: Optional[str] = None
+    choices: Optional[frozenset] = None
+    lower: bool = False
+    low: Optional[float] = None
+    high: Optional[float] = None
+    out_of_range: Optional[str] = None
+    default: Any = None
+
+
+class Validation(NamedTuple):
+    values: Dict[str, Any]
+    errors: Dict[str, str]
+    # normalized raw strings, for re-rendering the form
+    form: Dict[str, str]
+
+
+def _check(field: Field) -> None:
+    if field.type not in _TYPE_NAMES:
+        raise ValueError(f"Unsupported type {field.type!r} for field {field.name!r}")
+    if field.type is str:
+        if field.low is not None or field.high is not None:
+            raise ValueError(f"Bounds need a numeric type (field {field.name!r})")
+    elif field.invalid is None:
+        raise ValueError(f"Numeric field {field.name!r} needs an 'invalid' message")
+    if (field.low is not None or field.high is not None) and field.out_of_range is None:
+        raise ValueError(f"Bounded field {field.name!r} needs an 'out_of_range' message")
+    if field.choices is not None and field.invalid is None:
+        raise ValueError(f"Field {field.name!r} with choices needs an 'invalid' message")
+
+
+def _compile(fields: Sequence[Field]) -> Callable[[Mapping[str, Any]], Validation]:
+    """Generate ``validate(form)`` for the field table.
+
+    Messages, bounds and choices are bound as globals of the generated
+    function, so each field costs one ``form.get`` and a few local operations.
+    """
+    namespace: Dict[str, Any] = {"Validation": Validation}
+    lines = [
+        "def validate(form):",
+        "    get = form.get",
+        "    values = {}",
+        "    errors = {}",
+        "    echo = {}",
+    ]
+    lists: Dict[str, str] = {}
+    for i, field in enumerate(fields):
+        _check(field)
+        name = repr(field.name)
+        normalize = "raw.strip().lower()" if field.lower else "raw.strip()"
+        lines += [
+            f"    raw = get({name})",
+            f"    raw = {normalize} if raw else ''",
+            f"    echo[{name}] = raw",
+        ]
+        # ``ok`` guards the list append; scalar fields keep parsed values even
+        # when out of range, matching what the form has always reported back
+        if field.type is str:
+            lines.append("    v = raw")
+            if field.required is not None:
+                namespace[f"_req{i}"] = field.required
+                lines.append(f"    if not v: errors[{name}] = _req{i}")
+            if field.choices is not None:
+                namespace[f"_choices{i}"] = frozenset(field.choices)
+                namespace[f"_inv{i}"] = field.invalid
+                lines.append(f"    if v not in _choices{i}: errors[{name}] = _inv{i}")
+            ok = "True"
+        else:
+            namespace[f"_type{i}"] = field.type
+            namespace[f"_inv{i}"] = field.invalid
+            namespace[f"_default{i}"] = field.default
+            lines += ["    try:", f"        v = _type{i}(raw)"]
+            if field.type is float:
+                # float() takes "nan" and "inf", which slip past the bounds checks
+                namespace["_isfinite"] = math.isfinite
+                lines.append("        if not _isfinite(v): raise ValueError(raw)")
+            lines += [
+                "        ok = True",
+                "    except ValueError:",
+                f"        errors[{name}] = _inv{i}",
+                f"        v = _default{i}",
+                "        ok = False",
+            ]
+            bounds = []
+            if field.low is not None:
+                namespace[f"_low{i}"] = field.low
+                bounds.append(f"v < _low{i}")
+            if field.high is not None:
+                namespace[f"_high{i}"] = field.high
+                bounds.append(f"v > _high{i}")
+            if bounds:
+                namespace[f"_range{i}"] = field.out_of_range
+                lines += [
+                    f"    if ok and ({' or '.join(bounds)}):",
+                    f"        errors[{name}] = _range{i}",
+                    "        ok = False",
+                ]
+            if field.choices is not None:
+                namespace[f"_choices{i}"] = frozenset(field.choices)
+                lines += [
+                    f"    if ok and v not in _choices{i}:",
+                    f"        errors[{name}] = _inv{i}",
+                    "        ok = False",
+                ]
+            ok = "ok"
+
+        if field.list_key is not None:
+            target = lists.get(field.list_key)
+            if target is None:
+                target = lists[field.list_key] = f"_list{len(lists)}"
+                lines.append(f"    {target} = values[{field.list_key!r}] = []")
+            lines.append(f"    if {ok}: {target}.append(v)")
+        else:
+            lines.append(f"    values[{(field.key or field.name)!r}] = v")
+
+    lines.append("    return Validation(values, errors, echo)")
+    # the source is built from the field table, never from user input
+    exec("\n".join(lines), namespace)
+    return namespace["validate"]
+
+
+class FormSchema:
+    """A compiled field table; call ``validate(form)`` to parse a submission."""
+
+    def __init__(self, fields: Sequence[Field]):
+        names = [f.name for f in fields]
+        if len(set(names)) != len(names):
+            raise ValueError("Field names must be unique")
+        self.fields = tuple(fields)
+        #: ``validate(form) -> Validation``; generated per field table
+        self.validate = _compile(self.fields)
+
+    def describe(self, names: Optional[Sequence[str]] = None) -> Dict[str, Dict[str, Any]]:
+        """Constraints of the given fields (default: all), for JSON error responses."""
+        wanted = None if names is None else set(names)
+        out: Dict[str, Dict[str, Any]] = {}
+        for field in self.fields:
+            if wanted is not None and field.name not in wanted:
+                continue
+            spec: Dict[str, Any] = {"type": _TYPE_NAMES[field.type]}
+            if field.low is not None:
+                spec["min"] = field.low
+            if field.high is not None:
+                spec["max"] = field.high
+            if field.choices is not None:
+                spec["choices"] = sorted(field.choices)
+            out[field.name] = spec
+        return out
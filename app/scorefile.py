@@ -0,0 +1,158 @@
+"""Offline scoring of CSV/NDJSON dumps of paper-form check-ins (``flask score-file``).
+
+Records use the form's field names, like the batch API, and are judged by the
+same ``analyze_record``: PHQ-9/GAD-7 scoring from ``app.utils`` and the
+suggestion rules behind ``build_summary``. The input is read lazily in chunks
+of ``chunk_size`` records that are scored on a process pool; at most two
+chunks per worker are in flight and results are written as soon as the oldest
+chunk is done, so output keeps the input order and memory stays bounded
+however large the file.
+"""
+
+import csv
+import io
+import itertools
+import json
+import multiprocessing
+import os
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import IO, Any, Callable, Deque, Dict, Iterator, List, Optional, Tuple
+
+from .api import analyze_record, iter_records
+from .export import FIELDS
+
+FORMATS = ("csv", "ndjson")
+_EXTENSIONS = {".csv": "csv", ".ndjson": "ndjson", ".jsonl": "ndjson", ".json": "ndjson"}
+CSV_FIELDS = ("index", "id", "ok", "errors") + tuple(
+    f for f in FIELDS if f not in ("id", "created_at")
+)
+
+_Chunk = List[Tuple[int, Any]]
+
+
+def available_cpus() -> int:
+    """CPUs this process may run on (honours affinity masks, e.g. in containers)."""
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:  # not on Linux
+        return os.cpu_count() or 1
+
+
+def format_for(path: str, default: str = "ndjson") -> str:
+    return _EXTENSIONS.get(os.path.splitext(path)[1].lower(), default)
+
+
+def read_records(stream: IO[bytes], fmt: str) -> Iterator[Any]:
+    """Records from a binary stream of CSV, or of a JSON array or NDJSON.
+
+    Records that fail to decode come as a ValueError, as in the batch API.
+    """
+    if fmt == "csv":
+        text = io.TextIOWrapper(stream, encoding="utf-8-sig", newline="")
+        yield from csv.DictReader(text)
+        return
+    for record in iter_records(stream, "application/json"):
+        # decode errors do not always survive pickling; the message is not reported anyway
+        yield ValueError("Invalid JSON") if isinstance(record, Exception) else record
+
+
+def score_chunk(chunk: _Chunk) -> List[Dict[str, Any]]:
+    """Runs in a pool worker."""
+    return [analyze_record(index, record) for index, record in chunk]
+
+
+def _chunks(records: Iterator[Any], size: int) -> Iterator[_Chunk]:
+    numbered = enumerate(records)
+    while True:
+        chunk = list(itertools.islice(numbered, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+class _Writer:
+    def __init__(self, out: IO[str], fmt: str):
+        self.out = out
+        self.fmt = fmt
+        if fmt == "csv":
+            self.csv = csv.DictWriter(out, CSV_FIELDS, extrasaction="ignore")
+            self.csv.writeheader()
+
+    def write(self, results: List[Dict[str, Any]]) -> None:
+        if self.fmt == "ndjson":
+            self.out.write("".join(json.dumps(r, ensure_ascii=False) + "\n" for r in results))
+            return
+        for result in results:
+            row = {k: v for k, v in result.items() if k not in ("summary", "errors")}
+            if result.get("errors"):
+                row["errors"] = json.dumps(result["errors"], ensure_ascii=False)
+            for key, value in (result.get("summary") or {}).items():
+                row[key] = "; ".join(value) if isinstance(value, list) else value
+            self.csv.writerow(row)
+
+
+class Progress:
+    """Counts of scored rows, reported every ``interval`` seconds."""
+
+    def __init__(
+        self,
+        report: Callable[[str], None],
+        interval: float = 2.0,
+        timer: Callable[[], float] = time.monotonic,
+    ):
+        self.report = report
+        self.interval = interval
+        self.timer = timer
+        self.started = timer()
+        self.rows = 0
+        self.invalid = 0
+        self._next = self.started + interval
+
+    def add(self, results: List[Dict[str, Any]]) -> None:
+        self.rows += len(results)
+        self.invalid += sum(1 for r in results if not r["ok"])
+        if self.timer() >= self._next:
+            self._next = self.timer() + self.interval
+            self.report(self.line())
+
+    @property
+    def rate(self) -> float:
+        elapsed = self.timer() - self.started
+        return self.rows / elapsed if elapsed > 0 else 0.0
+
+    def line(self) -> str:
+        return f"{self.rows:,} rows ({self.invalid:,} invalid), {self.rate:,.0f} rows/s"
+
+
+def score_file(
+    stream: IO[bytes],
+    out: IO[str],
+    in_fmt: str,
+    out_fmt: str,
+    chunk_size: int = 1000,
+    workers: Optional[int] = None,
+    progress: Optional[Progress] = None,
+) -> Progress:
+    """Score every record of ``stream`` into ``out``, in input order."""
+    workers = workers or available_cpus()
+    progress = progress or Progress(lambda line: None)
+    writer = _Writer(out, out_fmt)
+    pending: Deque[Future] = deque()
+
+    def finish_oldest() -> None:
+        results = pending.popleft().result()
+        writer.write(results)
+        progress.add(results)
+
+    # spawn, not fork: the parent runs the app's background threads
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+        for chunk in _chunks(read_records(stream, in_fmt), chunk_size):
+            if len(pending) >= 2 * workers:
+                finish_oldest()
+            pending.append(pool.submit(score_chunk, chunk))
+        while pending:
+            finish_oldest()
+    return progress
@@ -0,0 +1,77 @@
+"""Startup phase timings and the warm-up run before a worker takes traffic.
+
+``create_app`` records how long each setup phase took. ``warm_up`` compiles
+every template, renders the cached pages and pushes a sample submission
+through validation, scoring, notes analysis and the rules, so the first real
+users do not pay for it. Under gunicorn with ``preload_app`` it runs once in
+the master and the workers share the result copy-on-write (see
+gunicorn.conf.py).
+"""
+
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator
+
+from flask import Flask
+
+_SAMPLE_FORM = {
+    "name": "Warmup",
+    "age": "30",
+    "mood": "neutral",
+    "sleep": "7",
+    "stress": "3",
+    "thoughts": "A quiet week, call me at 555-201-9988.",
+    "exercise_days": "3",
+    "caffeine_cups": "2",
+    "screen_hours": "5",
+    "support_level": "3",
+    **{f"phq9_{i}": "1" for i in range(1, 10)},
+    **{f"gad7_{i}": "1" for i in range(1, 8)},
+}
+
+
+class StartupTimer:
+    """Milliseconds per named phase, in the order they ran."""
+
+    def __init__(self):
+        self.phases: Dict[str, float] = {}
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = round((time.perf_counter() - started) * 1000, 2)
+
+    def total(self) -> float:
+        return round(sum(self.phases.values()), 2)
+
+
+def record(app: Flask, step: str, timer: StartupTimer) -> None:
+    """Keep ``timer``'s phases under ``step`` for /healthz and log them."""
+    startup = app.extensions.setdefault("startup", {})
+    startup[step] = {"total_ms": timer.total(), **timer.phases}
+    app.logger.info(f"Startup {step} took {timer.total():.0f} ms", extra={"phases": timer.phases})
+
+
+def warm_up(app: Flask) -> Dict[str, float]:
+    """Compile templates and prime caches and lazily built tables; returns phase timings."""
+    from .analysis import SUBMISSION_SCHEMA, build_summary
+    from .pagecache import render_cached
+    from .routes import CACHED_PAGES
+
+    timer = StartupTimer()
+    with timer.phase("templates"):
+        env = app.jinja_env
+        for name in env.list_templates(extensions=("html", "txt")):
+            env.get_template(name)
+    with timer.phase("analysis"):
+        build_summary(SUBMISSION_SCHEMA.validate(_SAMPLE_FORM).values)
+    with timer.phase("pages"):
+        # behind the TLS-terminating proxy, as real requests arrive
+        with app.test_request_context(headers={"X-Forwarded-Proto": "https"}):
+            for template in CACHED_PAGES:
+                render_cached(template)
+    record(app, "warm_up", timer)
+    return timer.phases
@@ -46,10 +46,58 @@ function initIntersectionObserver() {
   });
 }
 
+// Fill in deferred AI feedback on the results page by long-polling its job
+function initAiFeedback() {
+  const card = document.getElementById('aiFeedback');
+  if (!card) return;
+  const text = card.querySelector('.ai-text');
+  const url = card.getAttribute('data-job-url');
+  const giveUp = () => card.remove();
+  let failures = 0;
+
+  const poll = (attempt) => {
+    fetch(`${url}?wait=15`, { headers: { Accept: 'application/json' }, credentials: 'same-origin' })
+      .then((res) => {
+        // 202 pending, 200 done and 404 expired carry a status; anything else
+        // (429, 5xx, a proxy error page) is retried
+        if (!res.ok && res.status !== 404) throw new Error(`HTTP ${res.status}`);
+        return res.json();
+      })
+      .then((data) => {
+        failures = 0;
+        if (data.status === 'pending' && attempt < 20) {
+          poll(attempt + 1);
+        } else if (data.status === 'done' && data.feedback) {
+          text.textContent = data.feedback;
+        } else {
+          giveUp();
+        }
+      })
+      .catch(() => {
+        failures += 1;
+        // exponential backoff: 2s, 4s, 8s, 16s, 32s
+        if (failures <= 5) setTimeout(() => poll(attempt), 1000 * 2 ** failures);
+        else giveUp();
+      });
+  };
+  poll(0);
+}
+
+// The check-in page is served from a shared cache, so its CSRF token is
+// fetched per session rather than rendered into the HTML
+function fetchCsrfToken(input) {
+  return fetch('/csrf-token', { headers: { Accept: 'application/json' }, credentials: 'same-origin' })
+    .then((res) => res.json())
+    .then((data) => {
+      input.value = data.csrf_token || '';
+    });
+}
+
 document.addEventListener('DOMContentLoaded', () => {
   // Initialize enhanced features
   initSmoothScroll();
   initIntersectionObserver();
+  initAiFeedback();
 
   // Initialize score cards if we're on a results page
   if (document.querySelector('.score-card')) {
@@ -66,6 +114,9 @@ document.addEventListener('DOMContentLoaded', () => {
   });
   if (!form) return;
 
+  const csrfInput = form.querySelector('input[name="csrf_token"]');
+  if (csrfInput && !csrfInput.value) fetchCsrfToken(csrfInput).catch(() => {});
+
   form.addEventListener('submit', (e) => {
     const requiredFields = [
       'name', 'age', 'mood', 'sleep', 'stress',
@@ -119,6 +170,11 @@ document.addEventListener('DOMContentLoaded', () => {
       submitBtn.classList.add('loading');
       submitBtn.setAttribute('disabled', 'disabled');
     }
+    if (csrfInput && !csrfInput.value) {
+      // token request still in flight (or failed): get it, then submit
+      e.preventDefault();
+      fetchCsrfToken(csrfInput).finally(() => form.submit());
+    }
   });
 });
 
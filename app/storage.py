@@ -0,0 +1,369 @@
+"""Optional persistent store of check-in summaries (SQLite in WAL mode).
+
+``analyze()`` only enqueues the summary: a writer thread per worker process
+drains the bounded queue and commits whatever has accumulated in a single
+transaction (group commit), so request latency does not include disk writes.
+When the queue is full a record is dropped and counted, or, with
+``STORAGE_ON_FULL=block``, the request waits up to ``STORAGE_BLOCK_SEC`` for
+room. ``STORAGE_SYNCHRONOUS`` is SQLite's durability setting: ``NORMAL`` (the
+default) survives an application crash, ``FULL`` also a power loss.
+
+Only check-ins the user ticked "save" for reach the store. The raw notes are
+never stored; the ``thoughts`` field holds the redacted text from
+``app.text``. Check-ins saved with a user key (see ``app.trends``) also update
+that key's aggregate row in the same transaction. Check-ins older than
+``STORAGE_RETENTION_DAYS``, and trend aggregates not updated for as long, are
+deleted at startup and then at most hourly by the writer.
+"""
+
+import atexit
+import json
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from . import trends
+
+logger = logging.getLogger(__name__)
+
+SYNCHRONOUS_MODES = ("OFF", "NORMAL", "FULL")
+
+# Applied in order; PRAGMA user_version counts the ones already applied.
+_MIGRATIONS = (
+    """CREATE TABLE checkins (
+        id INTEGER PRIMARY KEY,
+        created_at REAL NOT NULL,
+        summary TEXT NOT NULL
+    )""",
+    "CREATE INDEX checkins_created_at ON checkins (created_at)",
+    "ALTER TABLE checkins ADD COLUMN user_key TEXT",
+    "CREATE INDEX checkins_user_key ON checkins (user_key, created_at)",
+    """CREATE TABLE user_trends (
+        user_key TEXT PRIMARY KEY,
+        updated_at REAL NOT NULL,
+        aggregate TEXT NOT NULL
+    )""",
+)
+
+_INSERT = "INSERT INTO checkins (created_at, summary, user_key) VALUES (?, ?, ?)"
+_UPSERT_TRENDS = """INSERT INTO user_trends (user_key, updated_at, aggregate) VALUES (?, ?, ?)
+    ON CONFLICT (user_key) DO UPDATE
+    SET updated_at = excluded.updated_at, aggregate = excluded.aggregate"""
+
+# (created_at, stored fields, user key, trends entry)
+_Row = Tuple[float, Dict[str, Any], Optional[str], Optional[Dict[str, Any]]]
+
+_STOP = object()
+_PURGE_INTERVAL = 3600.0
+
+
+def stored_fields(summary: Dict[str, Any]) -> Dict[str, Any]:
+    """The summary as stored: redacted notes only."""
+    record = {k: v for k, v in summary.items() if k not in ("thoughts", "thoughts_redacted")}
+    record["thoughts"] = summary.get("thoughts_redacted", "")
+    return record
+
+
+class CheckinStore:
+    def __init__(self):
+        self.path: Optional[str] = None
+        self.queue_size = 1000
+        self.batch_size = 200
+        self.commit_delay = 0.1
+        self.on_full = "drop"
+        self.block_timeout = 0.05
+        self.synchronous = "NORMAL"
+        self.busy_timeout = 5.0
+        self.trends_window = 5
+        # seconds a check-in is kept; None keeps them
+        self.retention: Optional[float] = None
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+        self.batches = 0
+        self.purged = 0
+        self._purged_at = float("-inf")
+        self._lock = threading.Lock()
+        self._pid: Optional[int] = None
+        self._queue: Optional[queue.Queue] = None
+        self._writer: Optional[threading.Thread] = None
+        # called from the writer thread with each committed batch of
+        # (created_at, stored fields), e.g. the columnar analytics store
+        self.sinks: List[Callable[[List[Tuple[float, Dict[str, Any]]]], None]] = []
+        self._readers: List[sqlite3.Connection] = []
+        self._readers_pid: Optional[int] = None
+        self._atexit = False
+
+    @property
+    def enabled(self) -> bool:
+        return self.path is not None
+
+    def configure(
+        self,
+        path: str,
+        queue_size: int = 1000,
+        batch_size: int = 200,
+        commit_delay: float = 0.1,
+        on_full: str = "drop",
+        block_timeout: float = 0.05,
+        synchronous: str = "NORMAL",
+        trends_window: int = 5,
+        retention_days: float = 0,
+    ) -> None:
+        synchronous = synchronous.upper()
+        if synchronous not in SYNCHRONOUS_MODES:
+            raise ValueError(f"STORAGE_SYNCHRONOUS must be one of {', '.join(SYNCHRONOUS_MODES)}")
+        if on_full not in ("drop", "block"):
+            raise ValueError("STORAGE_ON_FULL must be 'drop' or 'block'")
+        self.close()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.path = path
+        self.queue_size = queue_size
+        self.batch_size = batch_size
+        self.commit_delay = commit_delay
+        self.on_full = on_full
+        self.block_timeout = block_timeout
+        self.synchronous = synchronous
+        self.trends_window = trends_window
+        self.retention = retention_days * 86400 if retention_days > 0 else None
+        conn = self.connect()
+        try:
+            _migrate(conn)
+            self.purge(conn)
+        finally:
+            conn.close()
+        if not self._atexit:
+            atexit.register(self.close)
+            self._atexit = True
+
+    def disable(self) -> None:
+        self.close()
+        self.path = None
+
+    def connect(self) -> sqlite3.Connection:
+        """A new connection with the store's pragmas; the caller closes it."""
+        conn = sqlite3.connect(
+            self.path, timeout=self.busy_timeout, isolation_level=None, check_same_thread=False
+        )
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(f"PRAGMA synchronous={self.synchronous}")
+        return conn
+
+    @contextmanager
+    def reader(self) -> Iterator[sqlite3.Connection]:
+        """A pooled connection for reads, returned to the pool afterwards."""
+        with self._lock:
+            if self._readers_pid != os.getpid():
+                # connections must not be shared with a forked parent
+                self._readers = []
+                self._readers_pid = os.getpid()
+            conn = self._readers.pop() if self._readers else None
+        if conn is None:
+            conn = self.connect()
+        try:
+            yield conn
+        finally:
+            with self._lock:
+                if self._readers_pid == os.getpid():
+                    self._readers.append(conn)
+
+    def trends(self, user_key: str) -> Optional[Dict[str, Any]]:
+        """The precomputed aggregate of a user's committed check-ins, if any."""
+        with self.reader() as conn:
+            row = conn.execute(
+                "SELECT aggregate FROM user_trends WHERE user_key = ?", (user_key,)
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def _ensure_writer(self) -> queue.Queue:
+        if self._pid == os.getpid():
+            return self._queue
+        with self._lock:
+            if self._pid != os.getpid():
+                # the parent's writer thread does not survive a fork
+                self._queue = queue.Queue(self.queue_size)
+                self._writer = threading.Thread(
+                    target=self._run, args=(self._queue,), name="checkin-writer", daemon=True
+                )
+                self._writer.start()
+                self._pid = os.getpid()
+        return self._queue
+
+    def save(
+        self,
+        summary: Dict[str, Any],
+        created_at: Optional[float] = None,
+        user_key: Optional[str] = None,
+    ) -> bool:
+        """Queue a summary for writing; False when it was dropped."""
+        created_at = created_at or time.time()
+        item = trends.entry(summary, created_at) if user_key is not None else None
+        row = (created_at, stored_fields(summary), user_key, item)
+        q = self._ensure_writer()
+        try:
+            if self.on_full == "block":
+                q.put(row, timeout=self.block_timeout)
+            else:
+                q.put_nowait(row)
+        except queue.Full:
+            self.dropped += 1
+            return False
+        return True
+
+    def _run(self, q: queue.Queue) -> None:
+        conn = self.connect()
+        try:
+            while True:
+                batch = [q.get()]
+                # whatever queued up meanwhile goes into the same commit
+                deadline = time.monotonic() + self.commit_delay
+                while len(batch) < self.batch_size and batch[-1] is not _STOP:
+                    try:
+                        batch.append(q.get(timeout=max(0.0, deadline - time.monotonic())))
+                    except queue.Empty:
+                        break
+                rows = [row for row in batch if row is not _STOP]
+                if rows:
+                    self._write(conn, rows)
+                for _ in batch:
+                    q.task_done()
+                if len(rows) < len(batch):
+                    return
+        finally:
+            conn.close()
+
+    def _write(self, conn: sqlite3.Connection, rows: List[_Row]) -> None:
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.executemany(
+                _INSERT, [(at, json.dumps(fields, default=str), key) for at, fields, key, _ in rows]
+            )
+            self._update_trends(conn, rows)
+            conn.execute("COMMIT")
+        except sqlite3.Error:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            self.failed += len(rows)
+            logger.exception("Could not store %d check-ins", len(rows))
+            return
+        self.written += len(rows)
+        self.batches += 1
+        if time.monotonic() - self._purged_at >= _PURGE_INTERVAL:
+            self.purge(conn)
+        for sink in self.sinks:
+            try:
+                sink([(at, fields) for at, fields, _, _ in rows])
+            except Exception:
+                logger.exception("Check-in sink %r failed", sink)
+
+    def _update_trends(self, conn: sqlite3.Connection, rows: List[_Row]) -> None:
+        by_key: Dict[str, List[Dict[str, Any]]] = {}
+        for _, _, key, item in rows:
+            if key is not None:
+                by_key.setdefault(key, []).append(item)
+        for key, items in by_key.items():
+            found = conn.execute(
+                "SELECT aggregate FROM user_trends WHERE user_key = ?", (key,)
+            ).fetchone()
+            aggregate = json.loads(found[0]) if found else trends.empty()
+            for item in items:
+                trends.fold(aggregate, item, self.trends_window)
+            conn.execute(_UPSERT_TRENDS, (key, items[-1]["at"], json.dumps(aggregate)))
+
+    def purge(self, conn: sqlite3.Connection, now: Optional[float] = None) -> int:
+        """Delete what is past the retention period; the number of check-ins deleted."""
+        if self.retention is None:
+            return 0
+        cutoff = (now or time.time()) - self.retention
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            deleted = conn.execute("DELETE FROM checkins WHERE created_at < ?", (cutoff,)).rowcount
+            conn.execute("DELETE FROM user_trends WHERE updated_at < ?", (cutoff,))
+            conn.execute("COMMIT")
+        except sqlite3.Error:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            logger.exception("Could not purge expired check-ins")
+            return 0
+        self._purged_at = time.monotonic()
+        self.purged += deleted
+        return deleted
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        """Wait until this process's queued records are committed."""
+        q = self._queue
+        if q is None or self._pid != os.getpid():
+            return True
+        deadline = time.monotonic() + timeout
+        with q.all_tasks_done:
+            while q.unfinished_tasks:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                q.all_tasks_done.wait(remaining)
+        return True
+
+    def close(self, timeout: float = 5.0) -> None:
+        """Commit what is queued and stop this process's writer."""
+        with self._lock:
+            writer, q, pid = self._writer, self._queue, self._pid
+            self._pid = None
+            readers, self._readers = self._readers, []
+        if writer is not None and pid == os.getpid():
+            q.put(_STOP)
+            writer.join(timeout)
+        if self._readers_pid == os.getpid():
+            for conn in readers:
+                conn.close()
+
+    def stats(self) -> Dict[str, Any]:
+        q = self._queue
+        return {
+            "enabled": self.enabled,
+            "queued": q.qsize() if q is not None and self._pid == os.getpid() else 0,
+            "written": self.written,
+            "dropped": self.dropped,
+            "failed": self.failed,
+            "batches": self.batches,
+            "purged": self.purged,
+        }
+
+
+def _migrate(conn: sqlite3.Connection) -> None:
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+        for number, statement in enumerate(_MIGRATIONS[version:], start=version + 1):
+            conn.execute(statement)
+            conn.execute(f"PRAGMA user_version={number}")
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+
+
+# Process-wide store; configured by init_app when STORAGE_ENABLED is set
+checkins = CheckinStore()
+
+
+def init_app(app) -> None:
+    cfg = app.config
+    if not cfg["STORAGE_ENABLED"]:
+        checkins.disable()
+        return
+    checkins.configure(
+        cfg["STORAGE_PATH"] or os.path.join(app.instance_path, "checkins.db"),
+        queue_size=cfg["STORAGE_QUEUE_SIZE"],
+        batch_size=cfg["STORAGE_BATCH_SIZE"],
+        commit_delay=cfg["STORAGE_COMMIT_DELAY_SEC"],
+        on_full=cfg["STORAGE_ON_FULL"],
+        block_timeout=cfg["STORAGE_BLOCK_SEC"],
+        synchronous=cfg["STORAGE_SYNCHRONOUS"],
+        trends_window=cfg["TRENDS_WINDOW"],
+        retention_days=cfg["STORAGE_RETENTION_DAYS"],
+    )
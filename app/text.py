@@ -0,0 +1,175 @@
+"""Single-pass analysis of the free-text notes field.
+
+One regex scan tokenizes the text into words, email addresses and phone
+numbers. Each word is fed to a word-level trie automaton built from the risk
+lexicon, so matching costs a dict lookup per active trie state regardless of
+how many terms the lexicon holds. The same scan writes the redacted copy of
+the text and stops copying once it reaches the truncation limit.
+"""
+
+import os
+import re
+from pathlib import Path
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+DEFAULT_LEXICON_PATH = Path(__file__).parent / "data" / "risk_lexicon.txt"
+MAX_NOTES_CHARS = 500
+
+_TOKEN_RE = re.compile(
+    r"(?P<email>[\w.+-]+@[\w-]+(?:\.[\w-]+)+)"
+    r"|(?P<phone>\+?\(?\d[\d ().-]{5,}\d)"
+    r"|(?P<word>\w+)"
+)
+_MIN_PHONE_DIGITS = 7
+
+_EMAIL, _PHONE, _NAME = "[email]", "[phone]", "[name]"
+
+
+class TextAnalysis(NamedTuple):
+    risk_terms: Tuple[str, ...]
+    redacted: str
+    truncated: bool
+
+    @property
+    def risk(self) -> bool:
+        return bool(self.risk_terms)
+
+
+class _Node:
+    __slots__ = ("exact", "stems", "stem_lengths", "term")
+
+    def __init__(self):
+        self.exact: Dict[str, "_Node"] = {}
+        self.stems: Dict[str, "_Node"] = {}
+        self.stem_lengths: Tuple[int, ...] = ()
+        self.term: Optional[str] = None
+
+    def step(self, word: str) -> List["_Node"]:
+        nodes = []
+        node = self.exact.get(word)
+        if node is not None:
+            nodes.append(node)
+        for n in self.stem_lengths:
+            node = self.stems.get(word[:n]) if len(word) >= n else None
+            if node is not None:
+                nodes.append(node)
+        return nodes
+
+
+def load_lexicon(path) -> List[str]:
+    """Read one term per line, skipping blank lines and ``#`` comments."""
+    terms = []
+    with open(path, encoding="utf-8") as fh:
+        for line in fh:
+            line = line.strip()
+            if line and not line.startswith("#"):
+                terms.append(line)
+    return terms
+
+
+class TextAnalyzer:
+    """Risk-term matching, PII redaction and truncation in one scan."""
+
+    def __init__(self, lexicon: Iterable[str], max_chars: int = MAX_NOTES_CHARS):
+        self.max_chars = max_chars
+        self._root = _Node()
+        self.size = 0
+        for term in lexicon:
+            self._add(term)
+        self._finalize(self._root)
+
+    def _add(self, term: str) -> None:
+        node = self._root
+        words = [w.casefold() for w in re.findall(r"\w+\*?", term)]
+        if not words:
+            return
+        for word in words:
+            if word.endswith("*"):
+                table = node.stems
+                word = word[:-1]
+            else:
+                table = node.exact
+            node = table.setdefault(word, _Node())
+        node.term = " ".join(words)
+        self.size += 1
+
+    def _finalize(self, node: _Node) -> None:
+        node.stem_lengths = tuple(sorted({len(s) for s in node.stems}))
+        for child in list(node.exact.values()) + list(node.stems.values()):
+            self._finalize(child)
+
+    def analyze(self, text: str, names: Sequence[str] = ()) -> TextAnalysis:
+        """Scan ``text`` once.
+
+        ``names`` are words to redact as personal names (e.g. the submitter's
+        name split into words); matching is case-insensitive.
+        """
+        name_words = {n.casefold() for n in names if len(n) > 1}
+        root = self._root
+        limit = self.max_chars
+        active: List[_Node] = []
+        found: Dict[str, None] = {}
+        out: List[str] = []
+        out_len = 0
+        pos = 0
+
+        for m in _TOKEN_RE.finditer(text):
+            token = m.group()
+            if m.lastgroup == "word":
+                word = token.casefold()
+                replacement = _NAME if word in name_words else None
+                if active:
+                    states = []
+                    for state in active:
+                        self._advance(state, word, states, found)
+                    self._advance(root, word, states, found)
+                    active = states
+                elif word in root.exact or root.stem_lengths:
+                    self._advance(root, word, active, found)
+            else:
+                active = []
+                if m.lastgroup == "email":
+                    replacement = _EMAIL
+                elif sum(c.isdigit() for c in token) >= _MIN_PHONE_DIGITS:
+                    replacement = _PHONE
+                else:
+                    replacement = None
+
+            if out_len < limit:
+                start, end = m.span()
+                if replacement is None:
+                    piece = text[pos:end]
+                else:
+                    piece = text[pos:start] + replacement
+                out.append(piece)
+                out_len += len(piece)
+                pos = end
+
+        out.append(text[pos:] if out_len < limit else "")
+        redacted = "".join(out)
+        truncated = len(redacted) > limit or (out_len >= limit and pos < len(text))
+        return TextAnalysis(tuple(found), redacted[:limit], truncated)
+
+    @staticmethod
+    def _advance(state: _Node, word: str, into: List[_Node], found: Dict[str, None]) -> None:
+        for node in state.step(word):
+            if node.term is not None:
+                found[node.term] = None
+            if node.exact or node.stems:
+                into.append(node)
+
+
+def _build_default() -> TextAnalyzer:
+    terms = load_lexicon(DEFAULT_LEXICON_PATH)
+    extra = os.getenv("RISK_LEXICON_PATH")
+    if extra:
+        terms += load_lexicon(extra)
+    return TextAnalyzer(terms)
+
+
+ANALYZER = _build_default()
+
+
+def analyze_notes(text: str, name: str = "") -> TextAnalysis:
+    """Analyze free-text notes with the default lexicon, redacting ``name``."""
+    return ANALYZER.analyze(text, names=re.findall(r"\w+", name))
@@ -0,0 +1,123 @@
+"""Score trends for returning users who opt in with a personal key.
+
+Keys are generated by the server (``new_key``, 128 random bits) and shown to
+the user once; only keys in that format are accepted, so two users cannot
+pick the same key and nobody can guess someone else's. The key is never
+stored: ``user_key`` turns it into an HMAC under ``TRENDS_SECRET`` (default
+``SECRET_KEY``), the only link between their check-ins.
+
+Each key has one precomputed aggregate (count, running sums, min/max per
+instrument and the last ``TRENDS_WINDOW`` entries) that the storage writer
+folds every new check-in into, so showing trends costs one primary-key lookup
+however long the history is.
+"""
+
+import copy
+import hashlib
+import hmac
+import re
+import secrets
+import time
+from typing import Any, Dict, List, Optional
+
+from .utils import GAD7_LEVELS, PHQ9_LEVELS
+
+# severity levels of each instrument, in increasing order
+LEVELS = {"phq9": PHQ9_LEVELS, "gad7": GAD7_LEVELS}
+
+
+_KEY_BYTES = 16
+# token_urlsafe of 16 bytes: 22 base64url characters
+_KEY_RE = re.compile(r"[A-Za-z0-9_-]{22}")
+
+
+def new_key() -> str:
+    return secrets.token_urlsafe(_KEY_BYTES)
+
+
+def valid_key(key: str) -> bool:
+    return _KEY_RE.fullmatch(key) is not None
+
+
+def user_key(key: str, secret: str) -> str:
+    return hmac.new(secret.encode("utf-8"), key.encode("utf-8"), hashlib.sha256).hexdigest()
+
+
+def entry(summary: Dict[str, Any], created_at: float) -> Dict[str, Any]:
+    """The part of a check-in kept in the aggregate's recent window."""
+    out: Dict[str, Any] = {"at": created_at}
+    for name in LEVELS:
+        out[name] = summary[f"{name}_score"]
+        out[f"{name}_level"] = summary[f"{name}_level"]
+    return out
+
+
+def empty() -> Dict[str, Any]:
+    return {
+        "count": 0,
+        **{name: {"sum": 0, "min": None, "max": None} for name in LEVELS},
+        "recent": [],
+    }
+
+
+def fold(aggregate: Dict[str, Any], item: Dict[str, Any], window: int) -> Dict[str, Any]:
+    """Add one entry to ``aggregate`` in place."""
+    aggregate["count"] += 1
+    for name in LEVELS:
+        stats = aggregate[name]
+        score = item[name]
+        stats["sum"] += score
+        stats["min"] = score if stats["min"] is None else min(stats["min"], score)
+        stats["max"] = score if stats["max"] is None else max(stats["max"], score)
+    aggregate["recent"] = (aggregate["recent"] + [item])[-window:]
+    return aggregate
+
+
+def _level_index(name: str, level: str) -> Optional[int]:
+    try:
+        return LEVELS[name].index(level)
+    except ValueError:
+        return None
+
+
+def describe(
+    aggregate: Optional[Dict[str, Any]], current: Dict[str, Any], window: int
+) -> Dict[str, Any]:
+    """Trends view of the current check-in against the aggregate of earlier ones."""
+    before = aggregate or empty()
+    previous = before["recent"][-1] if before["recent"] else None
+    after = fold(copy.deepcopy(before), current, window)
+    recent: List[Dict[str, Any]] = after["recent"]
+
+    instruments = {}
+    for name in LEVELS:
+        stats = after[name]
+        view = {
+            "score": current[name],
+            "level": current[f"{name}_level"],
+            "average": round(stats["sum"] / after["count"], 1),
+            "rolling_average": round(sum(e[name] for e in recent) / len(recent), 1),
+            "min": stats["min"],
+            "max": stats["max"],
+            "change": None,
+            "previous_level": None,
+            "level_steps": None,
+        }
+        if previous is not None:
+            view["change"] = current[name] - previous[name]
+            view["previous_level"] = previous[f"{name}_level"]
+            now_index = _level_index(name, current[f"{name}_level"])
+            then_index = _level_index(name, previous[f"{name}_level"])
+            if now_index is not None and then_index is not None:
+                # positive: more severe than last time
+                view["level_steps"] = now_index - then_index
+        instruments[name] = view
+
+    return {
+        "count": after["count"],
+        "window": len(recent),
+        "instruments": instruments,
+        "history": [
+            {**e, "date": time.strftime("%Y-%m-%d", time.gmtime(e["at"]))} for e in recent
+        ],
+    }
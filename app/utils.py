@@ -1,11 +1,21 @@
 """Utility helpers for scoring PHQ-9 and GAD-7 and interpreting results.
 
 These functions centralize the scoring rules so tests can validate behavior
-and the routes can remain concise.
+and the routes can remain concise. The ``*_batch`` variants score whole
+arrays of questionnaires at once for offline re-scoring of large backlogs.
 """
 
 from typing import List, Tuple
 
+import numpy as np
+
+# Upper bound (inclusive) of every severity band but the last, and the label
+# for each band. A score's severity code is its index into the labels.
+PHQ9_THRESHOLDS = (4, 9, 14, 19)
+PHQ9_LEVELS = ("Minimal", "Mild", "Moderate", "Moderately severe", "Severe")
+GAD7_THRESHOLDS = (4, 9, 14)
+GAD7_LEVELS = ("Minimal", "Mild", "Moderate", "Severe")
+
 
 def score_phq9(answers: List[int]) -> Tuple[int, str, bool]:
     """Compute PHQ-9 score and severity level.
@@ -49,3 +59,36 @@ def score_gad7(answers: List[int]) -> Tuple[int, str]:
     else:
         level = "Severe"
     return score, level
+
+
+def _as_answer_matrix(answers, items: int, name: str) -> np.ndarray:
+    matrix = np.asarray(answers)
+    if matrix.ndim != 2 or matrix.shape[1] != items:
+        raise ValueError(f"{name} requires an (N, {items}) array of answers")
+    if matrix.dtype.kind not in "iub":
+        raise ValueError(f"{name} answers must be integers")
+    return matrix
+
+
+def score_phq9_batch(answers) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Vectorized :func:`score_phq9` for an (N, 9) integer array.
+
+    Returns (scores, severity_codes, suicidal_mask). ``severity_codes`` index
+    into ``PHQ9_LEVELS``; ``suicidal_mask`` is True where item 9 >= 1.
+    """
+    matrix = _as_answer_matrix(answers, 9, "PHQ-9")
+    scores = matrix.sum(axis=1, dtype=np.int64)
+    codes = np.searchsorted(PHQ9_THRESHOLDS, scores, side="left").astype(np.int8)
+    suicidal = matrix[:, 8] >= 1
+    return scores, codes, suicidal
+
+
+def score_gad7_batch(answers) -> Tuple[np.ndarray, np.ndarray]:
+    """Vectorized :func:`score_gad7` for an (N, 7) integer array.
+
+    Returns (scores, severity_codes); codes index into ``GAD7_LEVELS``.
+    """
+    matrix = _as_answer_matrix(answers, 7, "GAD-7")
+    scores = matrix.sum(axis=1, dtype=np.int64)
+    codes = np.searchsorted(GAD7_THRESHOLDS, scores, side="left").astype(np.int8)
+    return scores, codes
@@ -0,0 +1,73 @@
+"""Cohort aggregates over the columnar analytics store at a million rows.
+
+Whole segments are counted once and cached; the cold case measures the scan.
+"""
+
+import atexit
+import shutil
+import tempfile
+
+import numpy as np
+
+from app.columnar import COLUMNS, ColumnStore
+from benchmarks.harness import Case, run
+
+ROWS = 1_000_000
+DAYS = 30
+DAY = 86400
+START = 1_700_006_400  # a UTC midnight
+
+_rng = np.random.default_rng(0)
+_directory = tempfile.mkdtemp(prefix="mha-bench-analytics-")
+atexit.register(shutil.rmtree, _directory, True)
+
+store = ColumnStore()
+store.configure(_directory, segment_sec=DAY)
+_per_day = ROWS // DAYS
+for day in range(DAYS):
+    created = START + day * DAY + np.sort(_rng.uniform(0, DAY, _per_day))
+    columns = {
+        "created_at": created,
+        "age": _rng.integers(13, 90, _per_day),
+        "sleep_hours": _rng.uniform(3, 10, _per_day),
+        "stress_level": _rng.integers(1, 6, _per_day),
+        "screen_hours": _rng.uniform(0, 12, _per_day),
+        "phq9_score": _rng.integers(0, 28, _per_day),
+        "phq9_level": _rng.integers(0, 5, _per_day),
+        "gad7_score": _rng.integers(0, 22, _per_day),
+        "gad7_level": _rng.integers(0, 4, _per_day),
+        "risk_flag": _rng.random(_per_day) < 0.05,
+    }
+    store._append_segment(
+        store._segment_dir(START + day * DAY),
+        {name: np.asarray(columns[name], dtype=dtype) for name, dtype in COLUMNS},
+    )
+
+# a week starting and ending mid-day: five whole segments, two masked
+WEEK = (START + 10 * DAY + DAY / 2, START + 17 * DAY + DAY / 2)
+
+
+def _cold():
+    # as after a restart: no segment counts cached yet
+    store._counts.clear()
+    store.aggregate()
+
+
+CASES = [
+    Case("analytics aggregate (all rows, cold)", _cold, items=ROWS, unit="rows"),
+    Case("analytics aggregate (all rows)", store.aggregate, items=ROWS, unit="rows"),
+    Case(
+        "analytics aggregate (one week)",
+        lambda: store.aggregate(*WEEK),
+        items=7 * _per_day,
+        unit="rows",
+    ),
+]
+
+
+def main():
+    run(CASES)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""Request-path costs: form validation, AI payload preparation, rendering and
+a full ``POST /analyze`` through the test client.
+"""
+
+import os
+
+from flask import render_template
+
+from app import create_app
+from app.ai import _cache_key, _sanitize_summary
+from app.analysis import SUBMISSION_SCHEMA, build_summary
+from benchmarks.harness import Case, run
+
+FORM = {
+    "name": "Sam",
+    "age": "30",
+    "mood": "low",
+    "sleep": "5.5",
+    "stress": "4",
+    "thoughts": "Busy week, call me at 555-201-9988. Some days feel heavy.",
+    "exercise_days": "2",
+    "caffeine_cups": "3",
+    "screen_hours": "7",
+    "support_level": "3",
+    **{f"phq9_{i}": str(i % 4) for i in range(1, 10)},
+    **{f"gad7_{i}": str(i % 4) for i in range(1, 8)},
+}
+
+os.environ.setdefault("FLASK_ENV", "development")
+os.environ.setdefault("SECRET_KEY", "bench-secret")
+app = create_app()
+app.config.update(TESTING=True, WTF_CSRF_ENABLED=False)
+# thousands of posts from one address would hit the rate limit
+for _limiter in app.extensions["limiter"]:
+    _limiter.enabled = False
+client = app.test_client()
+
+VALUES = SUBMISSION_SCHEMA.validate(FORM).values
+SUMMARY = build_summary(VALUES)
+SANITIZED = _sanitize_summary(SUMMARY)
+
+
+def _render():
+    with app.test_request_context("/analyze", method="POST"):
+        render_template("result.html", summary=SUMMARY, ai_feedback=None, ai_job_id=None)
+
+
+def _analyze():
+    res = client.post("/analyze", data=FORM)
+    res.get_data()
+    assert res.status_code == 200, res.status_code
+
+
+CASES = [
+    Case("validate submission", lambda: SUBMISSION_SCHEMA.validate(FORM), unit="forms"),
+    Case("build_summary", lambda: build_summary(VALUES), unit="summaries"),
+    Case("_sanitize_summary", lambda: _sanitize_summary(SUMMARY), unit="summaries"),
+    Case("_cache_key", lambda: _cache_key(SANITIZED, "gpt-4o-mini"), unit="keys"),
+    Case("render result.html", _render, unit="pages"),
+    Case("POST /analyze", _analyze, unit="requests"),
+]
+
+
+def main():
+    run(CASES)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""Per-evaluation cost of the rules engine vs. the former inline ``if`` chain.
+
+Risk-word detection in the notes is benchmarked separately (bench_text), so
+both sides here read the precomputed ``thoughts_risk`` flag.
+"""
+
+import itertools
+
+from app.rules import evaluate
+from benchmarks.harness import Case, run
+
+
+def legacy_suggestions(f):
+    """The suggestion logic as it was written inline in ``analyze()``."""
+    suggestions = []
+    risk_flag = False
+    if f["mood"] in {"very low", "low"}:
+        suggestions.append(
+            "Your mood seems low. Consider small enjoyable activities and reaching out to "
+            "someone you trust."
+        )
+    if f["sleep_hours"] < 6:
+        suggestions.append(
+            "You're sleeping less than recommended. Try a consistent bedtime and reduce "
+            "screens before bed."
+        )
+    elif f["sleep_hours"] > 9:
+        suggestions.append(
+            "You're sleeping a lot. If this persists, consider discussing with a "
+            "healthcare professional."
+        )
+    if f["stress_level"] >= 4:
+        suggestions.append(
+            "High stress reported. Try short breathing exercises, brief walks, or journaling."
+        )
+    if f["thoughts_risk"]:
+        risk_flag = True
+        suggestions.append(
+            "If you feel unsafe or at risk of harming yourself, seek immediate help: "
+            "local emergency services or a crisis hotline in your country."
+        )
+    if not suggestions:
+        suggestions.append(
+            "You're doing many things right. Keep monitoring your well-being and maintain "
+            "supportive routines."
+        )
+    if f["phq9_suicidal"]:
+        risk_flag = True
+        suggestions.insert(
+            0,
+            "You reported some thoughts of self-harm or that you'd be better off dead. "
+            "Please seek immediate help or contact a crisis hotline.",
+        )
+    if f["exercise_days"] < 2:
+        suggestions.append("Consider adding 10–15 minute walks on 2+ days each week.")
+    if f["caffeine_cups"] > 3:
+        suggestions.append(
+            "High caffeine can impact anxiety and sleep; consider reducing gradually."
+        )
+    if f["screen_hours"] > 6:
+        suggestions.append("Try short breaks and evening screen curfews to aid sleep and mood.")
+    if f["support_level"] <= 2:
+        suggestions.append("Think about one person you could check in with this week.")
+    return suggestions, risk_flag
+
+
+FIELDS = [
+    {
+        "mood": mood,
+        "sleep_hours": sleep,
+        "stress_level": stress,
+        "thoughts_risk": risk,
+        "phq9_suicidal": suicidal,
+        "exercise_days": exercise,
+        "caffeine_cups": 2,
+        "screen_hours": 7.5,
+        "support_level": 4,
+    }
+    for mood, sleep, stress, risk, suicidal, exercise in itertools.product(
+        ("very low", "neutral"),
+        (5.0, 7.5, 10.0),
+        (2, 5),
+        (False, True),
+        (False, True),
+        (0, 3),
+    )
+]
+
+for _f in FIELDS:
+    _outcome = evaluate(_f)
+    assert legacy_suggestions(_f) == (list(_outcome.texts), _outcome.risk_flag), _f
+
+
+def _legacy():
+    for f in FIELDS:
+        legacy_suggestions(f)
+
+
+def _engine():
+    for f in FIELDS:
+        evaluate(f)
+
+
+CASES = [
+    Case("rules: inline if-chain", _legacy, items=len(FIELDS), unit="evals"),
+    Case("rules: engine", _engine, items=len(FIELDS), unit="evals"),
+]
+
+
+def main():
+    run(CASES, baseline="rules: inline if-chain")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,41 @@
+"""Rows per second of the single-row vs. batch PHQ-9/GAD-7 scorers."""
+
+import numpy as np
+
+from app.utils import score_gad7, score_gad7_batch, score_phq9, score_phq9_batch
+from benchmarks.harness import Case, run
+
+ROWS = 10_000
+
+_rng = np.random.default_rng(0)
+PHQ9 = _rng.integers(0, 4, size=(ROWS, 9), dtype=np.int8)
+GAD7 = _rng.integers(0, 4, size=(ROWS, 7), dtype=np.int8)
+PHQ9_ROWS = PHQ9.tolist()
+GAD7_ROWS = GAD7.tolist()
+
+
+def _phq9_loop():
+    for row in PHQ9_ROWS:
+        score_phq9(row)
+
+
+def _gad7_loop():
+    for row in GAD7_ROWS:
+        score_gad7(row)
+
+
+CASES = [
+    Case("score_phq9 (loop)", _phq9_loop, items=ROWS, unit="rows"),
+    Case("score_phq9_batch", lambda: score_phq9_batch(PHQ9), items=ROWS, unit="rows"),
+    Case("score_gad7 (loop)", _gad7_loop, items=ROWS, unit="rows"),
+    Case("score_gad7_batch", lambda: score_gad7_batch(GAD7), items=ROWS, unit="rows"),
+]
+
+
+def main():
+    run(CASES[:2], baseline="score_phq9 (loop)")
+    run(CASES[2:], baseline="score_gad7 (loop)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""Cost of notes analysis as the risk lexicon grows from 4 terms to thousands.
+
+The naive baseline is the old per-term substring search; the analyzer should
+stay flat while the baseline grows linearly with the lexicon.
+"""
+
+import random
+import string
+
+from app.text import TextAnalyzer
+from benchmarks.harness import Case, run
+
+NOTES = (
+    "Work has been busy this week and I have not slept well. My sister Anna called "
+    "on Sunday, you can reach me at someone@example.org or 555-201-9988 if needed. "
+    "Some days I feel fine, other days everything seems heavy and I keep replaying "
+    "conversations in my head. I'd like to get back to running in the mornings and "
+    "cook more at home instead of ordering food late at night. "
+) * 2
+
+_rng = random.Random(0)
+
+
+def _lexicon(size):
+    base = ["hopeless", "harm", "suicide", "worthless"]
+    while len(base) < size:
+        words = "".join(_rng.choices(string.ascii_lowercase, k=_rng.randint(5, 10)))
+        if _rng.random() < 0.3:
+            words += " " + "".join(_rng.choices(string.ascii_lowercase, k=6))
+        base.append(words)
+    return base
+
+
+def _naive(terms):
+    def scan():
+        lowered = NOTES.lower()
+        any(term in lowered for term in terms)
+        return NOTES[:500]
+
+    return scan
+
+
+CASES = []
+for size in (4, 100, 1000, 5000):
+    terms = _lexicon(size)
+    analyzer = TextAnalyzer(terms)
+    CASES.append(Case(f"substring scan, {size} terms", _naive(terms), unit="notes"))
+    CASES.append(
+        Case(
+            f"analyzer, {size} terms",
+            lambda a=analyzer: a.analyze(NOTES, names=("Anna",)),
+            unit="notes",
+        )
+    )
+
+
+def main():
+    run(CASES)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""Tiny timing harness shared by the benchmark scripts in this directory.
+
+Each ``bench_*`` module exposes a ``CASES`` list of :class:`Case` objects and
+can be run on its own, e.g. ``python -m benchmarks.bench_scoring``, or all
+together against a stored baseline with ``python -m benchmarks.run``.
+"""
+
+import json
+import time
+from dataclasses import asdict, dataclass
+from typing import Callable, Dict, List, Optional
+
+
+@dataclass
+class Case:
+    name: str
+    func: Callable[[], object]
+    # Work items processed per call (rows, evaluations, requests, ...)
+    items: int = 1
+    unit: str = "ops"
+
+
+@dataclass
+class Result:
+    name: str
+    seconds_per_call: float
+    items_per_sec: float
+    unit: str
+
+
+def measure(case: Case, min_time: float = 0.2, repeat: int = 5) -> Result:
+    """Time ``case.func`` and return the best of ``repeat`` runs.
+
+    The call count per run is grown until a run takes at least ``min_time``
+    seconds, so fast and slow cases get comparable precision.
+    """
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            case.func()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time or number >= 1 << 20:
+            break
+        number *= 2
+
+    best = elapsed / number
+    for _ in range(repeat - 1):
+        start = time.perf_counter()
+        for _ in range(number):
+            case.func()
+        best = min(best, (time.perf_counter() - start) / number)
+    return Result(case.name, best, case.items / best if best else float("inf"), case.unit)
+
+
+def report(results: List[Result], baseline: Optional[str] = None) -> None:
+    """Print results as a table; ``baseline`` names the case to compare against."""
+    base = next((r for r in results if r.name == baseline), None)
+    width = max(len(r.name) for r in results)
+    for r in results:
+        line = f"{r.name:<{width}}  {r.seconds_per_call * 1e6:12.2f} us/call  "
+        line += f"{r.items_per_sec:14,.0f} {r.unit}/s"
+        if base is not None and r is not base:
+            line += f"  x{r.items_per_sec / base.items_per_sec:.1f}"
+        print(line)
+
+
+def run(cases: List[Case], baseline: Optional[str] = None) -> List[Result]:
+    results = [measure(c) for c in cases]
+    report(results, baseline)
+    return results
+
+
+def calibrate() -> float:
+    """Loops per second of a fixed pure-Python workload on this machine.
+
+    Stored with every result set so runs on different hardware can be
+    compared after scaling by the calibration ratio.
+    """
+    def loop():
+        total = 0
+        for i in range(10_000):
+            total += i % 7
+        return total
+
+    return measure(Case("calibration", loop)).items_per_sec
+
+
+def save(results: List[Result], path: str, calibration: float) -> None:
+    data = {"calibration": calibration, "results": [asdict(r) for r in results]}
+    with open(path, "w", encoding="utf-8") as fh:
+        json.dump(data, fh, indent=2, sort_keys=True)
+        fh.write("\n")
+
+
+def load(path: str) -> Dict[str, object]:
+    with open(path, encoding="utf-8") as fh:
+        return json.load(fh)
+
+
+def compare(
+    results: List[Result], baseline: Dict[str, object], calibration: float, threshold: float
+) -> List[str]:
+    """Cases whose throughput fell more than ``threshold`` (0.2 = 20%) below baseline.
+
+    Baseline throughputs are scaled by ``calibration / baseline["calibration"]``
+    first. Cases missing from the baseline are reported but never fail.
+    """
+    scale = calibration / baseline["calibration"]
+    expected = {r["name"]: r["items_per_sec"] * scale for r in baseline["results"]}
+    width = max(len(r.name) for r in results)
+    regressions = []
+    for r in results:
+        base = expected.get(r.name)
+        if base is None:
+            print(f"{r.name:<{width}}  (new case, no baseline)")
+            continue
+        change = r.items_per_sec / base - 1
+        flag = ""
+        if change < -threshold:
+            flag = "  REGRESSION"
+            regressions.append(r.name)
+        print(f"{r.name:<{width}}  {change:+8.1%}{flag}")
+    return regressions
@@ -0,0 +1,82 @@
+"""Run every benchmark suite and compare with the stored baseline.
+
+    python -m benchmarks.run                   # compare with baseline.json
+    python -m benchmarks.run --save            # record a new baseline
+    python -m benchmarks.run --threshold 0.6 bench_scoring
+
+Compare mode exits with status 1 when a case's throughput drops more than
+``--threshold`` below the baseline, after scaling the baseline by the
+machine calibration ratio (see ``harness.calibrate``). Regressed cases are
+measured again (``--retries``) before failing, as timings are noisy on shared
+runners; keep the threshold well above run-to-run variance, which reaches
+about 35% on a shared machine.
+"""
+
+import argparse
+import importlib
+import os
+import sys
+from typing import List, Optional
+
+from benchmarks.harness import calibrate, compare, load, measure, report, save
+
+SUITES = ("bench_scoring", "bench_rules", "bench_text", "bench_app", "bench_analytics")
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("suites", nargs="*", default=SUITES, help="suites to run")
+    parser.add_argument("--baseline", default=BASELINE, help="baseline JSON file")
+    parser.add_argument("--save", action="store_true", help="write results as the baseline")
+    parser.add_argument(
+        "--threshold", type=float, default=0.5, help="allowed throughput drop (0.5 = 50%%)"
+    )
+    parser.add_argument(
+        "--retries", type=int, default=2, help="re-measurements of a regressed case"
+    )
+    args = parser.parse_args(argv)
+
+    cases = {}
+    results = []
+    for suite in args.suites:
+        module = importlib.import_module(f"benchmarks.{suite}")
+        print(f"== {suite}")
+        suite_results = [measure(case) for case in module.CASES]
+        report(suite_results)
+        results.extend(suite_results)
+        cases.update((case.name, case) for case in module.CASES)
+    calibration = calibrate()
+
+    if args.save:
+        save(results, args.baseline, calibration)
+        print(f"Baseline written to {args.baseline}")
+        return 0
+    if not os.path.exists(args.baseline):
+        print(f"No baseline at {args.baseline}; run with --save first", file=sys.stderr)
+        return 2
+
+    baseline = load(args.baseline)
+    print(f"== change vs. {args.baseline}")
+    regressions = compare(results, baseline, calibration, args.threshold)
+    # a slow run is often a noisy neighbour: measure again, keep the best
+    best = {r.name: r for r in results}
+    for attempt in range(args.retries):
+        if not regressions:
+            break
+        print(f"== re-measuring {len(regressions)} case(s), attempt {attempt + 1}")
+        for name in regressions:
+            again = measure(cases[name])
+            if again.items_per_sec > best[name].items_per_sec:
+                best[name] = again
+        regressions = compare(
+            [best[name] for name in regressions], baseline, calibration, args.threshold
+        )
+    if regressions:
+        print(f"{len(regressions)} case(s) regressed past {args.threshold:.0%}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -44,6 +44,8 @@ SECRET_KEY=$(openssl rand -hex 32)
 RATELIMIT_STORAGE_URI=redis://localhost:6379/0
 LOG_LEVEL=INFO
 LOG_RETENTION_DAYS=30
+# app.log is rotated by the logrotate rule below
+LOG_MAX_BYTES=0
 RATELIMIT_DEFAULT=100/day
 EOL
 
@@ -87,6 +89,17 @@ sudo tee /etc/logrotate.d/mental-health << EOL
         /usr/bin/supervisorctl restart mental-health > /dev/null
     endscript
 }
+
+# gunicorn workers reopen app.log when it is replaced, so no restart is needed
+/var/www/mental-health/current/instance/logs/app.log {
+    daily
+    rotate 30
+    compress
+    delaycompress
+    missingok
+    notifempty
+    create 0640 www-data adm
+}
 EOL
 
 # Set up monitoring (basic)
@@ -0,0 +1,67 @@
+"""gunicorn settings for the ``web`` process (Procfile, supervisor).
+
+The app is loaded once in the master (``preload_app``) and warmed up there:
+templates compiled, cached pages rendered, lookup tables built. Workers are
+forked from it and share that memory copy-on-write, so a new worker serves
+its first request at full speed. Set ``GUNICORN_PRELOAD=false`` to load the
+app in each worker instead; it is then warmed up per worker.
+"""
+
+import os
+import random
+
+_TRUE = ("1", "true", "yes")
+
+bind = f"0.0.0.0:{os.getenv('PORT', '8080')}"
+workers = int(os.getenv("WEB_CONCURRENCY", "4"))
+worker_class = os.getenv("GUNICORN_WORKER_CLASS", "gevent")
+preload_app = os.getenv("GUNICORN_PRELOAD", "true").lower() in _TRUE
+wsgi_app = "wsgi:app"
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "60"))
+graceful_timeout = int(os.getenv("GUNICORN_GRACEFUL_TIMEOUT", "30"))
+keepalive = 5
+
+if worker_class == "gevent" and preload_app:
+    # Patch before the app is imported in the master: locks created at import
+    # time must be gevent-aware in the workers, or a greenlet waiting on one
+    # blocks every other greenlet of its worker.
+    from gevent import monkey
+
+    monkey.patch_all()
+
+
+def _warm_up(app) -> None:
+    from app.startup import warm_up
+
+    warm_up(app)
+
+
+def on_starting(server):
+    # samples of the previous run's workers would be summed with the new ones
+    directory = os.getenv("PROMETHEUS_MULTIPROC_DIR")
+    if directory and os.path.isdir(directory):
+        for name in os.listdir(directory):
+            if name.endswith(".db"):
+                os.remove(os.path.join(directory, name))
+
+
+def when_ready(server):
+    if preload_app:
+        _warm_up(server.app.wsgi())
+
+
+def post_fork(server, worker):
+    # forked workers inherit the master's random state; without a reseed they
+    # would all draw the same retry jitter
+    random.seed()
+
+
+def post_worker_init(worker):
+    if not preload_app:
+        _warm_up(worker.wsgi)
+
+
+def child_exit(server, worker):
+    from app.monitoring import mark_process_dead
+
+    mark_process_dead(worker.pid)
@@ -0,0 +1 @@
+"""Load testing against a local stand-in for the OpenAI API (see loadtest.run)."""
@@ -0,0 +1,182 @@
+"""A local stand-in for the OpenAI API, for load tests of the AI path.
+
+Serves ``POST /v1/chat/completions`` and ``GET /v1/models`` with a configurable
+latency distribution, error rate and rate of requests that never answer
+within the client's timeout. Point the app at it with
+``OPENAI_BASE_URL=http://127.0.0.1:<port>/v1``; the SDK reads that variable.
+
+    python -m loadtest.fake_openai --port 8901 --latency lognormal:0.8:0.5 --error-rate 0.05
+"""
+
+import argparse
+import json
+import math
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, Sequence
+
+FEEDBACK = (
+    "Thanks for checking in. A short walk and a regular bedtime this week could help; "
+    "consider talking to someone you trust about how you feel."
+)
+
+
+def latency_sampler(spec: str, rng: random.Random) -> Callable[[], float]:
+    """Seconds-per-request sampler for ``spec``.
+
+    ``fixed:S``, ``uniform:LOW:HIGH``, ``exp:MEAN`` or ``lognormal:MEDIAN:SIGMA``.
+    """
+    kind, _, args = spec.partition(":")
+    try:
+        params = [float(a) for a in args.split(":")] if args else []
+        if kind == "fixed" and len(params) == 1:
+            return lambda: params[0]
+        if kind == "uniform" and len(params) == 2:
+            return lambda: rng.uniform(params[0], params[1])
+        if kind == "exp" and len(params) == 1:
+            return lambda: rng.expovariate(1 / params[0]) if params[0] > 0 else 0.0
+        if kind == "lognormal" and len(params) == 2:
+            mu = math.log(params[0])
+            return lambda: rng.lognormvariate(mu, params[1])
+    except ValueError:
+        pass
+    raise ValueError(f"Bad latency spec {spec!r}")
+
+
+class FakeOpenAI(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(
+        self,
+        address,
+        latency: str = "fixed:0.5",
+        error_rate: float = 0.0,
+        error_statuses: Sequence[int] = (500, 429, 503),
+        hang_rate: float = 0.0,
+        hang_sec: float = 60.0,
+        seed: int = 0,
+    ):
+        super().__init__(address, _Handler)
+        self.rng = random.Random(seed)
+        self.latency = latency_sampler(latency, self.rng)
+        self.error_rate = error_rate
+        self.error_statuses = tuple(error_statuses)
+        self.hang_rate = hang_rate
+        self.hang_sec = hang_sec
+        self.counts: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def count(self, outcome: str) -> None:
+        with self._lock:
+            self.counts[outcome] = self.counts.get(outcome, 0) + 1
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server: FakeOpenAI
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):  # noqa: A002 - base class signature
+        pass
+
+    def _send(self, status: int, payload: Dict) -> None:
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path.rstrip("/") != "/v1/models":
+            return self._send(404, {"error": {"message": "Not found"}})
+        self.server.count("models")
+        model = {"id": "gpt-4o-mini", "object": "model", "created": 0, "owned_by": "stub"}
+        self._send(200, {"object": "list", "data": [model]})
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        request = json.loads(self.rfile.read(length) or b"{}")
+        if self.path.rstrip("/") != "/v1/chat/completions":
+            return self._send(404, {"error": {"message": "Not found"}})
+
+        server = self.server
+        with server._lock:
+            roll = server.rng.random()
+            delay = server.latency()
+            status = server.rng.choice(server.error_statuses)
+        if roll < server.hang_rate:
+            server.count("hang")
+            time.sleep(server.hang_sec)
+            return self._send(504, {"error": {"message": "Upstream timeout"}})
+        time.sleep(delay)
+        if roll < server.hang_rate + server.error_rate:
+            server.count(f"error_{status}")
+            return self._send(status, {"error": {"message": "Injected failure", "code": status}})
+
+        server.count("ok")
+        self._send(
+            200,
+            {
+                "id": "chatcmpl-stub",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": request.get("model", "gpt-4o-mini"),
+                "choices": [
+                    {
+                        "index": 0,
+                        "message": {"role": "assistant", "content": FEEDBACK},
+                        "finish_reason": "stop",
+                    }
+                ],
+                "usage": {"prompt_tokens": 150, "completion_tokens": 40, "total_tokens": 190},
+            },
+        )
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--latency",
+        default="lognormal:0.8:0.5",
+        help="fixed:S, uniform:LOW:HIGH, exp:MEAN or lognormal:MEDIAN:SIGMA (seconds)",
+    )
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of failed calls")
+    parser.add_argument(
+        "--error-statuses", default="500,429,503", help="statuses of failed calls"
+    )
+    parser.add_argument(
+        "--hang-rate", type=float, default=0.0, help="share of calls that outlast the timeout"
+    )
+
+
+def from_arguments(args: argparse.Namespace, port: int = 0) -> FakeOpenAI:
+    return FakeOpenAI(
+        ("127.0.0.1", port),
+        latency=args.latency,
+        error_rate=args.error_rate,
+        error_statuses=[int(s) for s in args.error_statuses.split(",")],
+        hang_rate=args.hang_rate,
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Local stand-in for the OpenAI API")
+    parser.add_argument("--port", type=int, default=8901)
+    add_arguments(parser)
+    args = parser.parse_args()
+    server = from_arguments(args, args.port)
+    print(f"Fake OpenAI API at {server.base_url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
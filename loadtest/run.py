@@ -0,0 +1,324 @@
+"""End-to-end load test of the app under gunicorn with a fake OpenAI API.
+
+Starts ``loadtest.fake_openai`` in process and the app with the ``web``
+command of the Procfile (gunicorn + gevent), then runs ``--users`` virtual
+users for ``--duration`` seconds. Each user loads the page, fetches a CSRF
+token and posts a weighted mix of valid, invalid and AI-enabled check-ins,
+polling the deferred AI feedback of the latter. Prints throughput, status
+codes and latency percentiles per request kind.
+
+    python -m loadtest.run --users 50 --duration 60 --latency lognormal:1.2:0.6 \\
+        --error-rate 0.05 --mix valid=6,invalid=2,ai=2
+
+The app's rate limits are lifted for the run unless ``--keep-limits`` is given;
+``--target`` load-tests an already running server instead.
+"""
+
+import argparse
+import gzip
+import http.client
+import json
+import math
+import os
+import random
+import re
+import shlex
+import signal
+import socket
+import subprocess
+import sys
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlencode, urlparse
+
+from loadtest import fake_openai
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+_JOB_URL_RE = re.compile(rb'data-job-url="([^"]+)"')
+_TOKEN_RE = re.compile(rb'"csrf_token"\s*:\s*"([^"]+)"')
+MOODS = ("very low", "low", "neutral", "good", "very good")
+
+
+def random_form(rng: random.Random, kind: str) -> Dict[str, str]:
+    """A check-in as a browser would post it; ``kind`` is valid, invalid or ai."""
+    form = {
+        "name": rng.choice(("Sam", "Alex", "Jordan", "Riley", "Casey")),
+        "age": str(rng.randint(16, 80)),
+        "mood": rng.choice(MOODS),
+        "sleep": str(rng.choice((4, 5.5, 6, 7, 7.5, 8, 9, 10))),
+        "stress": str(rng.randint(1, 5)),
+        "thoughts": rng.choice(("", "Busy week at work.", "Feeling a bit flat lately.")),
+        "exercise_days": str(rng.randint(0, 7)),
+        "caffeine_cups": str(rng.randint(0, 6)),
+        "screen_hours": str(rng.randint(1, 12)),
+        "support_level": str(rng.randint(1, 5)),
+    }
+    form.update({f"phq9_{i}": str(rng.randint(0, 3)) for i in range(1, 10)})
+    form.update({f"gad7_{i}": str(rng.randint(0, 3)) for i in range(1, 8)})
+    if kind == "invalid":
+        field = rng.choice(("name", "age", "sleep", "phq9_3", "mood"))
+        form[field] = {"name": "", "age": "-4", "sleep": "30", "phq9_3": "7"}.get(field, "meh")
+    elif kind == "ai":
+        form["use_ai"] = "on"
+    return form
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an ascending list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(pct / 100 * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+class Recorder:
+    def __init__(self):
+        self.samples: Dict[str, List[Tuple[int, float]]] = {}
+        # what the AI-enabled posts got: no job, feedback, no feedback, ...
+        self.ai_outcomes: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def ai_outcome(self, outcome: str) -> None:
+        with self._lock:
+            self.ai_outcomes[outcome] = self.ai_outcomes.get(outcome, 0) + 1
+
+    def add(self, kind: str, status: int, seconds: float) -> None:
+        with self._lock:
+            self.samples.setdefault(kind, []).append((status, seconds))
+
+    def summary(self, duration: float) -> Dict[str, Dict[str, object]]:
+        out = {}
+        for kind, samples in sorted(self.samples.items()):
+            latencies = sorted(s for _, s in samples)
+            statuses: Dict[str, int] = {}
+            for status, _ in samples:
+                statuses[str(status)] = statuses.get(str(status), 0) + 1
+            out[kind] = {
+                "count": len(samples),
+                "rps": len(samples) / duration,
+                "statuses": statuses,
+                **{f"p{p}_ms": percentile(latencies, p) * 1000 for p in (50, 90, 95, 99)},
+                "max_ms": latencies[-1] * 1000,
+            }
+        return out
+
+
+def print_report(summary: Dict[str, Dict[str, object]]) -> None:
+    width = max([len(k) for k in summary] + [4])
+    print(
+        f"{'kind':<{width}}  {'count':>7} {'req/s':>8} {'p50 ms':>8} {'p90 ms':>8} "
+        f"{'p99 ms':>8} {'max ms':>8}  statuses"
+    )
+    for kind, row in summary.items():
+        statuses = " ".join(f"{k}:{v}" for k, v in sorted(row["statuses"].items()))
+        print(
+            f"{kind:<{width}}  {row['count']:>7} {row['rps']:>8.1f} {row['p50_ms']:>8.0f} "
+            f"{row['p90_ms']:>8.0f} {row['p99_ms']:>8.0f} {row['max_ms']:>8.0f}  {statuses}"
+        )
+
+
+class VirtualUser:
+    """One browser: a keep-alive connection, a session cookie and a CSRF token."""
+
+    def __init__(self, target: str, recorder: Recorder, rng: random.Random, timeout: float):
+        url = urlparse(target)
+        self.host, self.port = url.hostname, url.port or 80
+        self.recorder = recorder
+        self.rng = rng
+        self.timeout = timeout
+        self.cookie: Optional[str] = None
+        self.token = ""
+        self.conn: Optional[http.client.HTTPConnection] = None
+
+    def request(
+        self, kind: str, method: str, path: str, body: Optional[Dict[str, str]] = None
+    ) -> Tuple[int, bytes]:
+        headers = {
+            "Accept-Encoding": "gzip",
+            # the app runs behind a TLS-terminating proxy in production
+            "X-Forwarded-Proto": "https",
+        }
+        data = None
+        if body is not None:
+            data = urlencode(body)
+            headers["Content-Type"] = "application/x-www-form-urlencoded"
+            headers["Referer"] = f"https://{self.host}:{self.port}/"
+        if self.cookie:
+            headers["Cookie"] = self.cookie
+        started = time.perf_counter()
+        try:
+            if self.conn is None:
+                self.conn = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+            self.conn.request(method, path, body=data, headers=headers)
+            response = self.conn.getresponse()
+            payload = response.read()
+            status = response.status
+        except (OSError, http.client.HTTPException):
+            self.recorder.add(kind, 0, time.perf_counter() - started)
+            self.conn = None
+            return 0, b""
+        self.recorder.add(kind, status, time.perf_counter() - started)
+        if response.getheader("Content-Encoding") == "gzip":
+            payload = gzip.decompress(payload)
+        cookie = response.getheader("Set-Cookie")
+        if cookie:
+            self.cookie = cookie.split(";", 1)[0]
+        return status, payload
+
+    def start(self) -> None:
+        self.request("GET /", "GET", "/")
+        status, payload = self.request("GET /csrf-token", "GET", "/csrf-token")
+        match = _TOKEN_RE.search(payload) if status == 200 else None
+        self.token = match.group(1).decode() if match else ""
+
+    def step(self, kind: str) -> None:
+        form = random_form(self.rng, kind)
+        form["csrf_token"] = self.token
+        status, payload = self.request(f"POST /analyze {kind}", "POST", "/analyze", form)
+        if kind != "ai" or status != 200:
+            return
+        match = _JOB_URL_RE.search(payload)
+        if match is None:
+            # AI unavailable (breaker open, not configured) or over the AI quota
+            self.recorder.ai_outcome("no job")
+            return
+        # result.html long-polls the same way
+        status, payload = self.request(
+            "GET ai-feedback", "GET", match.group(1).decode() + "?wait=20"
+        )
+        try:
+            job = json.loads(payload) if status == 200 else {}
+        except ValueError:
+            job = {}
+        if job.get("feedback"):
+            self.recorder.ai_outcome("feedback")
+        else:
+            self.recorder.ai_outcome(f"no feedback ({job.get('status', status)})")
+
+
+def run_users(
+    target: str, users: int, duration: float, mix: Dict[str, int], think: float, timeout: float
+) -> Recorder:
+    recorder = Recorder()
+    kinds, weights = zip(*mix.items(), strict=True)
+    deadline = time.monotonic() + duration
+
+    def user(seed: int) -> None:
+        rng = random.Random(seed)
+        vu = VirtualUser(target, recorder, rng, timeout)
+        vu.start()
+        while time.monotonic() < deadline:
+            vu.step(rng.choices(kinds, weights)[0])
+            if think:
+                time.sleep(rng.expovariate(1 / think))
+
+    threads = [threading.Thread(target=user, args=(i,), daemon=True) for i in range(users)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join(duration + timeout + 30)
+    return recorder
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def procfile_command(port: int) -> List[str]:
+    with open(os.path.join(ROOT, "Procfile"), encoding="utf-8") as fh:
+        for line in fh:
+            if line.startswith("web:"):
+                return shlex.split(line[4:].replace("$PORT", str(port)))
+    raise RuntimeError("No web process in the Procfile")
+
+
+def wait_ready(target: str, timeout: float = 30.0) -> None:
+    url = urlparse(target)
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            conn = http.client.HTTPConnection(url.hostname, url.port, timeout=2)
+            conn.request("GET", "/livez", headers={"X-Forwarded-Proto": "https"})
+            if conn.getresponse().status == 200:
+                return
+        except OSError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"{target} did not come up within {timeout:.0f}s")
+
+
+def parse_mix(text: str) -> Dict[str, int]:
+    mix = {}
+    for part in text.split(","):
+        kind, _, weight = part.partition("=")
+        if kind not in ("valid", "invalid", "ai"):
+            raise argparse.ArgumentTypeError(f"Unknown kind {kind!r}")
+        mix[kind] = int(weight or 1)
+    return mix
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--users", type=int, default=20, help="concurrent virtual users")
+    parser.add_argument("--duration", type=float, default=30, help="seconds of load")
+    parser.add_argument(
+        "--mix", type=parse_mix, default="valid=6,invalid=2,ai=2", help="kind=weight,..."
+    )
+    parser.add_argument("--think", type=float, default=0.0, help="mean pause between posts")
+    parser.add_argument("--timeout", type=float, default=30.0, help="client timeout (s)")
+    parser.add_argument("--target", help="load-test this running server instead")
+    parser.add_argument("--keep-limits", action="store_true", help="keep the app's rate limits")
+    parser.add_argument("--json", help="also write the report to this file")
+    fake_openai.add_arguments(parser)
+    args = parser.parse_args(argv)
+
+    fake = fake_openai.from_arguments(args)
+    threading.Thread(target=fake.serve_forever, daemon=True).start()
+
+    server = None
+    target = args.target
+    if target is None:
+        port = _free_port()
+        target = f"http://127.0.0.1:{port}"
+        env = dict(
+            os.environ,
+            PORT=str(port),
+            FLASK_ENV="production",
+            SECRET_KEY=os.environ.get("SECRET_KEY", "loadtest-secret"),
+            OPENAI_API_KEY="sk-loadtest",
+            OPENAI_BASE_URL=fake.base_url,
+        )
+        if not args.keep_limits:
+            env.update(RATELIMIT_DEFAULT="1000000 per minute", AI_RATELIMIT="1000000 per minute")
+        command = procfile_command(port)
+        print(f"Starting: {' '.join(command)}  (AI at {fake.base_url})")
+        server = subprocess.Popen(command, cwd=ROOT, env=env)
+    try:
+        wait_ready(target)
+        print(f"{args.users} users for {args.duration:.0f}s against {target}")
+        started = time.monotonic()
+        recorder = run_users(
+            target, args.users, args.duration, args.mix, args.think, args.timeout
+        )
+        summary = recorder.summary(time.monotonic() - started)
+    finally:
+        if server is not None:
+            server.send_signal(signal.SIGTERM)
+            server.wait(30)
+        fake.shutdown()
+
+    print_report(summary)
+    print(f"AI-enabled posts: {json.dumps(recorder.ai_outcomes, sort_keys=True)}")
+    print(f"fake OpenAI calls: {json.dumps(fake.counts, sort_keys=True)}")
+    if args.json:
+        report = {"requests": summary, "ai_outcomes": recorder.ai_outcomes, "ai_calls": fake.counts}
+        with open(args.json, "w", encoding="utf-8") as fh:
+            json.dump(report, fh, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
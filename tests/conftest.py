@@ -23,3 +23,42 @@ def app():
 @pytest.fixture()
 def client(app):
     return app.test_client()
+
+
+# A complete, valid check-in with every answer at its lowest level
+CHECKIN = {
+    "name": "Sam",
+    "age": 30,
+    "mood": "good",
+    "sleep": 7,
+    "stress": 2,
+    "thoughts": "",
+    "exercise_days": 3,
+    "caffeine_cups": 1,
+    "screen_hours": 4,
+    "support_level": 4,
+    **{f"phq9_{i}": 0 for i in range(1, 10)},
+    **{f"gad7_{i}": 0 for i in range(1, 8)},
+}
+
+
+@pytest.fixture()
+def valid_form():
+    """Build ``CHECKIN`` as posted by the form (string values), with overrides."""
+
+    def build(**overrides):
+        data = {key: str(value) for key, value in CHECKIN.items()}
+        data.update(overrides)
+        return data
+
+    return build
+
+
+@pytest.fixture()
+def valid_record():
+    """Build ``CHECKIN`` as a JSON record for the batch API and score-file, with overrides."""
+
+    def build(**overrides):
+        return {**CHECKIN, **overrides}
+
+    return build
@@ -0,0 +1,268 @@
+import pytest
+
+from app import ai
+from app.breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker
+from app.cache import TTLCache
+
+
+def _summary(**overrides):
+    summary = {
+        "name": "Sam",
+        "age": 30,
+        "mood": "good",
+        "sleep_hours": 7.0,
+        "stress_level": 2,
+        "thoughts": "Doing fine",
+        "phq9_score": 3,
+        "phq9_level": "Minimal",
+        "gad7_score": 2,
+        "gad7_level": "Minimal",
+        "suggestions": ["Keep going."],
+    }
+    summary.update(overrides)
+    return summary
+
+
+def _wait_for(condition, timeout=5.0):
+    import time
+
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.001)
+
+
+@pytest.fixture()
+def provider(monkeypatch):
+    """Count provider calls instead of reaching the network."""
+    calls = []
+
+    def fake_call(api_key, model, sanitized, deadline=None):
+        calls.append(sanitized)
+        return f"answer {len(calls)}"
+
+    monkeypatch.setenv("OPENAI_API_KEY", "sk-test")
+    monkeypatch.setattr(ai, "_call_provider", fake_call)
+    monkeypatch.setattr(ai, "_cache", TTLCache(maxsize=8, ttl=60))
+    monkeypatch.setattr(ai, "_breaker", CircuitBreaker())
+    return calls
+
+
+def test_cache_key_covers_whole_payload():
+    base = ai._sanitize_summary(_summary())
+    assert ai._cache_key(base) == ai._cache_key(dict(reversed(list(base.items()))))
+    for change in ({"thoughts": "Rough week"}, {"sleep_hours": 4.0}, {"stress_level": 5}):
+        assert ai._cache_key(ai._sanitize_summary(_summary(**change))) != ai._cache_key(base)
+    assert ai._cache_key(base, "gpt-4o") != ai._cache_key(base, "gpt-4o-mini")
+
+
+def test_repeat_submission_hits_cache(provider):
+    assert ai.generate_ai_feedback(_summary()) == "answer 1"
+    assert ai.generate_ai_feedback(_summary()) == "answer 1"
+    assert ai.generate_ai_feedback(_summary(stress_level=4)) == "answer 2"
+    assert len(provider) == 2
+    stats = ai.cache_stats()
+    assert (stats["hits"], stats["misses"]) == (1, 2)
+
+
+def test_failed_calls_are_not_cached(provider, monkeypatch):
+    monkeypatch.setattr(ai, "_call_provider", lambda *a: None)
+    assert ai.generate_ai_feedback(_summary()) is None
+    assert len(ai._cache) == 0
+
+
+def test_ttl_cache_expiry_and_lru_eviction():
+    now = [0.0]
+    cache = TTLCache(maxsize=2, ttl=10, timer=lambda: now[0])
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1  # "b" is now least recently used
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.evictions == 1
+
+    now[0] = 11
+    assert cache.get("a") is None
+    assert cache.expirations == 1
+    assert cache.stats()["hits"] == 1
+
+
+def test_client_is_shared_and_honors_timeout(monkeypatch):
+    monkeypatch.setattr(ai, "_client", None)
+    monkeypatch.setitem(ai._settings, "timeout", 3.5)
+    client = ai._get_client("sk-test")
+    assert ai._get_client("sk-test") is client
+    assert client.timeout == 3.5
+    assert client.max_retries == 0
+    assert ai._get_client("sk-other") is not client
+
+
+def test_provider_call_retries_transient_errors(monkeypatch):
+    class FakeCompletions:
+        def __init__(self):
+            self.calls = 0
+
+        def create(self, **kwargs):
+            self.calls += 1
+            if self.calls < 3:
+                raise ConnectionError("reset by peer")
+            message = type("M", (), {"content": " ok "})
+            return type("R", (), {"choices": [type("C", (), {"message": message})]})
+
+    completions = FakeCompletions()
+    fake_client = type("Client", (), {"chat": type("Chat", (), {"completions": completions})})
+    sleeps = []
+    monkeypatch.setattr(ai, "_get_client", lambda api_key: fake_client)
+    monkeypatch.setattr(ai, "_is_retryable", lambda exc: isinstance(exc, ConnectionError))
+    monkeypatch.setattr(ai.time, "sleep", sleeps.append)
+    monkeypatch.setattr(ai, "_breaker", CircuitBreaker(min_calls=100))
+
+    monkeypatch.setitem(ai._settings, "max_retries", 2)
+    assert ai._call_provider("sk-test", "m", {}) == "ok"
+    assert completions.calls == 3
+    assert len(sleeps) == 2 and all(0 <= s <= ai._BACKOFF_CAP for s in sleeps)
+
+    completions.calls = 0
+    monkeypatch.setitem(ai._settings, "max_retries", 1)
+    assert ai._call_provider("sk-test", "m", {}) is None
+    assert completions.calls == 2
+
+
+def test_concurrent_identical_requests_share_one_call(provider, monkeypatch):
+    import threading
+
+    from app.cache import SingleFlight
+
+    started = threading.Event()
+    release = threading.Event()
+
+    def slow_call(api_key, model, sanitized, deadline=None):
+        provider.append(sanitized)
+        started.set()
+        release.wait(5)
+        return "shared answer"
+
+    monkeypatch.setattr(ai, "_call_provider", slow_call)
+    monkeypatch.setattr(ai, "_inflight", SingleFlight())
+
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(ai.generate_ai_feedback(_summary())))
+        for _ in range(4)
+    ]
+    threads[0].start()
+    started.wait(5)
+    for t in threads[1:]:
+        t.start()
+    _wait_for(lambda: ai.inflight_stats()["coalesced"] == 3)
+    release.set()
+    for t in threads:
+        t.join(5)
+
+    assert results == ["shared answer"] * 4
+    assert len(provider) == 1
+    assert ai.inflight_stats() == {"in_flight": 0, "coalesced": 3}
+
+
+def test_single_flight_shares_failures():
+    import threading
+
+    from app.cache import SingleFlight
+
+    flight = SingleFlight()
+    release = threading.Event()
+    errors = []
+
+    def failing():
+        release.wait(5)
+        raise RuntimeError("provider down")
+
+    def call():
+        try:
+            flight.do("k", failing)
+        except RuntimeError as exc:
+            errors.append(exc)
+
+    threads = [threading.Thread(target=call) for _ in range(3)]
+    for t in threads:
+        t.start()
+    _wait_for(lambda: flight.stats()["coalesced"] == 2)
+    release.set()
+    for t in threads:
+        t.join(5)
+    assert len(errors) == 3 and len({id(e) for e in errors}) == 1
+
+
+def test_breaker_opens_on_failures_and_recovers_through_probe():
+    now = [0.0]
+    breaker = CircuitBreaker(min_calls=4, failure_rate=0.5, open_seconds=30, timer=lambda: now[0])
+    for ok in (True, False, True):
+        assert breaker.allow()
+        breaker.record(ok, 0.1)
+    assert breaker.state == CLOSED
+    breaker.allow()
+    breaker.record(False, 0.1)  # 2 of 4 failed
+    assert breaker.state == OPEN
+    assert not breaker.allow()
+    assert breaker.snapshot()["rejected_count"] == 1
+
+    now[0] = 31
+    assert breaker.state == HALF_OPEN
+    assert breaker.allow()
+    assert not breaker.allow()  # only one probe at a time
+    breaker.record(False, 0.1)
+    assert breaker.state == OPEN
+
+    now[0] = 62
+    assert breaker.allow()
+    breaker.record(True, 0.1)
+    assert breaker.state == CLOSED
+
+
+def test_breaker_opens_on_slow_calls():
+    breaker = CircuitBreaker(min_calls=3, slow_call=2.0, slow_rate=0.6)
+    for duration in (2.5, 0.1, 3.0):
+        breaker.allow()
+        breaker.record(True, duration)
+    assert breaker.state == OPEN
+
+
+def test_open_breaker_skips_provider(monkeypatch):
+    breaker = CircuitBreaker(min_calls=1)
+    breaker.record(False, 0.1)
+    monkeypatch.setenv("OPENAI_API_KEY", "sk-test")
+    monkeypatch.setattr(ai, "_cache", TTLCache(maxsize=8, ttl=60))
+    monkeypatch.setattr(ai, "_breaker", breaker)
+    monkeypatch.setattr(ai, "_get_client", lambda api_key: pytest.fail("provider called"))
+    assert not ai.ai_available()
+    assert ai.generate_ai_feedback(_summary()) is None
+    assert ai.breaker_state()["state"] == OPEN
+
+
+def test_provider_call_respects_latency_budget(monkeypatch):
+    import time
+
+    monkeypatch.setattr(ai, "_breaker", CircuitBreaker(min_calls=100))
+    monkeypatch.setattr(ai, "_get_client", lambda api_key: pytest.fail("budget already spent"))
+    assert ai._call_provider("sk-test", "m", {}, deadline=time.monotonic() + 0.1) is None
+
+
+def test_probe_interrupted_by_base_exception_is_released(monkeypatch):
+    class Interrupted(BaseException):
+        pass
+
+    def interrupted(api_key):
+        raise Interrupted()
+
+    now = [0.0]
+    breaker = CircuitBreaker(min_calls=1, open_seconds=30, timer=lambda: now[0])
+    breaker.record(False, 0.1)
+    now[0] = 31
+    monkeypatch.setattr(ai, "_breaker", breaker)
+    monkeypatch.setattr(ai, "_get_client", interrupted)
+    with pytest.raises(Interrupted):
+        ai._call_provider("sk-test", "model", {})
+    # the probe counted as a failure instead of staying in flight forever
+    assert breaker.state == OPEN
+    now[0] = 62
+    assert breaker.allow()
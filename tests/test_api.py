@@ -0,0 +1,66 @@
+import io
+import json
+
+
+def _lines(res):
+    return [json.loads(line) for line in res.data.decode().splitlines()]
+
+
+def test_batch_json_array_with_bad_record(client, valid_record):
+    body = [valid_record(id="a"), valid_record(id="b", age="abc"), valid_record(id="c", phq9_9=2)]
+    res = client.post("/api/v1/analyze/batch", json=body)
+    assert res.status_code == 200
+    assert res.mimetype == "application/x-ndjson"
+    lines = _lines(res)
+    assert [line["id"] for line in lines] == ["a", "b", "c"]
+    assert lines[0]["ok"] is True
+    assert lines[0]["summary"]["phq9_level"] == "Minimal"
+    assert lines[1]["ok"] is False
+    assert lines[1]["errors"]["age"] == "Age must be a number."
+    assert lines[2]["summary"]["risk_flag"] is True
+
+
+def test_batch_ndjson_invalid_line(client, valid_record):
+    body = "\n".join(
+        [json.dumps(valid_record()), "{not json", "", json.dumps(valid_record(mood="low"))]
+    )
+    res = client.post(
+        "/api/v1/analyze/batch", data=body, content_type="application/x-ndjson"
+    )
+    lines = _lines(res)
+    assert [line["ok"] for line in lines] == [True, False, True]
+    assert lines[1]["errors"] == {"_record": "Invalid JSON"}
+    assert lines[2]["index"] == 2
+
+
+def test_batch_rejects_non_json_body(client):
+    res = client.post("/api/v1/analyze/batch", data="hello", content_type="application/json")
+    assert _lines(res) == [{"ok": False, "error": "Body must be a JSON array or NDJSON"}]
+
+
+def test_iter_records_across_chunk_boundaries(monkeypatch):
+    from app import api
+
+    monkeypatch.setattr(api, "_CHUNK_SIZE", 3)
+    records = [{"n": 12345, "s": "é ü"}, [1, 2], 678]
+    body = json.dumps(records, ensure_ascii=False).encode()
+    assert list(api.iter_records(io.BytesIO(body), "application/json")) == records
+
+
+def test_batch_number_normalisation(client, valid_record):
+    body = (
+        "["
+        + ",".join(
+            [
+                json.dumps(valid_record(age=25.0, stress=2.0)),
+                json.dumps(valid_record(sleep=float("nan"))),
+                json.dumps(valid_record(screen_hours=float("inf"))),
+            ]
+        )
+        + "]"
+    )
+    res = client.post("/api/v1/analyze/batch", data=body, content_type="application/json")
+    lines = _lines(res)
+    assert lines[0]["ok"] is True and lines[0]["summary"]["age"] == 25
+    assert lines[1]["errors"] == {"sleep": "Sleep must be a number."}
+    assert lines[2]["errors"] == {"screen_hours": "Required"}
@@ -0,0 +1,56 @@
+import shutil
+
+from app import assets
+
+
+def test_minify_css_keeps_strings():
+    css = """
+    /* header */
+    .a  >  .b ,
+    .c {
+      color : red ;  /* don't */
+      background: url("data:x;  y /* not a comment */");
+    }
+    """
+    assert assets.minify_css(css) == (
+        '.a>.b,.c{color :red;background:url("data:x;  y /* not a comment */")}'
+    )
+
+
+def test_minify_js_keeps_line_structure():
+    js = "// intro\nfunction f() {\n    return '//not a comment'\n}\n\n"
+    assert assets.minify_js(js) == "function f() {\nreturn '//not a comment'\n}\n"
+
+
+def test_built_assets_are_fingerprinted_and_negotiated(app, tmp_path):
+    static = tmp_path / "static"
+    shutil.copytree(app.static_folder, static, ignore=shutil.ignore_patterns("dist"))
+    app.static_folder = str(static)
+    assets.build(str(static))
+    assets.load(app)
+
+    client = app.test_client()
+    html = client.get("/").data.decode()
+    hashed = app.extensions["assets"]["manifest"]["css/styles.css"]
+    url = f"/assets/{hashed}"
+    assert url in html and "css/styles.css" not in html
+
+    plain = client.get(url, headers={"Accept-Encoding": "identity"})
+    gz = client.get(url, headers={"Accept-Encoding": "gzip"})
+    assert plain.headers.get("Content-Encoding") is None
+    assert gz.headers["Content-Encoding"] == "gzip"
+    assert len(gz.data) < len(plain.data)
+    assert gz.mimetype == "text/css"
+    assert "immutable" in gz.headers["Cache-Control"]
+    assert "Accept-Encoding" in gz.headers["Vary"]
+    assert client.get("/assets/css/styles.css").status_code == 404
+
+
+def test_falls_back_to_static_without_build(client):
+    assert b"/static/css/styles.css" in client.get("/privacy").data
+
+
+def test_assets_are_not_rate_limited(client):
+    # RATELIMIT_DEFAULT is 20 per minute in development
+    codes = {client.get("/assets/css/missing.css").status_code for _ in range(25)}
+    assert codes == {404}
@@ -0,0 +1,20 @@
+from benchmarks.harness import Result, compare
+
+BASELINE = {
+    "calibration": 1000.0,
+    "results": [
+        {"name": "fast", "items_per_sec": 100.0, "seconds_per_call": 0.01, "unit": "ops"},
+        {"name": "slow", "items_per_sec": 10.0, "seconds_per_call": 0.1, "unit": "ops"},
+    ],
+}
+
+
+def test_compare_flags_regressions_past_threshold():
+    results = [Result("fast", 0.0125, 80.0, "ops"), Result("slow", 0.2, 5.0, "ops")]
+    assert compare(results, BASELINE, 1000.0, 0.25) == ["slow"]
+
+
+def test_compare_scales_by_calibration_and_skips_new_cases():
+    # on a machine half as fast, half the throughput is no regression
+    results = [Result("fast", 0.02, 50.0, "ops"), Result("new", 0.1, 10.0, "ops")]
+    assert compare(results, BASELINE, 500.0, 0.25) == []
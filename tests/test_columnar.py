@@ -0,0 +1,158 @@
+import os
+
+import numpy as np
+import pytest
+
+from app import columnar, storage
+from app.columnar import ColumnStore
+
+DAY = 86400
+START = 1_700_006_400  # a UTC midnight
+
+
+def _fields(age=30, phq9_level="Mild", gad7_level="Minimal", risk=False, sleep=7.0, **extra):
+    fields = {
+        "age": age,
+        "sleep_hours": sleep,
+        "stress_level": 3,
+        "screen_hours": 4.0,
+        "phq9_score": 7,
+        "phq9_level": phq9_level,
+        "gad7_score": 2,
+        "gad7_level": gad7_level,
+        "risk_flag": risk,
+    }
+    fields.update(extra)
+    return fields
+
+
+@pytest.fixture()
+def store(tmp_path):
+    s = ColumnStore()
+    s.configure(str(tmp_path / "analytics"), segment_sec=DAY)
+    return s
+
+
+def test_aggregates_across_segments(store):
+    store.append(
+        [
+            (START + 10, _fields(age=16, risk=True, sleep=5.0)),
+            (START + 20, _fields(age=16, phq9_level="Severe", sleep=6.0)),
+            (START + DAY + 5, _fields(age=70, risk=True, gad7_level="Severe", sleep=8.0)),
+            (START + 2 * DAY + 5, _fields(age=40, sleep=9.0)),
+        ]
+    )
+    assert sorted(os.listdir(store.directory)) == [f"{START + d * DAY:012d}" for d in range(3)]
+
+    result = store.aggregate()
+    assert result["count"] == 4
+    assert result["phq9_level"] == {
+        "Minimal": 0,
+        "Mild": 3,
+        "Moderate": 0,
+        "Moderately severe": 0,
+        "Severe": 1,
+    }
+    assert result["gad7_level"]["Severe"] == 1
+    assert result["percentiles"]["sleep_hours"] == {
+        "p10": 5.0,
+        "p25": 5.0,
+        "p50": 6.0,
+        "p75": 8.0,
+        "p90": 9.0,
+    }
+    bands = {b["band"]: b for b in result["risk_by_age_band"]}
+    assert (bands["13-17"]["count"], bands["13-17"]["rate"]) == (2, 0.5)
+    assert bands["65+"]["rate"] == 1.0
+    assert bands["18-24"]["rate"] is None
+
+
+def test_time_range_masks_partial_segments(store):
+    store.append([(START + h * 3600, _fields(age=20 + h)) for h in range(48)])
+
+    day_two = store.aggregate(START + DAY, START + 2 * DAY)
+    assert day_two["count"] == 24
+    middle = store.aggregate(START + 12 * 3600, START + 36 * 3600)
+    assert middle["count"] == 24
+    assert store.aggregate(START + 3 * DAY)["count"] == 0
+    assert store.aggregate(START + 3 * DAY)["percentiles"]["sleep_hours"] is None
+
+
+def test_cached_segment_counts_follow_appends(store):
+    store.append([(START + 1, _fields())])
+    assert store.aggregate()["count"] == 1
+    store.append([(START + 2, _fields()), (START + 3, _fields())])
+    assert store.aggregate()["count"] == 3
+
+
+def test_bytes_past_row_count_are_ignored_and_overwritten(store):
+    store.append([(START + 1, _fields(age=30))])
+    segment = store._segment_dir(START)
+    # an append that crashed before updating the row count
+    with open(os.path.join(segment, "age.bin"), "ab") as fh:
+        fh.write(np.array([99], dtype=np.int16).tobytes())
+    assert store.aggregate()["count"] == 1
+
+    store.append([(START + 2, _fields(age=50))])
+    ages = np.fromfile(os.path.join(segment, "age.bin"), dtype=np.int16)
+    assert ages.tolist() == [30, 50]
+
+
+@pytest.fixture()
+def analytics_app(app, tmp_path):
+    app.config.update(
+        STORAGE_ENABLED=True,
+        STORAGE_PATH=str(tmp_path / "checkins.db"),
+        ANALYTICS_ENABLED=True,
+        ANALYTICS_PATH=str(tmp_path / "analytics"),
+        ADMIN_TOKEN="s3cret-token",
+    )
+    storage.init_app(app)
+    columnar.init_app(app)
+    yield app
+    app.config.update(STORAGE_ENABLED=False, ANALYTICS_ENABLED=False)
+    storage.init_app(app)
+    columnar.init_app(app)
+
+
+def test_committed_checkins_reach_the_column_store(analytics_app):
+    storage.checkins.save({**_fields(), "name": "Sam", "thoughts": "", "thoughts_redacted": ""})
+    assert storage.checkins.flush()
+    assert columnar.analytics.aggregate()["count"] == 1
+    assert storage.checkins.sinks.count(columnar.analytics.append) == 1
+
+
+def test_admin_analytics_requires_bearer_token(analytics_app):
+    client = analytics_app.test_client()
+    url = "/api/v1/admin/analytics"
+    assert client.get(url).status_code == 401
+    wrong = client.get(url, headers={"Authorization": "Bearer nope"})
+    assert wrong.status_code == 401 and wrong.headers["WWW-Authenticate"] == "Bearer"
+
+    ok = client.get(
+        url + "?since=2023-11-15&until=1700179200",
+        headers={"Authorization": "Bearer s3cret-token"},
+    )
+    assert ok.status_code == 200
+    assert ok.json["since"] == START and ok.json["until"] == START + 2 * DAY
+
+    bad = client.get(url + "?since=yesterday", headers={"Authorization": "Bearer s3cret-token"})
+    assert bad.status_code == 400
+
+
+def test_admin_api_is_off_without_token(client):
+    response = client.get("/api/v1/admin/analytics", headers={"Authorization": "Bearer anything"})
+    assert response.status_code == 404
+
+
+def test_aggregate_keeps_no_segment_files_open(store):
+    def open_fds():
+        return len(os.listdir("/proc/self/fd"))
+
+    if not os.path.isdir("/proc/self/fd"):
+        pytest.skip("needs /proc")
+    store.append([(START + d * DAY, _fields()) for d in range(40)])
+    before = open_fds()
+    assert store.aggregate()["count"] == 40
+    assert store.aggregate(START + DAY // 2, START + 20 * DAY)["count"] == 19
+    assert open_fds() <= before
@@ -0,0 +1,45 @@
+import zlib
+
+from app import compression
+
+
+def test_streamed_result_page_is_gzipped_in_chunks(client, valid_form):
+    form = valid_form(**{f"phq9_{i}": "1" for i in range(1, 10)})
+    form.update({f"gad7_{i}": "1" for i in range(1, 8)})
+    plain = client.post("/analyze", data=form)
+    res = client.post("/analyze", data=form, headers={"Accept-Encoding": "gzip"}, buffered=False)
+    assert res.is_streamed
+    assert res.headers["Content-Encoding"] == "gzip"
+    assert "Content-Length" not in res.headers
+    chunks = list(res.response)
+    res.close()
+    assert len(chunks) > 1  # flushed while rendering, not once at the end
+    assert zlib.decompress(b"".join(chunks), 31) == plain.data
+
+
+def test_error_page_compressed_and_small_bodies_skipped(client):
+    res = client.post("/analyze", data={"name": ""}, headers={"Accept-Encoding": "gzip"})
+    assert res.headers["Content-Encoding"] == "gzip"
+    assert b"Name is required" in zlib.decompress(res.data, 31)
+
+    small = client.get("/csrf-token", headers={"Accept-Encoding": "gzip"})
+    assert "Content-Encoding" not in small.headers
+    assert "Accept-Encoding" in small.headers["Vary"]
+
+
+def test_cached_page_validators_match_across_encodings(client, monkeypatch):
+    monkeypatch.setattr(compression, "brotli", None)
+    res = client.get("/terms", headers={"Accept-Encoding": "gzip"})
+    etag = res.headers["ETag"]
+    assert etag.endswith('-gzip"')
+    assert res.headers["Content-Encoding"] == "gzip"
+
+    again = client.get("/terms", headers={"If-None-Match": etag})
+    assert again.status_code == 304
+    assert again.headers["ETag"] == etag[: -len('-gzip"')] + '"'
+
+
+def test_identity_when_not_accepted(client):
+    res = client.get("/privacy", headers={"Accept-Encoding": "gzip;q=0"})
+    assert "Content-Encoding" not in res.headers
+    assert b"Privacy" in res.data
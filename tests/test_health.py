@@ -0,0 +1,95 @@
+from app.probes import ERROR, OK, PENDING, ProbeRunner
+
+
+def _runner(now):
+    runner = ProbeRunner(interval=10, timer=lambda: now[0])
+    calls = []
+
+    def flaky():
+        calls.append(1)
+        if len(calls) > 1:
+            raise RuntimeError("connection refused")
+        return {"free_mb": 100}
+
+    runner.register("db", flaky, critical=True)
+    runner.register("ai", lambda: None)
+    return runner, calls
+
+
+def test_probe_results_are_cached_between_runs():
+    now = [0.0]
+    runner, calls = _runner(now)
+    assert runner.snapshot()["db"]["status"] == PENDING
+    assert not runner.ready()
+
+    runner.run_once()
+    now[0] = 4.0
+    for _ in range(5):
+        snap = runner.snapshot()
+    assert len(calls) == 1
+    assert snap["db"] == {
+        "status": OK,
+        "free_mb": 100,
+        "latency_ms": 0.0,
+        "age_sec": 4.0,
+        "critical": True,
+    }
+    assert runner.ready(snap)
+
+    runner.run_once()
+    snap = runner.snapshot()
+    assert snap["db"]["status"] == ERROR
+    assert snap["db"]["error"] == "connection refused"
+    assert not runner.ready(snap)
+
+
+def test_stale_results_count_as_errors():
+    now = [0.0]
+    runner, _ = _runner(now)
+    runner.run_once()
+    now[0] = 31.0
+    snap = runner.snapshot()
+    assert snap["ai"]["status"] == ERROR and "stale" in snap["ai"]["error"]
+
+
+def _ready_app(app):
+    runner = app.extensions["health_probes"]
+    runner.run_once()
+    return runner
+
+
+def test_liveness_ignores_dependencies(app, client):
+    runner = _ready_app(app)
+    runner.register("redis", lambda: 1 / 0, critical=True)
+    runner.run_once()
+    assert client.get("/livez").status_code == 200
+    assert client.get("/readyz").status_code == 503
+
+
+def test_readiness_and_details(app, client):
+    _ready_app(app)
+    res = client.get("/readyz")
+    assert res.status_code == 200
+    assert res.get_json() == {"status": "ready", "components": {"disk": "ok"}}
+    assert res.headers["Cache-Control"] == "no-store"
+
+    body = client.get("/healthz").get_json()
+    assert body["components"]["disk"]["status"] == "ok"
+    assert "age_sec" in body["components"]["disk"]
+    assert body["components"]["ai"]["breaker"]["state"] == "closed"
+
+
+def test_noncritical_failure_degrades_without_failing(app, client):
+    runner = _ready_app(app)
+    runner.register("ai", lambda: 1 / 0)
+    runner.run_once()
+    res = client.get("/healthz")
+    assert res.status_code == 200
+    assert res.get_json()["status"] == "degraded"
+    assert client.get("/readyz").status_code == 200
+
+
+def test_health_endpoints_are_not_rate_limited(client):
+    # RATELIMIT_DEFAULT is 20 per minute
+    for _ in range(25):
+        assert client.get("/livez").status_code == 200
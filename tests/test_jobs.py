@@ -0,0 +1,57 @@
+import threading
+import time
+
+from app.jobs import DONE, EXPIRED, PENDING, JobStore
+
+
+def _store(tmp_path, **kwargs):
+    store = JobStore()
+    store.configure(str(tmp_path), max_workers=2, max_pending=kwargs.get("max_pending", 4), ttl=60)
+    return store
+
+
+def test_submit_and_poll(tmp_path):
+    store = _store(tmp_path)
+    job_id = store.submit(lambda x: x * 2, 21)
+    assert store.poll(job_id, wait=5) == (DONE, 42)
+
+
+def test_result_visible_to_other_workers(tmp_path):
+    store = _store(tmp_path)
+    job_id = store.submit(lambda: "hello")
+    store.poll(job_id, wait=5)
+    time.sleep(0.05)  # let the done-callback write the result file
+    other = _store(tmp_path)
+    assert other.poll(job_id) == (DONE, "hello")
+
+
+def test_pending_jobs_are_capped(tmp_path):
+    store = _store(tmp_path, max_pending=1)
+    release = threading.Event()
+    job_id = store.submit(release.wait)
+    assert store.submit(lambda: None) is None
+    assert store.poll(job_id) == (PENDING, None)
+    release.set()
+    assert store.poll(job_id, wait=5) == (DONE, True)
+
+
+def test_unknown_and_expired_ids(tmp_path):
+    store = _store(tmp_path)
+    assert store.poll("../../etc/passwd")[0] == EXPIRED
+    assert store.poll(f"{int(time.time()) - 1}-{'a' * 22}")[0] == EXPIRED
+    assert store.poll(f"{int(time.time()) + 60}-{'a' * 22}")[0] == PENDING
+
+
+def test_poll_deletes_expired_results(tmp_path):
+    store = _store(tmp_path)
+    expired = f"{int(time.time()) - 1}-{'a' * 22}"
+    store._write(expired, "sensitive")
+    assert store.poll(expired) == (EXPIRED, None)
+    assert not (tmp_path / f"{expired}.json").exists()
+
+    # later polls sweep other expired files too, with no submissions in between
+    store._last_sweep = 0.0
+    other = f"{int(time.time()) - 1}-{'b' * 22}"
+    store._write(other, "sensitive")
+    store.poll(f"{int(time.time()) + 60}-{'c' * 22}")
+    assert not (tmp_path / f"{other}.json").exists()
@@ -0,0 +1,69 @@
+import random
+import threading
+
+import pytest
+from openai import APIStatusError, OpenAI
+
+from app.analysis import SUBMISSION_SCHEMA
+from loadtest.fake_openai import FakeOpenAI, latency_sampler
+from loadtest.run import percentile, random_form
+
+
+@pytest.fixture()
+def fake():
+    servers = []
+
+    def start(**options):
+        server = FakeOpenAI(("127.0.0.1", 0), **options)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+        return server
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+def test_fake_server_answers_like_the_api(fake):
+    server = fake(latency="fixed:0")
+    client = OpenAI(api_key="sk-test", base_url=server.base_url, max_retries=0)
+    response = client.chat.completions.create(
+        model="gpt-4o-mini", messages=[{"role": "user", "content": "hi"}]
+    )
+    assert response.choices[0].message.content
+    assert client.models.list().data[0].id == "gpt-4o-mini"
+    assert server.counts == {"ok": 1, "models": 1}
+
+
+def test_fake_server_injects_errors(fake):
+    server = fake(latency="fixed:0", error_rate=1.0, error_statuses=[503])
+    client = OpenAI(api_key="sk-test", base_url=server.base_url, max_retries=0)
+    with pytest.raises(APIStatusError) as info:
+        client.chat.completions.create(model="m", messages=[{"role": "user", "content": "x"}])
+    assert info.value.status_code == 503
+    assert server.counts == {"error_503": 1}
+
+
+def test_latency_specs():
+    rng = random.Random(0)
+    assert latency_sampler("fixed:0.25", rng)() == 0.25
+    assert 0.1 <= latency_sampler("uniform:0.1:0.2", rng)() <= 0.2
+    assert latency_sampler("lognormal:0.5:0.4", rng)() > 0
+    with pytest.raises(ValueError):
+        latency_sampler("gamma:1", rng)
+
+
+def test_generated_forms_match_their_kind():
+    rng = random.Random(0)
+    for _ in range(50):
+        assert not SUBMISSION_SCHEMA.validate(random_form(rng, "valid")).errors
+        assert SUBMISSION_SCHEMA.validate(random_form(rng, "invalid")).errors
+    assert random_form(rng, "ai")["use_ai"] == "on"
+
+
+def test_percentile():
+    values = [float(v) for v in range(1, 101)]
+    assert percentile(values, 50) == 50.0
+    assert percentile(values, 99) == 99.0
+    assert percentile([], 90) == 0.0
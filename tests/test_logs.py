@@ -0,0 +1,94 @@
+import json
+import logging
+import threading
+
+from app import logs
+
+
+def _read(path):
+    with open(path, encoding="utf-8") as fh:
+        return [json.loads(line) for line in fh]
+
+
+def test_records_are_json_with_request_fields(app, tmp_path):
+    path = tmp_path / "app.log"
+    logger = logging.getLogger("test_logs.json")
+    pipeline = logs.configure(logger, str(path), "rotating", logging.INFO, 100)
+    try:
+        with app.test_request_context("/analyze", method="POST"):
+            app.preprocess_request()
+            logger.info("scored %s", "ok")
+        logger.warning("outside")
+        try:
+            raise ValueError("boom")
+        except ValueError:
+            logger.exception("failed")
+    finally:
+        pipeline.stop()
+
+    inside, outside, failed = _read(path)
+    assert inside["message"] == "scored ok"
+    assert (inside["method"], inside["path"]) == ("POST", "/analyze")
+    assert outside["levelname"] == "WARNING" and outside["path"] == "-"
+    assert "ValueError: boom" in failed["exc_info"]
+
+
+def test_full_queue_drops_instead_of_blocking(tmp_path):
+    release = threading.Event()
+
+    class SlowHandler(logging.Handler):
+        def emit(self, record):
+            release.wait(5)
+
+    pipeline = logs.LogPipeline(SlowHandler, maxsize=2)
+    try:
+        for _ in range(10):
+            pipeline.put(logging.makeLogRecord({"msg": "x", "levelno": logging.INFO}))
+        stats = pipeline.stats()
+        assert stats["dropped"] >= 7
+        assert stats["queued"] <= 2
+    finally:
+        release.set()
+        pipeline.stop()
+
+
+def test_listener_restarts_in_forked_worker(monkeypatch):
+    seen = []
+
+    class ListHandler(logging.Handler):
+        def emit(self, record):
+            seen.append(record.getMessage())
+
+    pipeline = logs.LogPipeline(ListHandler, maxsize=10)
+    pipeline.put(logging.makeLogRecord({"msg": "parent", "levelno": logging.INFO}))
+    parent_queue, parent_listener = pipeline._queue, pipeline._listener
+
+    monkeypatch.setattr(logs.os, "getpid", lambda: -1)
+    pipeline.put(logging.makeLogRecord({"msg": "child", "levelno": logging.INFO}))
+    assert pipeline._queue is not parent_queue
+    pipeline.stop()
+    parent_listener.stop()
+
+    assert sorted(seen) == ["child", "parent"]
+
+
+def test_shared_handler_rotates_once_across_processes(tmp_path):
+    path = str(tmp_path / "app.log")
+    # two workers writing the same file
+    first = logs.SharedRotatingFileHandler(path, max_bytes=200, backup_count=2)
+    second = logs.SharedRotatingFileHandler(path, max_bytes=200, backup_count=2)
+    record = logging.makeLogRecord({"msg": "x" * 60, "levelno": logging.INFO})
+    try:
+        for _ in range(3):
+            first.emit(record)
+            second.emit(record)
+    finally:
+        first.close()
+        second.close()
+
+    rotated = tmp_path / "app.log.1"
+    assert rotated.stat().st_size >= 200
+    # the second worker followed the rotation instead of writing to the old file
+    assert (tmp_path / "app.log").stat().st_size < 200
+    total = sum(p.stat().st_size for p in tmp_path.glob("app.log*") if p.suffix != ".lock")
+    assert total == 6 * 61
@@ -0,0 +1,80 @@
+import os
+import subprocess
+import sys
+
+from prometheus_client import REGISTRY
+
+from app.monitoring import AdaptiveSampler
+
+
+def _sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+
+def test_analyze_records_stages_and_counters(client, valid_form):
+    before = {
+        stage: _sample("mha_analyze_stage_seconds_count", stage=stage)
+        for stage in ("validate", "score", "notes", "rules", "render")
+    }
+    submissions = _sample("mha_submissions_total")
+    unavailable = _sample("mha_ai_requests_total", outcome="unavailable")
+
+    res = client.post("/analyze", data=valid_form(use_ai="on"))
+    assert res.status_code == 200
+    res.get_data()
+
+    for stage, count in before.items():
+        assert _sample("mha_analyze_stage_seconds_count", stage=stage) == count + 1
+    assert _sample("mha_submissions_total") == submissions + 1
+    assert _sample("mha_ai_requests_total", outcome="unavailable") == unavailable + 1
+
+
+def test_metrics_endpoint(app, client):
+    app.config["ADMIN_TOKEN"] = None
+    assert client.get("/metrics").status_code == 404
+    app.config["ADMIN_TOKEN"] = "s3cret-token"
+    assert client.get("/metrics").status_code == 401
+
+    client.get("/privacy")
+    client.get("/privacy")
+    res = client.get("/metrics", headers={"Authorization": "Bearer s3cret-token"})
+    assert res.status_code == 200
+    assert res.headers["Cache-Control"] == "no-store"
+    body = res.get_data(as_text=True)
+    assert 'mha_request_seconds_count{endpoint="main.privacy"}' in body
+    assert 'mha_cache_hit_ratio{cache="page"}' in body
+
+
+def test_sampler_adapts_to_request_rate():
+    now = [0.0]
+    sampler = AdaptiveSampler(target=1.0, min_rate=0.001, max_rate=0.5, timer=lambda: now[0])
+    environ = {"wsgi_environ": {"PATH_INFO": "/analyze"}}
+    assert sampler(environ) == 0.5
+
+    for _ in range(1001):  # 100 requests/s for ten seconds
+        now[0] += 0.01
+        sampler(environ)
+    assert abs(sampler.rate - 0.01) < 0.001
+
+    assert sampler({"wsgi_environ": {"PATH_INFO": "/healthz"}}) == 0.0
+    assert sampler({"parent_sampled": True}) == 1.0
+
+
+def test_multiprocess_metrics_are_aggregated(tmp_path):
+    script = (
+        "from app import create_app\n"
+        "app = create_app()\n"
+        "app.test_client().get('/privacy')\n"
+        "res = app.test_client().get('/metrics', headers={'Authorization': 'Bearer t'})\n"
+        "print(res.get_data(as_text=True))\n"
+    )
+    env = dict(
+        os.environ, PROMETHEUS_MULTIPROC_DIR=str(tmp_path), FLASK_ENV="development", ADMIN_TOKEN="t"
+    )
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    out = subprocess.run(
+        [sys.executable, "-c", script], cwd=root, env=env, capture_output=True, text=True
+    )
+    assert out.returncode == 0, out.stderr
+    assert 'mha_request_seconds_count{endpoint="main.privacy"} 1.0' in out.stdout
+    assert any(name.endswith(".db") for name in os.listdir(tmp_path))
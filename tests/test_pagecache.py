@@ -0,0 +1,63 @@
+import os
+import shutil
+
+from jinja2 import FileSystemLoader
+
+
+def test_pages_carry_etag_and_answer_304(client):
+    res = client.get("/privacy")
+    assert res.status_code == 200
+    etag = res.headers["ETag"]
+    assert etag.startswith('"') and "public" in res.headers["Cache-Control"]
+
+    again = client.get("/privacy", headers={"If-None-Match": etag})
+    assert again.status_code == 304
+    assert again.data == b""
+    assert client.get("/terms").headers["ETag"] != etag
+
+
+def test_index_is_shared_and_token_fetched_separately(app, client):
+    first = client.get("/")
+    second = app.test_client().get("/")
+    assert first.data == second.data
+    assert b'name="csrf_token" value=""' in first.data
+    assert app.extensions["page_cache"].stats()["hits"] >= 1
+
+    res = client.get("/csrf-token")
+    assert res.headers["Cache-Control"] == "no-store"
+    assert res.get_json()["csrf_token"]
+
+
+def test_validation_errors_still_embed_token(client):
+    res = client.post("/analyze", data={"name": ""})
+    assert b'name="csrf_token" value=""' not in res.data
+
+
+def test_template_change_invalidates(app, client, tmp_path):
+    # touch copies, not the real templates
+    shutil.copytree(os.path.join(app.root_path, "templates"), tmp_path, dirs_exist_ok=True)
+    app.jinja_env.loader = FileSystemLoader(str(tmp_path))
+    cache = app.extensions["page_cache"]
+    cache.check_interval = 0
+    client.get("/terms")
+    path = tmp_path / "base.html"
+    stat = os.stat(path)
+    os.utime(path, (stat.st_atime, stat.st_mtime + 10))
+    misses = cache.misses
+    client.get("/terms")
+    assert cache.misses == misses + 1
+
+
+def test_csrf_token_is_not_rate_limited(client):
+    # the development default is 20 per minute
+    for _ in range(25):
+        assert client.get("/csrf-token").status_code == 200
+
+
+def test_noscript_form_embeds_token(client):
+    cached = client.get("/")
+    assert b"nojs=1" in cached.data
+    res = client.get("/?nojs=1")
+    assert res.headers["Cache-Control"] == "no-store"
+    assert b'name="csrf_token" value=""' not in res.data
+    assert b"<noscript>" not in res.data
@@ -0,0 +1,99 @@
+from limits import parse
+from limits.strategies import FixedWindowRateLimiter
+
+from app import ratelimit
+from app.ratelimit import TieredStorage
+
+
+def test_local_tier_batches_shared_storage_calls():
+    storage = TieredStorage("tiered+memory://", sync_interval=60, sync_batch=10)
+    limiter = FixedWindowRateLimiter(storage)
+    item = parse("1000 per minute")
+    for _ in range(200):
+        assert limiter.hit(item, "client")
+    storage.flush()
+
+    assert storage.remote_calls < 200 / 5
+    assert storage.remote.get(item.key_for("client")) == 200
+    assert limiter.get_window_stats(item, "client").remaining == 800
+
+
+def test_workers_stay_within_tolerance():
+    batch = 5
+    workers = [TieredStorage("tiered+memory://", sync_interval=60, sync_batch=batch)]
+    for _ in range(3):
+        worker = TieredStorage("tiered+memory://", sync_interval=60, sync_batch=batch)
+        worker.remote = workers[0].remote
+        workers.append(worker)
+    item = parse("40 per minute")
+
+    admitted = 0
+    for i in range(400):
+        if FixedWindowRateLimiter(workers[i % len(workers)]).hit(item, "client"):
+            admitted += 1
+
+    assert 40 <= admitted <= 40 + batch * (len(workers) - 1)
+
+
+def test_forked_worker_drops_parent_counters(monkeypatch):
+    storage = TieredStorage("tiered+memory://", sync_interval=60, sync_batch=100)
+    storage.incr("key", 60)
+    storage.incr("key", 60)
+
+    monkeypatch.setattr(ratelimit.os, "getpid", lambda: -1)
+    # the parent's unpushed hit is not counted again by the child
+    assert storage.incr("key", 60) == 2
+
+
+def test_ai_quota_skips_ai_instead_of_rejecting(app, client, monkeypatch, valid_form):
+    from limits import parse_many
+
+    from app import routes
+
+    limiter, _ = app.extensions["ai_ratelimit"]
+    app.extensions["ai_ratelimit"] = (limiter, parse_many("2 per hour"))
+    app.config["AI_DEFERRED"] = True
+    submitted = []
+    monkeypatch.setattr(routes, "ai_available", lambda: True)
+    monkeypatch.setattr(routes.ai_jobs, "submit", lambda fn, summary: submitted.append(1) or "j")
+
+    for _ in range(3):
+        assert client.post("/analyze", data=valid_form(use_ai="on")).status_code == 200
+    assert len(submitted) == 2
+
+
+def test_ai_feedback_polls_have_their_own_limit(app, client):
+    app.config["AI_FEEDBACK_RATELIMIT"] = "30 per minute"
+    # well past the 20 per minute default a route would otherwise get
+    codes = {client.get("/api/v1/ai-feedback/not-a-job").status_code for _ in range(30)}
+    assert codes == {404}
+    assert client.get("/api/v1/ai-feedback/not-a-job").status_code == 429
+
+
+def test_redis_sync_pipelines_the_incr_script(monkeypatch):
+    storage = TieredStorage("tiered+redis://localhost:6379", sync_interval=60, sync_batch=100)
+    remote = storage.remote
+    calls = []
+
+    class Pipeline:
+        def execute(self):
+            return [amount + 10 for _, (_, amount) in calls]
+
+    class Client:
+        def pipeline(self, transaction):
+            assert transaction is False
+            return pipe
+
+    pipe = Pipeline()
+
+    def script(keys, args, client):
+        assert client is pipe
+        calls.append((keys, args))
+
+    # raising=True (the default): fails if limits renames the internals we use
+    monkeypatch.setattr(remote, "storage", Client())
+    monkeypatch.setattr(remote, "lua_incr_expire", script)
+
+    assert storage._push([("a", 60, 3), ("b", 60, 1)]) == [13, 11]
+    assert calls == [([remote.prefixed_key("a")], [60, 3]), ([remote.prefixed_key("b")], [60, 1])]
+    assert storage.remote_calls == 1
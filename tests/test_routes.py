@@ -316,3 +316,87 @@ def test_analyze_concurrent_requests(client):
     for res in responses:
         assert res.status_code == 200
         assert b"Personalized Suggestions" in res.data
+
+
+def test_analyze_defers_ai_feedback(client, monkeypatch):
+    """AI feedback is rendered later from a background job"""
+    from app import routes
+
+    monkeypatch.setenv("OPENAI_API_KEY", "sk-test")
+    monkeypatch.setattr(routes, "generate_ai_feedback", lambda summary: "Deferred suggestion.")
+
+    data = {
+        "name": "Sam",
+        "age": "30",
+        "mood": "good",
+        "sleep": "7",
+        "stress": "2",
+        "thoughts": "Doing fine",
+        "exercise_days": "3",
+        "caffeine_cups": "1",
+        "screen_hours": "2",
+        "support_level": "4",
+        "use_ai": "on",
+    }
+    for i in range(1, 10):
+        data[f"phq9_{i}"] = "0"
+    for i in range(1, 8):
+        data[f"gad7_{i}"] = "0"
+
+    res = client.post("/analyze", data=data)
+    assert res.status_code == 200
+    assert b"Deferred suggestion." not in res.data
+    import re
+
+    job_url = re.search(rb'data-job-url="([^"]+)"', res.data).group(1).decode()
+    poll = client.get(f"{job_url}?wait=5")
+    assert poll.status_code == 200
+    assert poll.get_json() == {"status": "done", "feedback": "Deferred suggestion."}
+    assert poll.headers["Cache-Control"] == "no-store"
+
+    assert client.get("/api/v1/ai-feedback/not-a-job").status_code == 404
+
+
+def test_analyze_without_ai_job_shows_fallback(client, monkeypatch):
+    """A full job store does not leave the page promising AI feedback"""
+    from app import routes
+
+    monkeypatch.setenv("OPENAI_API_KEY", "sk-test")
+    monkeypatch.setattr(routes.ai_jobs, "submit", lambda fn, *args: None)
+
+    data = {
+        "name": "Sam",
+        "age": "30",
+        "mood": "good",
+        "sleep": "7",
+        "stress": "2",
+        "thoughts": "Doing fine",
+        "exercise_days": "3",
+        "caffeine_cups": "1",
+        "screen_hours": "2",
+        "support_level": "4",
+        "use_ai": "on",
+    }
+    data.update({f"phq9_{i}": "0" for i in range(1, 10)})
+    data.update({f"gad7_{i}": "0" for i in range(1, 8)})
+
+    res = client.post("/analyze", data=data)
+    assert res.status_code == 200
+    assert b"data-job-url" not in res.data
+    assert b"Generating additional suggestions" not in res.data
+    assert b"AI-assisted insights are unavailable right now" in res.data
+
+
+def test_analyze_validation_json(client):
+    res = client.post(
+        "/analyze",
+        data={"name": "Sam", "age": "200", "mood": "meh"},
+        headers={"Accept": "application/json"},
+    )
+    assert res.status_code == 400
+    body = res.get_json()
+    assert body["ok"] is False
+    assert body["errors"]["age"] == "Enter a realistic age (13-120)."
+    assert body["errors"]["mood"] == "Select a mood option."
+    assert "name" not in body["errors"]
+    assert body["fields"]["age"] == {"type": "integer", "min": 13, "max": 120}
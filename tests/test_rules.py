@@ -0,0 +1,55 @@
+import pytest
+
+from app.rules import RULES, Rule, RulesEngine, evaluate
+
+
+def _fields(**overrides):
+    fields = {
+        "mood": "neutral",
+        "sleep_hours": 7.0,
+        "stress_level": 2,
+        "thoughts_risk": False,
+        "phq9_suicidal": False,
+        "exercise_days": 3,
+        "caffeine_cups": 1,
+        "screen_hours": 2.0,
+        "support_level": 4,
+    }
+    fields.update(overrides)
+    return fields
+
+
+def test_fallback_only_when_no_core_rule_fired():
+    ids = [s.id for s in evaluate(_fields()).suggestions]
+    assert ids == ["doing_well"]
+
+    # lifestyle rules come after the fallback and do not suppress it
+    ids = [s.id for s in evaluate(_fields(exercise_days=0)).suggestions]
+    assert ids == ["doing_well", "low_exercise"]
+
+    ids = [s.id for s in evaluate(_fields(mood="low")).suggestions]
+    assert ids == ["low_mood"]
+
+
+def test_suicidal_item_goes_first_and_flags_risk():
+    outcome = evaluate(_fields(mood="very low", phq9_suicidal=True, support_level=1))
+    assert [s.id for s in outcome.suggestions] == ["suicidal_item", "low_mood", "low_support"]
+    assert outcome.risk_flag is True
+    assert outcome.texts == tuple(s.text for s in outcome.suggestions)
+
+
+def test_risk_words_flag_risk():
+    outcome = evaluate(_fields(thoughts_risk=True))
+    assert outcome.risk_flag is True
+    assert [s.id for s in outcome.suggestions] == ["risk_words"]
+
+
+def test_outcomes_are_shared_between_calls():
+    assert evaluate(_fields(sleep_hours=4.0)) is evaluate(_fields(sleep_hours=5.5))
+
+
+def test_engine_rejects_bad_tables():
+    with pytest.raises(ValueError):
+        RulesEngine(RULES + (RULES[0],))
+    with pytest.raises(ValueError):
+        RulesEngine([Rule("x", ("mood", "matches", "low"), "text")])
@@ -0,0 +1,44 @@
+import pytest
+
+from app.analysis import SUBMISSION_SCHEMA
+from app.schema import Field, FormSchema
+
+
+def test_schema_parses_in_one_pass():
+    item = dict(type=int, invalid="0-3", low=0, high=3, out_of_range="0-3")
+    schema = FormSchema(
+        [
+            Field("who", required="Required"),
+            Field("level", int, key="lvl", invalid="Number", low=1, high=5, out_of_range="1-5"),
+            *(Field(f"q{i}", list_key="answers", **item) for i in range(3)),
+        ]
+    )
+    values, errors, form = schema.validate(
+        {"who": "  Ana ", "level": "9", "q0": "1", "q1": "x", "q2": " 3 "}
+    )
+    assert values == {"who": "Ana", "lvl": 9, "answers": [1, 3]}
+    assert errors == {"level": "1-5", "q1": "0-3"}
+    assert form == {"who": "Ana", "level": "9", "q0": "1", "q1": "x", "q2": "3"}
+
+
+def test_submission_schema_keeps_messages_and_defaults():
+    values, errors, form = SUBMISSION_SCHEMA.validate({"mood": " Good ", "sleep": "25"})
+    assert errors["name"] == "Name is required."
+    assert errors["age"] == "Age must be a number."
+    assert "mood" not in errors and form["mood"] == "good"
+    assert errors["sleep"] == "Enter hours between 0 and 24."
+    assert errors["phq9_1"] == "Select 0-3"
+    assert errors["support_level"] == "Required"
+    assert (values["exercise_days"], values["screen_hours"], values["support_level"]) == (0, 0.0, 3)
+    assert values["phq9"] == [] and values["age"] is None
+
+
+def test_bad_tables_are_rejected():
+    with pytest.raises(ValueError):
+        FormSchema([Field("a"), Field("a")])
+    with pytest.raises(ValueError):
+        FormSchema([Field("n", int)])  # no message for unparseable input
+    with pytest.raises(ValueError):
+        FormSchema([Field("n", int, invalid="Number", low=0)])
+    with pytest.raises(ValueError):
+        FormSchema([Field("n", list)])
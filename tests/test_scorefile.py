@@ -0,0 +1,84 @@
+import csv
+import io
+import json
+
+from app import scorefile
+
+
+def _ndjson(records):
+    return "".join(json.dumps(r) + "\n" for r in records).encode("utf-8")
+
+
+def _csv(records):
+    buf = io.StringIO()
+    writer = csv.DictWriter(buf, list(records[0]))
+    writer.writeheader()
+    writer.writerows(records)
+    return buf.getvalue().encode("utf-8")
+
+
+def _score(data, in_fmt, out_fmt="ndjson", **kwargs):
+    out = io.StringIO()
+    progress = scorefile.score_file(io.BytesIO(data), out, in_fmt, out_fmt, **kwargs)
+    return out.getvalue(), progress
+
+
+def test_results_keep_input_order_across_workers(valid_record):
+    records = [valid_record(id=i, phq9_1=i % 4) for i in range(23)]
+    text, progress = _score(_ndjson(records), "ndjson", chunk_size=2, workers=2)
+    results = [json.loads(line) for line in text.splitlines()]
+    assert [r["index"] for r in results] == list(range(23))
+    assert [r["id"] for r in results] == list(range(23))
+    assert [r["summary"]["phq9_score"] for r in results] == [i % 4 for i in range(23)]
+    assert (progress.rows, progress.invalid) == (23, 0)
+
+
+def test_invalid_rows_are_reported_in_place(valid_record):
+    bad = _ndjson([valid_record(id="c", age="abc")])
+    data = _ndjson([valid_record(id="a")]) + b"{not json\n" + bad
+    text, progress = _score(data, "ndjson", chunk_size=1, workers=1)
+    results = [json.loads(line) for line in text.splitlines()]
+    assert [r["ok"] for r in results] == [True, False, False]
+    assert results[1]["errors"] == {"_record": "Invalid JSON"}
+    assert results[2]["errors"]["age"] == "Age must be a number."
+    assert progress.invalid == 2
+
+
+def test_csv_in_csv_out_with_suggestions(valid_record):
+    records = [valid_record(id="a"), valid_record(id="b", phq9_9=2)]
+    text, _ = _score(_csv(records), "csv", "csv", workers=1)
+    rows = list(csv.DictReader(io.StringIO(text)))
+    assert tuple(rows[0]) == scorefile.CSV_FIELDS
+    assert [r["id"] for r in rows] == ["a", "b"]
+    assert rows[0]["phq9_level"] == "Minimal" and rows[0]["errors"] == ""
+    assert rows[1]["risk_flag"] == "True"
+    assert "; " in rows[1]["suggestions"]
+
+
+def test_progress_reports_on_interval():
+    now = [0.0]
+    lines = []
+    progress = scorefile.Progress(lines.append, interval=5, timer=lambda: now[0])
+    progress.add([{"ok": True}] * 10)
+    now[0] = 5.0
+    progress.add([{"ok": False}] * 10)
+    assert lines == ["20 rows (10 invalid), 4 rows/s"]
+
+
+def test_format_for_uses_extension():
+    assert scorefile.format_for("forms.CSV") == "csv"
+    assert scorefile.format_for("forms.jsonl") == "ndjson"
+    assert scorefile.format_for("-") == "ndjson"
+
+
+def test_score_file_command(app, tmp_path, valid_record):
+    source = tmp_path / "forms.csv"
+    source.write_bytes(_csv([valid_record(id="a"), valid_record(id="b", stress=9)]))
+    out = tmp_path / "scored.ndjson"
+    result = app.test_cli_runner().invoke(
+        args=["score-file", str(source), "-o", str(out), "--workers", "2"]
+    )
+    assert result.exit_code == 0, result.output
+    assert "Done: 2 rows (1 invalid)" in result.output
+    results = [json.loads(line) for line in out.read_text(encoding="utf-8").splitlines()]
+    assert [r["ok"] for r in results] == [True, False]
@@ -0,0 +1,22 @@
+from app.startup import warm_up
+
+
+def test_create_app_records_phases(app):
+    phases = app.extensions["startup"]["create_app"]
+    assert {"config", "extensions", "blueprints", "security", "monitoring"} <= set(phases)
+    assert phases["total_ms"] >= phases["extensions"]
+
+
+def test_warm_up_compiles_templates_and_fills_page_cache(app, client):
+    cache = app.extensions["page_cache"]
+    cache.clear()
+    phases = warm_up(app)
+
+    assert set(phases) == {"templates", "analysis", "pages"}
+    assert cache.stats()["size"] == 3
+    misses = cache.stats()["misses"]
+    assert client.get("/privacy").status_code == 200
+    assert cache.stats()["misses"] == misses
+
+    health = client.get("/healthz").get_json()
+    assert "warm_up" in health["components"]["app"]["startup"]
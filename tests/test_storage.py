@@ -0,0 +1,130 @@
+import json
+import sqlite3
+import threading
+
+import pytest
+
+from app import storage
+from app.storage import CheckinStore
+
+
+def _rows(path):
+    conn = sqlite3.connect(path)
+    try:
+        return [json.loads(s) for (s,) in conn.execute("SELECT summary FROM checkins ORDER BY id")]
+    finally:
+        conn.close()
+
+
+@pytest.fixture()
+def store(tmp_path):
+    s = CheckinStore()
+    s.configure(str(tmp_path / "checkins.db"), queue_size=100, batch_size=50, commit_delay=0.2)
+    yield s
+    s.close()
+
+
+def test_queued_records_are_committed_together(store):
+    for i in range(20):
+        assert store.save({"name": f"n{i}", "thoughts": "raw", "thoughts_redacted": "[x]"})
+    assert store.flush()
+
+    rows = _rows(store.path)
+    assert [r["name"] for r in rows] == [f"n{i}" for i in range(20)]
+    assert rows[0]["thoughts"] == "[x]" and "thoughts_redacted" not in rows[0]
+    assert store.stats()["written"] == 20
+    assert store.stats()["batches"] < 20
+
+
+def test_full_queue_drops_instead_of_blocking(tmp_path, monkeypatch):
+    release = threading.Event()
+    s = CheckinStore()
+    s.configure(str(tmp_path / "checkins.db"), queue_size=2, commit_delay=0)
+    write = s._write
+    monkeypatch.setattr(s, "_write", lambda conn, rows: (release.wait(5), write(conn, rows)))
+    try:
+        results = [s.save({"name": str(i)}) for i in range(10)]
+        assert results.count(False) >= 7
+        assert s.stats()["dropped"] == results.count(False)
+    finally:
+        release.set()
+        s.close()
+    assert len(_rows(s.path)) == results.count(True)
+
+
+def test_writer_restarts_in_forked_worker(store, monkeypatch):
+    store.save({"name": "parent"})
+    parent_queue, parent_writer = store._queue, store._writer
+
+    monkeypatch.setattr(storage.os, "getpid", lambda: -1)
+    store.save({"name": "child"})
+    assert store._queue is not parent_queue
+    store.close()
+    parent_queue.put(storage._STOP)
+    parent_writer.join(5)
+
+    assert sorted(r["name"] for r in _rows(store.path)) == ["child", "parent"]
+
+
+def test_migrations_are_applied_once(store):
+    store.configure(store.path)
+    conn = store.connect()
+    try:
+        assert conn.execute("PRAGMA user_version").fetchone()[0] == len(storage._MIGRATIONS)
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    finally:
+        conn.close()
+
+
+def test_analyze_stores_redacted_summary_when_enabled(app, client, tmp_path, valid_form):
+    app.config.update(STORAGE_ENABLED=True, STORAGE_PATH=str(tmp_path / "checkins.db"))
+    storage.init_app(app)
+    try:
+        form = valid_form(thoughts="call me at 555-123-4567")
+        assert client.post("/analyze", data=form).status_code == 200
+        assert client.post("/analyze", data={**form, "save_checkin": "on"}).status_code == 200
+        assert storage.checkins.flush()
+        # only the check-in the user chose to save
+        (row,) = _rows(app.config["STORAGE_PATH"])
+        assert row["name"] == "Sam" and "phq9_score" in row
+        assert "555-123-4567" not in row["thoughts"]
+    finally:
+        app.config["STORAGE_ENABLED"] = False
+        storage.init_app(app)
+    assert not storage.checkins.enabled
+
+
+def test_storage_is_off_by_default(client, valid_form):
+    assert client.post("/analyze", data=valid_form()).status_code == 200
+    assert not storage.checkins.enabled
+
+
+def test_expired_checkins_are_purged(tmp_path):
+    s = CheckinStore()
+    s.configure(str(tmp_path / "checkins.db"), retention_days=30)
+    try:
+        now = 100 * 86400
+        scores = {"phq9_score": 1, "phq9_level": "Minimal"}
+        scores.update(gad7_score=1, gad7_level="Minimal")
+        s.save({"name": "old", **scores}, created_at=now - 31 * 86400, user_key="k")
+        s.save({"name": "new"}, created_at=now - 29 * 86400)
+        assert s.flush()
+        conn = s.connect()
+        try:
+            assert s.purge(conn, now=now) == 1
+            assert conn.execute("SELECT COUNT(*) FROM user_trends").fetchone()[0] == 0
+        finally:
+            conn.close()
+        assert [r["name"] for r in _rows(s.path)] == ["new"]
+        assert s.stats()["purged"] == 1
+    finally:
+        s.close()
+
+
+def test_privacy_page_follows_storage_setting(app, client):
+    assert b"We do not store your responses" in client.get("/privacy").data
+    app.config.update(STORAGE_ENABLED=True, STORAGE_RETENTION_DAYS=90)
+    app.extensions["page_cache"].clear()
+    page = " ".join(client.get("/privacy").get_data(as_text=True).split())
+    assert "We do not store your responses" not in page
+    assert "Saved check-ins are deleted after 90 days" in page
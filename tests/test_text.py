@@ -0,0 +1,55 @@
+from app.text import TextAnalyzer, analyze_notes
+
+
+def test_risk_terms_word_boundaries_and_stems():
+    analyzer = TextAnalyzer(["harm", "suicid*", "end my life"])
+    assert analyzer.analyze("I thought about suicide").risk_terms == ("suicid*",)
+    assert analyzer.analyze("Feeling SUICIDAL.").risk
+    assert not analyzer.analyze("Went to the pharmacy, harmony at home").risk
+    assert analyzer.analyze("I want to end my life").risk_terms == ("end my life",)
+    assert not analyzer.analyze("the end of my life story").risk
+
+
+def test_overlapping_phrases():
+    analyzer = TextAnalyzer(["better off dead", "off dead", "dead"])
+    terms = analyzer.analyze("I'd be better off dead").risk_terms
+    assert set(terms) == {"better off dead", "off dead", "dead"}
+
+
+def test_default_lexicon_is_multilingual():
+    assert analyze_notes("Me siento sin esperanza").risk
+    assert analyze_notes("Ich fühle mich hoffnungslos").risk
+    assert analyze_notes("feeling hopeless").risk
+    assert not analyze_notes("feeling fine today").risk
+
+
+def test_redacts_pii():
+    result = analyze_notes(
+        "I'm Sam Lee, write to sam.lee@example.com or call +1 (555) 123-4567 at 7pm",
+        name="Sam Lee",
+    )
+    assert result.redacted == "I'm [name] [name], write to [email] or call [phone] at 7pm"
+
+
+def test_truncates_after_redaction_but_scans_everything():
+    analyzer = TextAnalyzer(["hopeless"], max_chars=20)
+    result = analyzer.analyze("contact: someone@example.com " + "x " * 50 + "hopeless")
+    assert result.redacted == "contact: [email] x x"
+    assert result.truncated is True
+    assert result.risk
+
+    short = analyzer.analyze("all good")
+    assert short.redacted == "all good"
+    assert short.truncated is False
+
+
+def test_default_lexicon_matches_inflections():
+    for text in (
+        "I harmed myself last night",
+        "she harms herself",
+        "thoughts of self-harming",
+        "I keep hurting myself",
+        "I've been cutting myself",
+    ):
+        assert analyze_notes(text).risk, text
+    assert not analyze_notes("Family harmony at the pharmacy").risk
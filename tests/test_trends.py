@@ -0,0 +1,125 @@
+import re
+
+import pytest
+
+from app import storage, trends
+
+
+def _summary(phq9, phq9_level, gad7=0, gad7_level="Minimal"):
+    return {
+        "phq9_score": phq9,
+        "phq9_level": phq9_level,
+        "gad7_score": gad7,
+        "gad7_level": gad7_level,
+    }
+
+
+def _entry(phq9, phq9_level, gad7=0, gad7_level="Minimal", at=0.0):
+    return trends.entry(_summary(phq9, phq9_level, gad7, gad7_level), at)
+
+
+@pytest.fixture()
+def stored_app(app, tmp_path):
+    app.config.update(STORAGE_ENABLED=True, STORAGE_PATH=str(tmp_path / "checkins.db"))
+    storage.init_app(app)
+    yield app
+    app.config["STORAGE_ENABLED"] = False
+    storage.init_app(app)
+
+
+def test_fold_keeps_running_stats_and_window():
+    aggregate = trends.empty()
+    for score in (3, 12, 7, 20):
+        trends.fold(aggregate, _entry(score, "Mild"), window=3)
+    assert aggregate["count"] == 4
+    assert aggregate["phq9"] == {"sum": 42, "min": 3, "max": 20}
+    assert [e["phq9"] for e in aggregate["recent"]] == [12, 7, 20]
+
+
+def test_describe_compares_with_previous_checkin():
+    aggregate = trends.empty()
+    trends.fold(aggregate, _entry(12, "Moderate", 6, "Mild"), window=2)
+    trends.fold(aggregate, _entry(16, "Moderately severe", 6, "Mild"), window=2)
+
+    view = trends.describe(aggregate, _entry(6, "Mild", 4, "Minimal", at=86400), window=2)
+    phq9 = view["instruments"]["phq9"]
+    assert view["count"] == 3
+    assert (phq9["change"], phq9["level_steps"]) == (-10, -2)
+    assert phq9["previous_level"] == "Moderately severe"
+    assert (phq9["average"], phq9["rolling_average"]) == (11.3, 11.0)
+    assert view["instruments"]["gad7"]["level_steps"] == -1
+    assert view["history"][-1]["date"] == "1970-01-02"
+
+
+def test_describe_first_checkin():
+    view = trends.describe(None, _entry(3, "Minimal"), window=5)
+    assert view["count"] == 1
+    assert view["instruments"]["phq9"]["change"] is None
+
+
+def test_user_key_is_keyed_and_stable():
+    assert trends.user_key("my passphrase", "s1") == trends.user_key("my passphrase", "s1")
+    assert trends.user_key("my passphrase", "s1") != trends.user_key("my passphrase", "s2")
+    assert "my passphrase" not in trends.user_key("my passphrase", "s1")
+
+
+def test_writer_updates_aggregate_row(stored_app):
+    store = storage.checkins
+    store.save(_summary(2, "Minimal", 1), created_at=1.0, user_key="k")
+    store.save(_summary(9, "Mild", 1), created_at=2.0, user_key="k")
+    store.save(_summary(27, "Severe", 21, "Severe"), created_at=3.0)
+    assert store.flush()
+
+    aggregate = store.trends("k")
+    assert aggregate["count"] == 2
+    assert aggregate["phq9"] == {"sum": 11, "min": 2, "max": 9}
+    assert store.trends("unknown") is None
+
+
+def test_result_page_shows_trends_for_returning_key(stored_app, valid_form):
+    client = stored_app.test_client()
+    first = client.post("/analyze", data=valid_form(save_checkin="on", new_trend_key="on"))
+    assert b"First check-in" in first.data
+    key = re.search(rb"Your personal key: <code>([^<]+)</code>", first.data).group(1).decode()
+    assert trends.valid_key(key)
+    assert storage.checkins.flush()
+
+    answers = {f"phq9_{i}": "2" for i in range(1, 10)}
+    second = client.post("/analyze", data=valid_form(save_checkin="on", trend_key=key, **answers))
+    assert b"Check-in 2 with this key" in second.data
+    assert b"+18 points" in second.data
+    # the key is only shown when it is issued
+    assert b"Your personal key" not in second.data
+
+    other = client.post("/analyze", data=valid_form(save_checkin="on", new_trend_key="on"))
+    assert b"First check-in" in other.data
+
+
+def test_chosen_passphrases_are_rejected(stored_app, valid_form):
+    client = stored_app.test_client()
+    for key in ("password", "correct horse battery staple", trends.new_key()[:-1]):
+        response = client.post("/analyze", data=valid_form(save_checkin="on", trend_key=key))
+        assert b"Enter your personal key exactly" in response.data
+
+
+def test_new_keys_are_random():
+    keys = {trends.new_key() for _ in range(100)}
+    assert len(keys) == 100 and all(trends.valid_key(k) for k in keys)
+
+
+def test_key_needs_consent_to_save(stored_app, valid_form):
+    response = stored_app.test_client().post("/analyze", data=valid_form(new_trend_key="on"))
+    assert "Tick “Save this check-in” to track trends.".encode() in response.data
+    assert storage.checkins.flush()
+    conn = storage.checkins.connect()
+    try:
+        assert conn.execute("SELECT COUNT(*) FROM checkins").fetchone()[0] == 0
+    finally:
+        conn.close()
+
+
+def test_key_field_hidden_without_storage(client, valid_form):
+    page = client.get("/", headers={"X-Forwarded-Proto": "https"})
+    assert page.status_code == 200 and b'name="trend_key"' not in page.data
+    response = client.post("/analyze", data=valid_form(trend_key="correct horse"))
+    assert b"Your Trends" not in response.data
@@ -62,3 +62,39 @@ def test_score_gad7_boundary_cases():
     # Test moderate-severe boundary (14-15)
     assert score_gad7([2, 2, 2, 2, 2, 2, 2])[1] == "Moderate" # Score: 14
     assert score_gad7([3, 2, 2, 2, 2, 2, 2])[1] == "Severe"   # Score: 15
+
+
+def test_score_batch_matches_single_row():
+    """Batch scorers agree with the single-row functions on every row"""
+    import itertools
+
+    import numpy as np
+
+    from app.utils import GAD7_LEVELS, PHQ9_LEVELS, score_gad7_batch, score_phq9_batch
+
+    rng = np.random.default_rng(42)
+    phq = rng.integers(0, 4, size=(500, 9))
+    # make sure every score 0..27 and both item-9 states appear
+    phq[:28] = [[min(3, max(0, s - 3 * i)) for i in range(9)] for s in range(28)]
+    scores, codes, suicidal = score_phq9_batch(phq)
+    for row, s, c, flag in zip(phq.tolist(), scores, codes, suicidal, strict=True):
+        assert score_phq9(row) == (s, PHQ9_LEVELS[c], flag)
+
+    gad = np.array(list(itertools.product(range(4), repeat=7))[::7])
+    scores, codes = score_gad7_batch(gad)
+    for row, s, c in zip(gad.tolist(), scores, codes, strict=True):
+        assert score_gad7(row) == (s, GAD7_LEVELS[c])
+
+
+def test_score_batch_invalid_shape():
+    import numpy as np
+    import pytest
+
+    from app.utils import score_gad7_batch, score_phq9_batch
+
+    with pytest.raises(ValueError):
+        score_phq9_batch(np.zeros((3, 7), dtype=int))
+    with pytest.raises(ValueError):
+        score_gad7_batch([0] * 7)
+    with pytest.raises(ValueError):
+        score_gad7_batch(np.zeros((2, 7), dtype=float))